@@ -0,0 +1,69 @@
+"""Embeddings data type benchmark.
+
+Compares the size, in memory and pickled, of documents embedded by `GensimEmbeddings` with each output data
+type and the accuracy of the converted embeddings, measured by the cosine similarity and maximum absolute
+error with respect to the float32 embeddings.
+
+Usage:
+    python benchmarks/embeddings_dtype.py --vectors 100000 --dim 300 --docs 1000
+"""
+
+import argparse
+import pickle
+
+import numpy as np
+from gensim.models import KeyedVectors
+
+from nlpiper.core import Document
+from nlpiper.transformers.embeddings import GensimEmbeddings, dequantize
+from nlpiper.transformers.tokenizers import BasicTokenizer
+
+CONFIGS = [(None, 'vector'), ('float16', 'vector'), ('int8', 'vector'), ('int8', 'dimension')]
+
+
+def cosine(a, b):
+    norm = np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1)
+    return np.sum(a * b, axis=-1) / np.where(norm == 0, 1, norm)
+
+
+def nbytes(doc):
+    arrays = [doc.embedded, doc.tokens_embedded, getattr(doc, 'embedded_scale', None),
+              getattr(doc, 'tokens_embedded_scale', None)]
+    return sum(a.nbytes for a in arrays if a is not None)
+
+
+def main(num_vectors, dim, num_docs):
+    rnd = np.random.default_rng(0)
+    keys = [f"token{i}" for i in range(num_vectors)]
+    kv = KeyedVectors(dim, count=num_vectors)
+    kv.add_vectors(keys, rnd.normal(scale=0.4, size=(num_vectors, dim)).astype(np.float32))
+
+    tokenizer = BasicTokenizer()
+    docs = [tokenizer(Document(' '.join(rnd.choice(keys, size=rnd.integers(10, 200))))) for _ in range(num_docs)]
+    expected = GensimEmbeddings(kv).batch(docs)
+    expected_tokens = np.concatenate([d.tokens_embedded for d in expected])
+    expected_docs = np.stack([d.embedded for d in expected])
+
+    print(f"{'dtype':>8} | {'scale':>9} | {'memory (MB)':>11} | {'pickled (MB)':>12} | "
+          f"{'token cos':>9} | {'token err':>9} | {'doc cos':>9} | {'doc err':>9}")
+    for dtype, scale in CONFIGS:
+        out = GensimEmbeddings(kv, dtype=dtype, scale=scale).batch(docs)
+
+        memory = sum(nbytes(d) for d in out) / 1024 ** 2
+        pickled = len(pickle.dumps(out, protocol=pickle.HIGHEST_PROTOCOL)) / 1024 ** 2
+        tokens = np.concatenate([dequantize(d.tokens_embedded, getattr(d, 'tokens_embedded_scale', None))
+                                 for d in out])
+        pooled = np.stack([dequantize(d.embedded, getattr(d, 'embedded_scale', None)) for d in out])
+
+        print(f"{str(dtype):>8} | {scale:>9} | {memory:>11.1f} | {pickled:>12.1f} | "
+              f"{cosine(tokens, expected_tokens).mean():>9.6f} | {np.abs(tokens - expected_tokens).max():>9.5f} | "
+              f"{cosine(pooled, expected_docs).mean():>9.6f} | {np.abs(pooled - expected_docs).max():>9.5f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vectors', type=int, default=100_000)
+    parser.add_argument('--dim', type=int, default=300)
+    parser.add_argument('--docs', type=int, default=1_000)
+    args = parser.parse_args()
+    main(args.vectors, args.dim, args.docs)
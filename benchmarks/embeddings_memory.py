@@ -0,0 +1,88 @@
+"""Embeddings memory benchmark.
+
+Measures the resident memory (RSS) of worker processes applying `GensimEmbeddings`, when the keyed vectors
+are loaded in memory, and copied to each worker, and when they are loaded as a read-only memory map with
+`load_keyed_vectors`, and the workers share the pages of the file.
+
+`RssAnon` is the private memory of each worker, `RssFile` the memory backed by files, which is shared by
+the workers mapping the same file. Reads `/proc/self/status`, so it only runs on Linux.
+
+Usage:
+    python benchmarks/embeddings_memory.py --vectors 1000000 --dim 300 --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+from gensim.models import KeyedVectors
+
+from nlpiper.core import Document
+from nlpiper.transformers.embeddings import (
+    GensimEmbeddings,
+    load_keyed_vectors,
+    save_keyed_vectors
+)
+from nlpiper.transformers.tokenizers import BasicTokenizer
+
+_transformer = None
+
+
+def memory():
+    out = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, value = line.split(':', 1)
+            if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                out[key] = int(value.split()[0]) / 1024
+    return out
+
+
+def init(transformer):
+    global _transformer
+    _transformer = transformer
+
+
+def work(texts):
+    tokenizer = BasicTokenizer()
+    for text in texts:
+        _transformer(tokenizer(Document(text)), inplace=True)
+    return memory()
+
+
+def main(num_vectors, dim, num_workers, num_docs):
+    rnd = np.random.default_rng(0)
+    keys = [f"token{i}" for i in range(num_vectors)]
+    texts = [' '.join(rnd.choice(keys, size=100)) for _ in range(num_docs)]
+    chunks = [texts[i::num_workers] for i in range(num_workers)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'vectors.kv')
+        kv = KeyedVectors(dim, count=num_vectors)
+        kv.add_vectors(keys, rnd.random((num_vectors, dim), dtype=np.float32))
+        save_keyed_vectors(kv, path)
+        del kv
+
+        print(f"matrix size: {num_vectors * dim * 4 / 1024 ** 2:.0f} MB")
+        print(f"{'mode':>8} | {'worker':>6} | {'VmRSS (MB)':>10} | {'RssAnon (MB)':>12} | {'RssFile (MB)':>12}")
+        for mode, mmap in (('memory', None), ('mmap', 'r')):
+            transformer = GensimEmbeddings(load_keyed_vectors(path, mmap=mmap))
+            context = multiprocessing.get_context('spawn')
+            with context.Pool(num_workers, initializer=init, initargs=(transformer,)) as pool:
+                results = pool.map(work, chunks)
+
+            for i, m in enumerate(results):
+                print(f"{mode:>8} | {i:>6} | {m['VmRSS']:>10.0f} | {m['RssAnon']:>12.0f} | {m['RssFile']:>12.0f}")
+            del transformer
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vectors', type=int, default=1_000_000)
+    parser.add_argument('--dim', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--docs', type=int, default=1_000)
+    args = parser.parse_args()
+    main(args.vectors, args.dim, args.workers, args.docs)
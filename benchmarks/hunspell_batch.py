@@ -0,0 +1,88 @@
+"""Hunspell batch benchmark.
+
+Compares the throughput of `SpellCheck` and `Stemmer(version='hunspell')` when the tokens are sent to Hunspell
+one at a time (previous implementation), once per distinct token of each document, and once per distinct token
+of each batch of documents with `Compose.pipe`.
+
+Requires cyhunspell.
+
+Usage:
+    python benchmarks/hunspell_batch.py --docs 2000 --batch-size 256
+"""
+
+import argparse
+import random
+import time
+
+from nlpiper.core import Compose, Document
+from nlpiper.transformers.normalizers import SpellCheck, Stemmer
+from nlpiper.transformers.tokenizers import BasicTokenizer
+
+WORDS = ['the', 'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog', 'running', 'computers', 'faster',
+         'spelling', 'mistakes', 'happen', 'quite', 'often', 'in', 'user', 'content']
+
+
+def misspell(word, rnd):
+    i = rnd.randrange(len(word))
+    return word[:i] + rnd.choice('abcdefghijklmnopqrstuvwxyz') + word[i + 1:]
+
+
+def corpus(num_docs, num_tokens, rnd):
+    docs = []
+    for _ in range(num_docs):
+        tokens = [rnd.choice(WORDS) for _ in range(num_tokens)]
+        docs.append(' '.join(misspell(t, rnd) if rnd.random() < 0.2 else t for t in tokens))
+    return docs
+
+
+def per_token(normalizer, docs):
+    for doc in docs:
+        d = doc._deepcopy()
+        for token in d.tokens:
+            for attribute, value in normalizer.normalize(token.cleaned).items():
+                setattr(token, attribute, value)
+
+
+def per_document(normalizer, docs):
+    for doc in docs:
+        normalizer(doc)
+
+
+def per_batch(normalizer, docs, batch_size):
+    for _ in Compose([normalizer]).pipe(docs, batch_size=batch_size):
+        pass
+
+
+def timeit(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main(num_docs, num_tokens, batch_size):
+    rnd = random.Random(0)
+    tokenizer = BasicTokenizer()
+    docs = [tokenizer(Document(text)) for text in corpus(num_docs, num_tokens, rnd)]
+
+    transformers = [
+        ('SpellCheck', lambda: SpellCheck(max_distance=2)),
+        ('Stemmer', lambda: Stemmer(version='hunspell', language='en_GB')),
+    ]
+
+    print(f"{'transformer':>11} | {'path':>16} | {'docs/s':>10}")
+    for name, create in transformers:
+        for path, func in (('per token', per_token), ('per document', per_document)):
+            elapsed = timeit(func, create(), docs)
+            print(f"{name:>11} | {path:>16} | {num_docs / elapsed:>10.0f}")
+
+        elapsed = timeit(per_batch, create(), docs, batch_size)
+        print(f"{name:>11} | {'batch':>16} | {num_docs / elapsed:>10.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=2_000)
+    parser.add_argument('--tokens', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args()
+    main(args.docs, args.tokens, args.batch_size)
@@ -0,0 +1,71 @@
+"""Long documents benchmark.
+
+Compares the time to process a single long document, e.g. a book or a log file, sequentially and split in segments
+processed by several threads with `Compose(..., segment_size=..., workers=...)`, and checks both give the same
+tokens for each tokenizer. Tokenizers which are not `segmentable`, e.g. `MosesTokenizer`, tokenize the whole
+document, so only the transformers before them are applied to the segments.
+
+Usage:
+    python benchmarks/long_documents.py --sizes 1 10 100 --segment-size 100000 --workers 1 2 4 8 \\
+        --tokenizers BasicTokenizer MosesTokenizer
+"""
+
+import argparse
+import random
+import time
+
+from nlpiper.core import Compose, Document
+from nlpiper.transformers import tokenizers
+from nlpiper.transformers.cleaners import CleanNumber
+from nlpiper.transformers.normalizers import CaseTokens, RemovePunctuation
+
+WORDS = ['The', 'quick', 'brown', 'fox', 'jumps', 'over', 'the', 'lazy', 'dog', 'in', '2021', 'and', 'runs',
+         'away,', 'again.', 'Really?', 'yes!']
+
+
+def long_text(num_chars, rnd):
+    parts = []
+    length = 0
+    while length < num_chars:
+        sentence = ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(5, 30)))
+        separator = rnd.choice([' ', ' ', '\n', '\n\n'])
+        parts.append(sentence + separator)
+        length += len(sentence) + len(separator)
+    return ''.join(parts)[:num_chars]
+
+
+def timeit(func):
+    start = time.perf_counter()
+    out = func()
+    return out, time.perf_counter() - start
+
+
+def main(sizes, segment_size, workers, tokenizer_names):
+    rnd = random.Random(0)
+    texts = {size: long_text(int(size * 1_000_000), rnd) for size in sizes}
+
+    print(f"{'tokenizer':>15} | {'size (MB)':>9} | {'path':>20} | {'seconds':>8} | {'MB/s':>6} | {'same':>5}")
+    for name in tokenizer_names:
+        pipe = Compose([CleanNumber(), getattr(tokenizers, name)(), CaseTokens(), RemovePunctuation()])
+        for size, text in texts.items():
+            doc = Document(text)
+
+            expected, elapsed = timeit(lambda: pipe(doc))
+            print(f"{name:>15} | {size:>9} | {'sequential':>20} | {elapsed:>8.2f} | {size / elapsed:>6.1f} | "
+                  f"{'':>5}")
+
+            for n in workers:
+                out, elapsed = timeit(lambda: pipe(doc, segment_size=segment_size, workers=n))
+                same = [t.cleaned for t in out.tokens] == [t.cleaned for t in expected.tokens]
+                print(f"{name:>15} | {size:>9} | {f'segmented, {n} workers':>20} | {elapsed:>8.2f} | "
+                      f"{size / elapsed:>6.1f} | {str(same):>5}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--segment-size', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--tokenizers', nargs='+', default=['BasicTokenizer', 'MosesTokenizer'])
+    args = parser.parse_args()
+    main(args.sizes, args.segment_size, args.workers, args.tokenizers)
@@ -0,0 +1,63 @@
+"""Vocabulary membership benchmark.
+
+Compares the membership test of a Python list (previous `VocabularyFilter` implementation),
+`Vocabulary` and `MappedVocabulary` for vocabularies of different sizes.
+
+Usage:
+    python benchmarks/vocabulary.py --sizes 1000 100000 10000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from nlpiper.core.vocabulary import (
+    MappedVocabulary,
+    Vocabulary
+)
+
+# A list membership test on large vocabularies takes too long to be measured
+MAX_LIST_SIZE = 100_000
+
+
+def timeit(func, *args):
+    start = time.perf_counter()
+    out = func(*args)
+    return out, time.perf_counter() - start
+
+
+def lookup(vocab, queries):
+    return sum(query in vocab for query in queries)
+
+
+def main(sizes, num_queries):
+    print(f"{'size':>10} | {'engine':>17} | {'build (s)':>10} | {'lookups/s':>12}")
+    for size in sizes:
+        tokens = [f"token{i}" for i in range(size)]
+        queries = [f"token{random.randrange(2 * size)}" for _ in range(num_queries)]
+
+        engines = []
+        if size <= MAX_LIST_SIZE:
+            engines.append(('list', lambda: list(tokens)))
+        engines.append(('Vocabulary', lambda: Vocabulary(tokens)))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'vocab.bin')
+            engines.append(('MappedVocabulary', lambda: MappedVocabulary.build(tokens, path)))
+
+            for name, build in engines:
+                vocab, build_time = timeit(build)
+                queries_run = queries if name != 'list' else queries[:1000]
+                _, lookup_time = timeit(lookup, vocab, queries_run)
+                print(f"{size:>10} | {name:>17} | {build_time:>10.3f} | {len(queries_run) / lookup_time:>12.0f}")
+                del vocab
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 10_000_000])
+    parser.add_argument('--queries', type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.sizes, args.queries)
@@ -1,3 +1,6 @@
 """Core Module."""
 from nlpiper.core.document import Document
+from nlpiper.core.vocabulary import IdVocabulary, MappedVocabulary, Vocabulary
+from nlpiper.core.autotune import BatchSizeTuner
 from nlpiper.core.composition import Compose
+from nlpiper.core.vectorizer import Vectorizer
@@ -0,0 +1,155 @@
+"""Batch Size Autotuning Module.
+
+The best batch size depends on the pipeline and on the machine, e.g. a pipeline with `SpacyTokenizer` and one with
+`BasicTokenizer` and `GensimEmbeddings` have very different optimal batch sizes. `BatchSizeTuner` measures the
+throughput and the latency of the batches processed by `Compose.pipe` and searches the batch size with the highest
+throughput whose batches are processed within a latency ceiling.
+"""
+
+from typing import (
+    Any,
+    Dict,
+    Optional
+)
+
+
+class BatchSizeTuner:
+    """Batch size autotuner."""
+
+    def __init__(self, min_size: int = 1, max_size: int = 1024, max_latency: Optional[float] = None,
+                 samples: int = 3, tolerance: float = 0.05):
+        """Batch size autotuner.
+
+        The batch size starts at the batch size given to `Compose.pipe` and is doubled while the throughput,
+        measured over `samples` batches of each size, improves by more than `tolerance`. If larger batches do not
+        improve on the initial size, the batch size is halved instead while the throughput improves, so an initial
+        size above the best one is also tuned. When the throughput stops improving the tuner settles on the best
+        batch size found. Whenever a batch takes longer than `max_latency`,
+        the batch size limit is halved, and the tuner settles on the best size below it or searches again from it.
+
+        Args:
+            min_size (int): Minimum batch size.
+            max_size (int): Maximum batch size.
+            max_latency (Optional[float]): Maximum time, in seconds, to process a batch, by default unlimited.
+            samples (int): Number of batches measured for each batch size.
+            tolerance (float): Minimum relative improvement of the throughput to keep changing the batch size.
+        """
+        if not 0 < min_size <= max_size:
+            raise ValueError(f"Batch size limits must satisfy 0 < min_size <= max_size, {min_size} and {max_size} "
+                             f"given.")
+        if samples <= 0:
+            raise ValueError(f"Samples must be a positive number, {samples} given.")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_latency = max_latency
+        self.samples = samples
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self, batch_size: Optional[int] = None) -> None:
+        """Restart the search.
+
+        Args:
+            batch_size (Optional[int]): Initial batch size, clipped to the limits, by default the minimum size.
+        """
+        self.batch_size = min(max(batch_size or self.min_size, self.min_size), self.max_size)
+        self.limit = self.max_size
+        self._search(self.batch_size)
+
+    def _search(self, start: int) -> None:
+        """Start a search from the batch size `start`, trying larger sizes first."""
+        self._start = start
+        self._growing = True
+        self.converged = False
+        self.best_size: Optional[int] = None
+        self.best_throughput = 0.0
+        self._measure_again()
+
+    def record(self, docs: int, seconds: float) -> None:
+        """Record the time taken to process a batch and update the batch size.
+
+        Batches smaller than the current batch size, e.g. the last batch of a stream, are not measured.
+
+        Args:
+            docs (int): Number of documents of the batch.
+            seconds (float): Time taken to process the batch.
+        """
+        if docs < self.batch_size:
+            return
+
+        if self.max_latency is not None and seconds > self.max_latency and self.batch_size > self.min_size:
+            self._shrink()
+            return
+
+        if self.converged:
+            return
+
+        self._docs += docs
+        self._seconds += seconds
+        self._batches += 1
+        if self._batches < self.samples:
+            return
+
+        throughput = self._docs / max(self._seconds, 1e-9)
+        self._measure_again()
+        if throughput > self.best_throughput * (1 + self.tolerance):
+            self.best_throughput = throughput
+            self.best_size = self.batch_size
+            if self._move():
+                return
+
+        if self._growing and self.best_size == self._start:
+            # Larger batches are not faster than the initial size, search the smaller sizes
+            self._growing = False
+            self.batch_size = self._start
+            if self._move():
+                return
+
+        self.batch_size = self.best_size or self.batch_size
+        self.converged = True
+
+    def _move(self) -> bool:
+        """Move to the next batch size in the search direction, returns False at the limits."""
+        if self._growing:
+            size = min(self.batch_size * 2, self.limit)
+        else:
+            size = max(self.batch_size // 2, self.min_size)
+        moved = size != self.batch_size
+        self.batch_size = size
+        return moved
+
+    def _shrink(self) -> None:
+        """Lower the batch size limit below the current batch size, whose batches are too slow."""
+        self.limit = max(self.batch_size // 2, self.min_size)
+        if self.best_size is not None and self.best_size <= self.limit:
+            self.batch_size = self.best_size
+            self.converged = True
+        else:
+            # Search again from the new limit
+            self.batch_size = self.limit
+            self._search(self.limit)
+        self._measure_again()
+
+    def _measure_again(self) -> None:
+        self._docs = 0
+        self._seconds = 0.0
+        self._batches = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Autotuner statistics."""
+        return {
+            'batch_size': self.batch_size,
+            'best_size': self.best_size,
+            'best_docs_per_second': self.best_throughput,
+            'converged': self.converged,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'limit': self.limit,
+            'max_latency': self.max_latency
+        }
+
+    def __repr__(self) -> str:
+        return "%s(min_size=%r, max_size=%r, max_latency=%r)" % (
+            self.__class__.__name__, self.min_size, self.max_size, self.max_latency)
@@ -0,0 +1,637 @@
+"""Cache Module.
+
+Bounded in-memory caches used to memoise the results of expensive transformations, e.g. stemming or
+spell checking, which are repeatedly applied to the same tokens.
+
+In-memory caches can be placed in front of an on-disk SQLite store with `TieredCache`, which keeps the results
+between runs and allows different processes to share them. All caches keep track of hits, misses and evictions.
+
+`DocumentCache` stores whole documents processed by a pipeline, so `Compose` does not process the same text again.
+"""
+
+import hashlib
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Optional
+)
+
+from nlpiper.core.document import Document
+from nlpiper.logger import log
+
+
+class BaseCache:
+    """Base class to all bounded caches."""
+
+    def __init__(self, maxsize: Optional[int] = 1024):
+        """Bounded cache.
+
+        Args:
+            maxsize (Optional[int]): Maximum number of entries kept in the cache, `None` for caches without limit.
+        """
+        if maxsize is not None and maxsize <= 0:
+            raise ValueError(f"Cache size must be a positive number, {maxsize} given.")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get the value stored for a key, registering a cache hit or miss.
+
+        Args:
+            key (Hashable): Entry key.
+            default (Any): Value returned when the key is not cached.
+
+        Returns: Any
+        """
+        raise NotImplementedError
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting an entry if the cache is full.
+
+        Args:
+            key (Hashable): Entry key.
+            value (Any): Entry value.
+        """
+        raise NotImplementedError
+
+    def items(self):
+        """Get the cached entries, from the first to the last to be evicted."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Ratio of lookups that were found in the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hit_ratio,
+            'size': len(self),
+            'maxsize': self.maxsize
+        }
+
+    def save(self, path: str, tag: Optional[str] = None) -> None:
+        """Persist the cached entries to disk.
+
+        Args:
+            path (str): File path where the entries will be stored.
+            tag (Optional[str]): Identifier of the cached content, which must match when loading the entries.
+        """
+        with open(path, 'wb') as f:
+            pickle.dump({'tag': tag, 'items': list(self.items())}, f)
+
+    def load(self, path: str, tag: Optional[str] = None) -> None:
+        """Load entries persisted with `save`.
+
+        Entries are only loaded if `tag` matches the one used to save them. Only load files from trusted sources,
+        since entries are stored with pickle.
+
+        Args:
+            path (str): File path where the entries were stored.
+            tag (Optional[str]): Identifier of the cached content.
+        """
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+
+        if state['tag'] != tag:
+            log.warning("Cache file %s was created for %r and can not be used for %r", path, state['tag'], tag)
+            return
+
+        for key, value in state['items']:
+            self.put(key, value)
+
+    def __contains__(self, key: Hashable) -> bool:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return "%s(maxsize=%r)" % (self.__class__.__name__, self.maxsize)
+
+
+class LRUCache(BaseCache):
+    """Least recently used cache."""
+
+    maxsize: int
+
+    def __init__(self, maxsize: int = 1024):
+        """Least recently used cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept in the cache.
+        """
+        super().__init__(maxsize)
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get the value stored for a key, registering a cache hit or miss.
+
+        Args:
+            key (Hashable): Entry key.
+            default (Any): Value returned when the key is not cached.
+
+        Returns: Any
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (Hashable): Entry key.
+            value (Any): Entry value.
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        elif len(self._entries) >= self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._entries[key] = value
+
+    def items(self):
+        """Get the cached entries, from the least to the most recently used."""
+        return self._entries.items()
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        super().clear()
+        self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LFUCache(BaseCache):
+    """Least frequently used cache.
+
+    Entries are grouped by number of accesses, so both lookups and evictions take constant time.
+    Ties between the least frequently used entries are broken by evicting the least recently used one.
+    """
+
+    maxsize: int
+
+    def __init__(self, maxsize: int = 1024):
+        """Least frequently used cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept in the cache.
+        """
+        super().__init__(maxsize)
+        self._entries: Dict[Hashable, Any] = {}
+        self._frequency: Dict[Hashable, int] = {}
+        self._buckets: Dict[int, OrderedDict] = {}
+        self._min_frequency = 0
+
+    def _touch(self, key: Hashable) -> None:
+        frequency = self._frequency[key]
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+            if self._min_frequency == frequency:
+                self._min_frequency = frequency + 1
+
+        self._frequency[key] = frequency + 1
+        self._buckets.setdefault(frequency + 1, OrderedDict())[key] = None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get the value stored for a key, registering a cache hit or miss.
+
+        Args:
+            key (Hashable): Entry key.
+            default (Any): Value returned when the key is not cached.
+
+        Returns: Any
+        """
+        if key not in self._entries:
+            self.misses += 1
+            return default
+
+        self._touch(key)
+        self.hits += 1
+        return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least frequently used entry if the cache is full.
+
+        Args:
+            key (Hashable): Entry key.
+            value (Any): Entry value.
+        """
+        if key in self._entries:
+            self._entries[key] = value
+            self._touch(key)
+            return
+
+        if len(self._entries) >= self.maxsize:
+            bucket = self._buckets[self._min_frequency]
+            evicted, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self._buckets[self._min_frequency]
+            del self._entries[evicted]
+            del self._frequency[evicted]
+            self.evictions += 1
+
+        self._entries[key] = value
+        self._frequency[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_frequency = 1
+
+    def items(self):
+        """Get the cached entries, from the least to the most frequently used."""
+        return [(key, self._entries[key]) for frequency in sorted(self._buckets) for key in self._buckets[frequency]]
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        super().clear()
+        self._entries.clear()
+        self._frequency.clear()
+        self._buckets.clear()
+        self._min_frequency = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteCache(BaseCache):
+    """On-disk cache stored in a SQLite database.
+
+    Keys are stored by their `repr`, so they must have a deterministic representation, e.g. strings, numbers or
+    tuples of them, and values are stored with pickle. Writes are kept in memory and committed in batches, use
+    `flush` to commit the pending ones. Each batch is written in a single short transaction and the database is
+    opened in WAL mode, so several caches, e.g. of different processes or pipelines, can share the same file.
+    """
+
+    def __init__(self, path: str, table: str = 'cache', commit_every: int = 1000, timeout: float = 30.0):
+        """On-disk cache stored in a SQLite database.
+
+        Args:
+            path (str): SQLite database file.
+            table (str): Table where the entries are stored.
+            commit_every (int): Maximum number of writes kept in memory before committing them.
+            timeout (float): Seconds to wait for other connections to finish writing to the database.
+        """
+        super().__init__(maxsize=None)
+        self.path = path
+        self.table = table
+        self.commit_every = commit_every
+        self.timeout = timeout
+        self._pending: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self) -> None:
+        # Without implicit transactions, the database is only locked while `_commit` writes the pending entries
+        self._connection = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                                           isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        # In WAL mode the database can not be corrupted without syncing every commit, only the last ones be lost
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}" (key TEXT PRIMARY KEY, value BLOB)')
+
+    def _commit(self) -> None:
+        """Write the pending entries in a single transaction, must be called holding the lock."""
+        if not self._pending:
+            return
+
+        self._connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._connection.executemany(f'INSERT OR REPLACE INTO "{self.table}" (key, value) VALUES (?, ?)',
+                                         self._pending.items())
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        self._connection.execute('COMMIT')
+        self._pending.clear()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get the value stored for a key, registering a cache hit or miss.
+
+        Args:
+            key (Hashable): Entry key.
+            default (Any): Value returned when the key is not cached.
+
+        Returns: Any
+        """
+        with self._lock:
+            data = self._pending.get(repr(key))
+            if data is None:
+                row = self._connection.execute(f'SELECT value FROM "{self.table}" WHERE key = ?',
+                                               (repr(key),)).fetchone()
+                data = row[0] if row is not None else None
+            if data is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+        return pickle.loads(data)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value.
+
+        Args:
+            key (Hashable): Entry key.
+            value (Any): Entry value.
+        """
+        data = pickle.dumps(value)
+        with self._lock:
+            self._pending[repr(key)] = data
+            if len(self._pending) >= self.commit_every:
+                self._commit()
+
+    def flush(self) -> None:
+        """Commit the pending writes."""
+        with self._lock:
+            self._commit()
+
+    def items(self):
+        """Get the stored entries, with keys in their `repr` form."""
+        with self._lock:
+            self._commit()
+            rows = self._connection.execute(f'SELECT key, value FROM "{self.table}"').fetchall()
+        return [(key, pickle.loads(value)) for key, value in rows]
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            super().clear()
+            self._pending.clear()
+            self._connection.execute(f'DELETE FROM "{self.table}"')
+
+    def close(self) -> None:
+        """Commit the pending writes and close the database."""
+        self.flush()
+        self._connection.close()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Copies, e.g. of a pickled pipeline, commit the pending writes and open their own connection to the file
+        self.flush()
+        state = self.__dict__.copy()
+        for name in ('_connection', '_lock', '_pending'):
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._connect()
+
+    def __del__(self):
+        try:
+            self.close()
+        except (AttributeError, sqlite3.Error):
+            pass
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            if repr(key) in self._pending:
+                return True
+            return self._connection.execute(f'SELECT 1 FROM "{self.table}" WHERE key = ?',
+                                            (repr(key),)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._commit()
+            return self._connection.execute(f'SELECT COUNT(*) FROM "{self.table}"').fetchone()[0]
+
+    def __repr__(self) -> str:
+        return "%s(%r, table=%r)" % (self.__class__.__name__, self.path, self.table)
+
+
+class TieredCache:
+    """Two-level cache, a bounded in-memory cache in front of an optional on-disk cache.
+
+    Entries found on disk are promoted to memory and new entries are written to both levels.
+    """
+
+    def __init__(self, memory: BaseCache, disk: Optional[BaseCache] = None):
+        """Two-level cache.
+
+        Args:
+            memory (BaseCache): In-memory cache, first level to be checked.
+            disk (Optional[BaseCache]): On-disk cache, checked when an entry is not found in memory.
+        """
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get the value stored for a key, looking up memory first and disk afterwards.
+
+        Args:
+            key (Hashable): Entry key.
+            default (Any): Value returned when the key is not cached.
+
+        Returns: Any
+        """
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key, _MISSING)
+            if value is not _MISSING:
+                self.memory.put(key, value)
+                return value
+
+        return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value in both levels.
+
+        Args:
+            key (Hashable): Entry key.
+            value (Any): Entry value.
+        """
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def flush(self) -> None:
+        """Commit the pending writes of the on-disk cache."""
+        if isinstance(self.disk, SqliteCache):
+            self.disk.flush()
+
+    @property
+    def hits(self) -> int:
+        """Number of lookups found in any of the levels."""
+        return self.memory.hits + (self.disk.hits if self.disk is not None else 0)
+
+    @property
+    def misses(self) -> int:
+        """Number of lookups not found in any of the levels."""
+        return self.disk.misses if self.disk is not None else self.memory.misses
+
+    @property
+    def hit_ratio(self) -> float:
+        """Ratio of lookups that were found in the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics, overall and per level."""
+        stats = {'hits': self.hits, 'misses': self.misses, 'hit_ratio': self.hit_ratio, 'memory': self.memory.stats}
+        if self.disk is not None:
+            stats['disk'] = self.disk.stats
+        return stats
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.memory or (self.disk is not None and key in self.disk)
+
+    def __len__(self) -> int:
+        return len(self.disk) if self.disk is not None else len(self.memory)
+
+    def __repr__(self) -> str:
+        return "%s(%r, %r)" % (self.__class__.__name__, self.memory, self.disk)
+
+
+class DocumentCache:
+    """Content-addressed cache of processed documents.
+
+    Documents are stored serialized, keyed by a hash of the pipeline fingerprint and of the input text, so a
+    pipeline whose transformers, their options or the models they use change never gets the documents processed
+    by the previous one. The
+    serialized documents are kept in a bounded in-memory cache, in front of an optional SQLite file which keeps
+    them between runs and can be shared by different processes and pipelines.
+    """
+
+    def __init__(self, maxsize: int = 1024, policy: str = 'lru', path: Optional[str] = None,
+                 table: str = 'documents'):
+        """Content-addressed cache of processed documents.
+
+        Args:
+            maxsize (int): Maximum number of documents kept in memory.
+            policy (str): In-memory cache eviction policy, `"lru"` (least recently used) or `"lfu"` (least
+                frequently used).
+            path (Optional[str]): SQLite file used as a second level cache, by default documents are only kept
+                in memory.
+            table (str): Table of the SQLite file where the documents are stored.
+        """
+        disk = SqliteCache(path, table=table) if path is not None else None
+        self.cache = TieredCache(create_cache(maxsize, policy), disk)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    @staticmethod
+    def key(pipeline: str, text: str) -> str:
+        """Key of the result of processing a text with a pipeline.
+
+        Args:
+            pipeline (str): Pipeline fingerprint, see `nlpiper.core.fingerprint`.
+            text (str): Input text.
+
+        Returns: str
+        """
+        return hashlib.sha256(f'{pipeline}\0{text}'.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def get(self, key: str) -> Optional[Document]:
+        """Get a new copy of the document stored for a key.
+
+        Args:
+            key (str): Entry key, see `key`.
+
+        Returns: Optional[Document], `None` if the key is not cached.
+        """
+        data = self.cache.get(key)
+        if data is None:
+            return None
+
+        self.bytes_read += len(data)
+        return pickle.loads(data)
+
+    def put(self, key: str, doc: Document) -> None:
+        """Store a document.
+
+        Args:
+            key (str): Entry key, see `key`.
+            doc (Document): Processed document.
+        """
+        data = pickle.dumps(doc, protocol=pickle.HIGHEST_PROTOCOL)
+        self.bytes_written += len(data)
+        self.cache.put(key, data)
+
+    def flush(self) -> None:
+        """Commit the pending writes of the on-disk cache."""
+        self.cache.flush()
+
+    def clear(self) -> None:
+        """Remove all documents and reset the statistics."""
+        self.cache.memory.clear()
+        if self.cache.disk is not None:
+            self.cache.disk.clear()
+        self.bytes_read = self.bytes_written = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Ratio of lookups that were found in the cache."""
+        return self.cache.hit_ratio
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics, overall and per level, with the bytes of the serialized documents."""
+        stats = self.cache.stats
+        stats['bytes_read'] = self.bytes_read
+        stats['bytes_written'] = self.bytes_written
+        stats['memory']['bytes'] = sum(len(data) for _, data in self.cache.memory.items())
+        return stats
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.cache
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def __repr__(self) -> str:
+        return "%s(%r)" % (self.__class__.__name__, self.cache)
+
+
+_MISSING = object()
+
+
+def create_cache(maxsize: int, policy: str = 'lru') -> BaseCache:
+    """Create a bounded cache.
+
+    Args:
+        maxsize (int): Maximum number of entries kept in the cache.
+        policy (str): Eviction policy, `"lru"` (least recently used) or `"lfu"` (least frequently used).
+
+    Returns: BaseCache
+    """
+    caches = {'lru': LRUCache, 'lfu': LFUCache}
+    if policy not in caches:
+        raise ValueError(f"Cache policy {repr(policy)} is not available, it can only be \"lru\" or \"lfu\".")
+    return caches[policy](maxsize)
@@ -1,31 +1,83 @@
 """Compose Module."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from queue import (
+    Empty,
+    Queue
+)
 from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
     Optional,
-    List
+    List,
+    NamedTuple,
+    Sequence,
+    Tuple,
+    Union
 )
 
 from nlpiper.core import Document
-from nlpiper.transformers.base import BaseTransformer
+from nlpiper.core.autotune import BatchSizeTuner
+from nlpiper.core.cache import DocumentCache
+from nlpiper.core.executor import PipelinedExecutor, _Stopped, _put
+from nlpiper.core.fingerprint import fingerprint
+from nlpiper.core.segmentation import split_text, split_tokens
+from nlpiper.core.vocabulary import IdVocabulary, MappedVocabulary, Vocabulary  # noqa: F401 (flake8 ignore)
+from nlpiper.transformers.base import BaseTokenNormalizer, BaseTransformer, _tokens
 from nlpiper.logger import log
 
 # Needed for create_from_steps method (eval instruction)
 from nlpiper.transformers.cleaners import *  # noqa: F401, F403 (flake8 ignore)
 from nlpiper.transformers.normalizers import *  # noqa: F401, F403 (flake8 ignore)
+from nlpiper.transformers.normalizers import FusedNormalizer
 from nlpiper.transformers.tokenizers import *  # noqa: F401, F403 (flake8 ignore)
 from nlpiper.transformers.embeddings import *  # noqa: F401, F403 (flake8 ignore)
 
+_END = object()
+
 
 class Compose:
     """Pipeline for process document."""
 
-    def __init__(self, transformers: List[BaseTransformer]) -> None:
+    def __init__(self, transformers: List[BaseTransformer], fuse: bool = True, cache_size: int = 0,
+                 cache_policy: str = 'lru', cache_path: Optional[str] = None) -> None:
         """Pipeline for process text.
 
+        Documents processed by calling the pipeline can be cached, keyed by a hash of the pipeline fingerprint and
+        of their text, so the same texts are not processed again, e.g. reposts or texts ingested again after a
+        restart. The fingerprint hashes the options of the transformers and the contents of the models, vocabularies
+        and files they use, see `BaseTransformer.fingerprint`, so the documents processed by a different pipeline
+        are never returned. It is computed when the pipeline is created, and again if its transformers are
+        replaced, so create the pipeline again after changing the contents of a model or a file. Only documents
+        which have not been processed yet are cached, and pipelines with transformers which are not `cacheable`,
+        e.g. `CountTokens`, or which can not be fingerprinted, e.g. embeddings of an unknown model, are not cached.
+
         Args:
             transformers (List[BaseTransformer]): List of callable objects with implemented method ```__call__```.
+            fuse (bool): if True consecutive token normalizers are applied in a single pass over the tokens,
+                see `FusedNormalizer`.
+            cache_size (int): Maximum number of processed documents kept in memory, if `0` the documents are not
+                cached.
+            cache_policy (str): In-memory cache eviction policy, `"lru"` (least recently used) or `"lfu"` (least
+                frequently used).
+            cache_path (Optional[str]): SQLite file used as a second level cache, shared between runs, processes
+                and pipelines, each processed document is committed to it at once.
         """
         self.transformers = transformers
+        self.fuse = fuse
+        self.cache = DocumentCache(cache_size, cache_policy, cache_path) if cache_size else None
+        self._fused: Optional[Tuple[List[BaseTransformer], List[BaseTransformer]]] = None
+        self._fingerprint: Optional[Tuple[List[BaseTransformer], Optional[str]]] = None
+        self._reset_stats()
         log.info("[Created] %s", repr(self))
+        if self.cache is not None and self._pipeline_fingerprint() is None:
+            log.warning("Documents processed by %r are not cached, not all its transformers are cacheable and can "
+                        "be fingerprinted", self)
 
     @classmethod
     def create_from_steps(cls, steps: List[str]):
@@ -36,11 +88,17 @@ class Compose:
 
         Returns: Compose
         """
-        try:
-            transformers = [eval(step) for step in steps]
-        except NameError as e:
-            log.error("Unable to create Compose object from steps: %s", steps)
-            raise e
+        transformers = []
+        for step in steps:
+            try:
+                transformers.append(eval(step))
+            except NameError as e:
+                log.error("Unable to create Compose object from steps: %s", steps)
+                raise e
+            except SyntaxError:
+                # e.g. `EncodeTokens` with a vocabulary which was not stored
+                log.error("Unable to create Compose object from steps: %s", steps)
+                raise ValueError(f"Step {step} can not be created again, its representation is not complete.")
 
         return Compose(transformers)
 
@@ -72,19 +130,397 @@ class Compose:
         params = ', '.join([repr(t) for t in self.transformers])
         return "%s([%s])" % (self.__class__.__name__, params)
 
-    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
+    def __call__(self, doc: Document, inplace: bool = False, segment_size: Optional[int] = None,
+                 workers: int = 1) -> Optional[Document]:
         """Process document with transformers pipeline.
 
+        Long documents can be split in segments of `segment_size` at safe boundaries, paragraphs, lines, sentence
+        candidates or whitespace, see `split_text`, or in segments of `segment_size` tokens if the document is
+        already tokenized. The leading transformers which are `segmentable` are applied to the segments, by
+        `workers` threads, token normalizers are applied once to all the segments, and the segments are stitched
+        back into the document before applying the remaining transformers, e.g. the embeddings. The result is the
+        same as processing the whole document when the transformers, e.g. a tokenizer model, give the same result
+        for a text and for its segments.
+
         Args:
             doc (Document): Document object to be processed.
             inplace (bool): if False will return a new doc object,
                             otherwise will change the object passed as parameter.
+            segment_size (Optional[int]): Maximum number of characters, or tokens, of each segment, by default the
+                document is not split.
+            workers (int): Number of threads processing the segments, the transformers applied to the segments,
+                other than the token normalizers, must be `thread_safe` to use more than one.
 
         Returns: Document
         """
+        key = self._cache_key(doc)
+        if key is not None:
+            cached = self.cache.get(key)  # type: ignore
+            if cached is not None:
+                if not inplace:
+                    return cached
+                doc.__setstate__(cached.__getstate__())
+                return None
+
         d = doc if inplace else doc._deepcopy()
 
-        for t in self.transformers:
+        stages = self._stages()
+        if segment_size is not None:
+            segmentable = next((i for i, t in enumerate(stages) if not t.segmentable), len(stages))
+            _apply_segmented(d, stages[:segmentable], segment_size, workers)
+            stages = stages[segmentable:]
+
+        for t in stages:
             t(d, True)
 
+        if key is not None:
+            self.cache.put(key, d)  # type: ignore
+            # Committed at once, so other pipelines and processes sharing the file can use it
+            self.cache.flush()  # type: ignore
         return None if inplace else d
+
+    def _cache_key(self, doc: Document) -> Optional[str]:
+        """Cache key of a document, `None` if the pipeline has no cache or the document can not be cached."""
+        if self.cache is None:
+            return None
+        pipeline = self._pipeline_fingerprint()
+        if pipeline is None:
+            return None
+
+        # Only documents not processed yet are identified by their text
+        processed = doc.steps or doc.tokens is not None or doc.embedded is not None or doc.cleaned != doc.original
+        if processed or len(doc.__dict__) != len(doc.__fields__):
+            return None
+        return self.cache.key(pipeline, doc.original)
+
+    def _pipeline_fingerprint(self) -> Optional[str]:
+        """Fingerprint of the transformers, `None` if the documents they process can not be cached."""
+        # Computed once, and again only if the transformers are replaced
+        if self._fingerprint is None or self._fingerprint[0] != self.transformers:
+            cacheable = all(t.cacheable for t in self.transformers)
+            self._fingerprint = (list(self.transformers), fingerprint(self.transformers) if cacheable else None)
+        return self._fingerprint[1]
+
+    def _stages(self) -> List[BaseTransformer]:
+        """Transformers applied by the pipeline, with consecutive token normalizers fused if enabled."""
+        if not self.fuse:
+            return self.transformers
+
+        # Reuse the fused stages while the transformers are not changed
+        if self._fused is not None and self._fused[0] == self.transformers:
+            return self._fused[1]
+
+        stages: List[BaseTransformer] = []
+        normalizers: List[BaseTokenNormalizer] = []
+        for t in self.transformers + [None]:
+            if isinstance(t, BaseTokenNormalizer):
+                normalizers.append(t)
+                continue
+
+            if normalizers:
+                stages.append(normalizers[0] if len(normalizers) == 1 else FusedNormalizer(normalizers))
+                normalizers = []
+            if t is not None:
+                stages.append(t)
+
+        self._fused = (list(self.transformers), stages)
+        return stages
+
+    def pipe(self, docs: Iterable[Document], batch_size: int = 32, inplace: bool = False,
+             window: Optional[int] = None, max_latency: Optional[float] = None,
+             autotune: Optional[BatchSizeTuner] = None, workers: Optional[Union[int, Sequence[int]]] = None,
+             queue_size: int = 2) -> Iterator[Document]:
+        """Process a stream of documents in batches.
+
+        Each transformer is applied to a whole batch at once, which allows the transformers to process the batch
+        more efficiently, e.g. token normalizers are applied once per distinct token of the batch.
+
+        With a `window`, the documents are read in windows of `window` documents, sorted by length and split in
+        batches of documents with similar lengths, which reduces the padding and the work wasted by model based
+        transformers, e.g. `SpacyTokenizer` or the embeddings. The documents are yielded in the input order once
+        their whole window has been processed.
+
+        With `workers`, the transformers run concurrently, each in its own worker threads connected by queues of
+        at most `queue_size` batches, so e.g. a tokenizer processes a batch while the embeddings of the previous
+        batch are computed, see `PipelinedExecutor`. Slow transformers can be given several workers, provided
+        they are `thread_safe`, and the documents are still yielded in the input order.
+
+        The throughput and latency of the batches are available in `stats`.
+
+        Args:
+            docs (Iterable[Document]): Documents to be processed.
+            batch_size (int): Number of documents processed at once, the initial batch size when autotuning.
+            inplace (bool): if False will yield new doc objects,
+                            otherwise will change and yield the objects passed as parameter.
+            window (Optional[int]): Number of documents grouped by length, by default the documents are processed
+                in the input order.
+            max_latency (Optional[float]): Maximum time, in seconds, a document waits for its batch or window to be
+                filled, e.g. when the documents arrive slowly, after which the documents read so far are processed,
+                even if the stream is still waiting for its next document.
+            autotune (Optional[BatchSizeTuner]): Tuner which adjusts the batch size, within its limits, to the
+                highest throughput whose batches are processed within its latency ceiling.
+            workers (Optional[Union[int, Sequence[int]]]): Number of worker threads of each transformer, or of all
+                the transformers, fused normalizers run with the largest number of workers among them. By default
+                the transformers are applied one after the other in the calling thread.
+            queue_size (int): Maximum number of batches waiting for each transformer when using `workers`.
+
+        Returns: Iterator[Document]
+        """
+        if batch_size <= 0:
+            raise ValueError(f"Batch size must be a positive number, {batch_size} given.")
+        if window is not None and window < batch_size:
+            raise ValueError(f"Window must be at least the batch size, {window} given.")
+
+        if autotune is not None:
+            autotune.reset(batch_size)
+        self._reset_stats(autotune)
+
+        def size() -> int:
+            return batch_size if autotune is None else autotune.batch_size
+
+        stages: List[Callable[[List[Document]], Any]] = [partial(t.batch, inplace=True) for t in self._stages()]
+        batches = self._batches(docs, size, inplace, window, max_latency)
+
+        if workers is None:
+            for chunk, batch in batches:
+                self._record(batch, _apply(stages, batch), size())
+                yield from chunk
+        else:
+            executor = PipelinedExecutor(stages, self._stage_workers(workers), queue_size)
+            for chunk, batch, seconds in executor.run(batches):
+                self._record(batch, seconds, size())
+                yield from chunk
+
+    def _batches(self, docs: Iterable[Document], size: Callable[[], int], inplace: bool, window: Optional[int],
+                 max_latency: Optional[float]) -> Iterator[Tuple[List[Document], List[Document]]]:
+        """Split the documents in batches, each with the documents to be yielded once it has been processed.
+
+        With a window the documents of each window are yielded, in the input order, with its last batch.
+        """
+        for chunk in _chunks(docs, (lambda: window) if window else size, max_latency):
+            out = chunk if inplace else [doc._deepcopy() for doc in chunk]
+            if window is None:
+                yield out, out
+                continue
+
+            # The documents are changed inplace, so `out` keeps the input order whatever the order of the batches
+            buckets = _buckets(out, min(size(), window))
+            for bucket in buckets[:-1]:
+                yield [], bucket
+            yield out, buckets[-1]
+
+    def _stage_workers(self, workers: Union[int, Sequence[int]]) -> List[int]:
+        """Number of workers of each stage, the largest number of workers of the transformers fused in a stage.
+
+        Stages which are not `thread_safe`, e.g. `SpellCheck` or `EncodeTokens`, can only have one worker.
+        """
+        if isinstance(workers, int):
+            workers = [workers] * len(self.transformers)
+        if len(workers) != len(self.transformers):
+            raise ValueError(f"Number of workers must be given for each of the {len(self.transformers)} "
+                             f"transformers, {len(workers)} given.")
+
+        out: List[int] = []
+        if not self.fuse:
+            out = list(workers)
+        else:
+            fused: List[int] = []
+            for t, n in zip(self.transformers + [None], list(workers) + [0]):
+                if isinstance(t, BaseTokenNormalizer):
+                    fused.append(n)
+                    continue
+                if fused:
+                    out.append(max(fused))
+                    fused = []
+                if t is not None:
+                    out.append(n)
+
+        for stage, n in zip(self._stages(), out):
+            if n > 1 and not stage.thread_safe:
+                raise ValueError(f"{stage!r} is not thread safe, it can only have one worker, {n} given.")
+        return out
+
+    def _record(self, batch: List[Document], seconds: float, batch_size: int) -> None:
+        """Record the latency of a batch."""
+        stats = self._stats
+        stats['docs'] += len(batch)
+        stats['batches'] += 1
+        stats['seconds'] += seconds
+        stats['max_batch_seconds'] = max(stats['max_batch_seconds'], seconds)
+        stats['batch_size'] = batch_size
+        if self._tuner is not None:
+            self._tuner.record(len(batch), seconds)
+
+    def _reset_stats(self, tuner: Optional[BatchSizeTuner] = None) -> None:
+        self._tuner = tuner
+        self._stats: Dict[str, Any] = {'docs': 0, 'batches': 0, 'seconds': 0.0, 'max_batch_seconds': 0.0,
+                                       'batch_size': None}
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Statistics of the last call to `pipe`, including the autotuner statistics when autotuning."""
+        stats = dict(self._stats)
+        stats['docs_per_second'] = stats['docs'] / stats['seconds'] if stats['seconds'] else 0.0
+        stats['mean_batch_seconds'] = stats['seconds'] / stats['batches'] if stats['batches'] else 0.0
+        stats['autotune'] = self._tuner.stats if self._tuner is not None else None
+        return stats
+
+
+def _apply_segmented(doc: Document, stages: List[BaseTransformer], size: int, workers: int = 1) -> None:
+    """Apply stages to the segments of a document, in parallel, and stitch the segments back into the document."""
+    if workers <= 0:
+        raise ValueError(f"Number of workers must be a positive number, {workers} given.")
+    if not stages:
+        return
+    # Token normalizers are applied in the calling thread, the other transformers by the workers
+    for t in stages:
+        if workers > 1 and not isinstance(t, BaseTokenNormalizer) and not t.thread_safe:
+            raise ValueError(f"{t!r} is not thread safe, it can only have one worker, {workers} given.")
+
+    segments = _segments(doc, size)
+    with ThreadPoolExecutor(max_workers=min(workers, len(segments))) as executor:
+        start = 0
+        for end in range(len(stages) + 1):
+            if end < len(stages) and not isinstance(stages[end], BaseTokenNormalizer):
+                continue
+
+            # Consecutive transformers are applied to each segment by a worker, without waiting for the others
+            group = stages[start:end]
+            if group:
+                list(executor.map(lambda segment: [t(segment, True) for t in group], segments))
+            # Token normalizers are applied once per distinct token of all the segments
+            if end < len(stages):
+                stages[end].batch(segments, inplace=True)
+            start = end + 1
+
+    _stitch(doc, segments)
+
+
+def _segments(doc: Document, size: int) -> List[Document]:
+    """Split a document in segments of its text, or of its tokens if it is tokenized."""
+    if doc.tokens is None:
+        return [Document(text, steps=list(doc.steps)) for text in split_text(doc.cleaned, size)]
+    return [doc.copy(update={'tokens': tokens, 'steps': list(doc.steps)}) for tokens in split_tokens(doc.tokens, size)]
+
+
+def _stitch(doc: Document, segments: List[Document]) -> None:
+    """Join the text, or the tokens, of the processed segments of a document, and add the steps applied to them."""
+    if doc.tokens is None:
+        doc.cleaned = ''.join(segment.cleaned for segment in segments)
+        if segments[0].tokens is not None:
+            doc.tokens = []
+    if segments[0].tokens is not None:
+        # Tokens are replaced inplace to avoid validating them again
+        _tokens(doc)[:] = [token for segment in segments for token in _tokens(segment)]
+    doc.steps.extend(segments[0].steps[len(doc.steps):])
+
+
+def _apply(stages: List[Callable[[List[Document]], Any]], batch: List[Document]) -> float:
+    """Apply the stages to a batch, returns the time taken."""
+    start = time.perf_counter()
+    for stage in stages:
+        stage(batch)
+    return time.perf_counter() - start
+
+
+def _chunks(docs: Iterable[Document], size: Callable[[], int],
+            max_latency: Optional[float] = None) -> Iterator[List[Document]]:
+    """Split a stream of documents in chunks of `size()` documents, or of the documents read within `max_latency`.
+
+    The size is read when each chunk starts, so it can change between chunks, e.g. when autotuning.
+    """
+    if max_latency is not None:
+        yield from _timed_chunks(docs, size, max_latency)
+        return
+
+    chunk: List[Document] = []
+    limit = 0
+    for doc in docs:
+        if not chunk:
+            limit = size()
+        chunk.append(doc)
+
+        if len(chunk) >= limit:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def _timed_chunks(docs: Iterable[Document], size: Callable[[], int],
+                  max_latency: float) -> Iterator[List[Document]]:
+    """Split a stream of documents in chunks of `size()` documents, or of the documents read within `max_latency`.
+
+    The documents are read by another thread, so the chunk is yielded once `max_latency` has passed even if the
+    stream is waiting for its next document.
+    """
+    inbox: Queue = Queue(maxsize=max(size(), 1))
+    stop = threading.Event()
+    threading.Thread(target=_read, args=(docs, inbox, stop), daemon=True).start()
+
+    chunk: List[Document] = []
+    deadline = 0.0
+    limit = 0
+    try:
+        while True:
+            try:
+                item = inbox.get(timeout=max(deadline - time.monotonic(), 0) if chunk else None)
+            except Empty:
+                yield chunk
+                chunk = []
+                continue
+
+            if item is _END:
+                break
+            if isinstance(item, _Failed):
+                raise item.error
+
+            if not chunk:
+                deadline = time.monotonic() + max_latency
+                limit = size()
+            chunk.append(item)
+
+            if len(chunk) >= limit or time.monotonic() >= deadline:
+                yield chunk
+                chunk = []
+    finally:
+        # A reader waiting for the stream finishes when the stream gives its next document
+        stop.set()
+
+    if chunk:
+        yield chunk
+
+
+class _Failed(NamedTuple):
+    """Error raised by a stream of documents read by another thread."""
+
+    error: Exception
+
+
+def _read(docs: Iterable[Document], inbox: Queue, stop: threading.Event) -> None:
+    """Read a stream of documents into a queue, until the stream ends or the reading is stopped."""
+    last: Any = _END
+    try:
+        for doc in docs:
+            _put(inbox, doc, stop)
+    except _Stopped:
+        return
+    except Exception as e:
+        last = _Failed(e)
+
+    try:
+        _put(inbox, last, stop)
+    except _Stopped:
+        pass
+
+
+def _length(doc: Document) -> int:
+    """Length of a document, the number of tokens if already tokenized, else the number of characters."""
+    return len(doc.tokens) if doc.tokens is not None else len(doc.cleaned)
+
+
+def _buckets(docs: List[Document], batch_size: int) -> List[List[Document]]:
+    """Split documents in batches of `batch_size` documents with similar lengths."""
+    ordered = sorted(docs, key=_length)
+    return [ordered[start:start + batch_size] for start in range(0, len(ordered), batch_size)]
@@ -1,7 +1,7 @@
 """Document Module."""
 
 from copy import deepcopy
-from typing import Any, List, Optional
+from typing import Any, List, Optional, cast
 
 from pydantic import BaseModel, validator, Extra
 
@@ -46,15 +46,50 @@ class Document(BaseModel):
     cleaned: str
     tokens: Optional[List[Token]] = None
     embedded: Optional[Any] = None
+    tokens_embedded: Optional[Any] = None
+    embedded_scale: Optional[Any] = None
+    tokens_embedded_scale: Optional[Any] = None
+    token_ids: Optional[Any] = None
+    token_positions: Optional[Any] = None
     steps: List[str] = []
 
     def __init__(self, original: str, **data) -> None:
         super().__init__(original=original, cleaned=original, **data)
 
-    def _deepcopy(self):
+    def _token_rows(self) -> Optional[List[bool]]:
+        """Which tokens embeddings are rows of the tokens embeddings matrix, if there is a matrix."""
+        matrix = self.tokens_embedded
+        if matrix is None or self.tokens is None or len(self.tokens) != len(matrix):
+            return None
+
+        import numpy as np
+        return [token.embedded is not None and np.may_share_memory(token.embedded, matrix) for token in self.tokens]
+
+    def _deepcopy(self) -> 'Document':
         return deepcopy(self)
 
-    @validator('embedded', pre=True)
+    def __getstate__(self):
+        state = super().__getstate__()
+        rows = self._token_rows()
+        if rows is not None and any(rows):
+            # The tokens embeddings which are rows of the matrix are not copied or pickled, they are restored as
+            # rows of the matrix copy
+            tokens = [token.copy(update={'embedded': None}) if row else token
+                      for token, row in zip(cast(List[Token], self.tokens), rows)]
+            state['__dict__'] = {**state['__dict__'], 'tokens': tokens}
+            state['__token_rows__'] = rows
+        return state
+
+    def __setstate__(self, state):
+        rows = state.pop('__token_rows__', None)
+        super().__setstate__(state)
+        if rows is not None:
+            # Token rows are only kept for documents with tokens and a tokens embeddings matrix
+            for token, row, vector in zip(cast(List[Token], self.tokens), rows, cast(Any, self.tokens_embedded)):
+                if row:
+                    token.embedded = vector
+
+    @validator('embedded', 'tokens_embedded', pre=True)
     def check_if_embedded_in_numpy_array(cls, v):
         return _check_if_embedded_in_numpy_array(v)
 
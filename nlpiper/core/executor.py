@@ -0,0 +1,185 @@
+"""Pipelined Executor Module.
+
+Runs the stages of a pipeline concurrently, each stage in its own worker threads, connected by bounded queues, so
+e.g. a tokenizer can process a batch while the embeddings of the previous batch are computed. A stage whose queue is
+full blocks the stages before it, so the memory used is bounded by the size of the queues (backpressure).
+
+The work is split in threads, so stages run in parallel when their transformers release the GIL, e.g. spaCy, numpy
+or the Hunspell bindings, and while the input is being read.
+"""
+
+import threading
+import time
+from queue import (
+    Empty,
+    Full,
+    Queue
+)
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple
+)
+
+from nlpiper.core.document import Document
+
+_DONE = object()
+_POLL = 0.05
+
+
+class _Stopped(Exception):
+    """Raised in the workers when the execution is stopped."""
+
+
+class PipelinedExecutor:
+    """Run batches through a sequence of stages, each stage in its own worker threads."""
+
+    def __init__(self, stages: List[Callable[[List[Document]], Any]], workers: Sequence[int], queue_size: int = 2):
+        """Run batches through a sequence of stages, each stage in its own worker threads.
+
+        Args:
+            stages (List[Callable[[List[Document]], Any]]): Functions which change a batch of documents inplace,
+                their return value is ignored.
+            workers (Sequence[int]): Number of worker threads of each stage, stages with more than one worker
+                process several batches at once, so their transformers must be thread safe.
+            queue_size (int): Maximum number of batches waiting for each stage.
+        """
+        if len(workers) != len(stages):
+            raise ValueError(f"Number of workers must be given for each of the {len(stages)} stages, "
+                             f"{len(workers)} given.")
+        if any(n <= 0 for n in workers):
+            raise ValueError(f"Number of workers must be positive numbers, {list(workers)} given.")
+        if queue_size <= 0:
+            raise ValueError(f"Queue size must be a positive number, {queue_size} given.")
+
+        self.stages = stages
+        self.workers = list(workers)
+        self.queue_size = queue_size
+
+    def run(self, items: Iterable[Tuple[Any, List[Document]]]) -> Iterator[Tuple[Any, List[Document], float]]:
+        """Process batches through all the stages.
+
+        Args:
+            items (Iterable[Tuple[Any, List[Document]]]): Batches to be processed, each with a payload which is
+                returned with it.
+
+        Returns: Iterator[Tuple[Any, List[Document], float]], the payload, the processed batch and the time spent
+            by the stages processing it, in the input order.
+        """
+        execution = _Execution(self)
+        threads = [threading.Thread(target=execution.source, args=(items,), daemon=True)]
+        threads += [threading.Thread(target=execution.worker, args=(i,), daemon=True)
+                    for i, n in enumerate(self.workers) for _ in range(n)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            yield from _in_order(execution.queues[-1], execution.stop, execution.errors)
+        finally:
+            execution.stop.set()
+            for thread in threads:
+                thread.join()
+
+
+class _Execution:
+    """State shared by the threads of a run of a `PipelinedExecutor`.
+
+    The queue `i` holds the batches waiting for the stage `i` and the last queue the processed batches. Each batch
+    is a list with its position in the input, its payload, its documents and the time spent processing it.
+    """
+
+    def __init__(self, executor: PipelinedExecutor):
+        self.stages = executor.stages
+        self.workers = executor.workers
+        self.queues: List[Queue] = [Queue(maxsize=executor.queue_size) for _ in range(len(self.stages) + 1)]
+        self.stop = threading.Event()
+        self.errors: List[BaseException] = []
+        self._remaining = list(self.workers)
+        self._lock = threading.Lock()
+
+    def source(self, items: Iterable[Tuple[Any, List[Document]]]) -> None:
+        try:
+            for seq, (payload, batch) in enumerate(items):
+                _put(self.queues[0], [seq, payload, batch, 0.0], self.stop)
+            for _ in range(self.workers[0]):
+                _put(self.queues[0], _DONE, self.stop)
+        except _Stopped:
+            pass
+        except Exception as e:
+            self._fail(e)
+
+    def worker(self, i: int) -> None:
+        stage, inbox, outbox = self.stages[i], self.queues[i], self.queues[i + 1]
+        try:
+            while True:
+                item = _get(inbox, self.stop)
+                if item is _DONE:
+                    self._finish(i)
+                    return
+
+                start = time.perf_counter()
+                stage(item[2])
+                item[3] += time.perf_counter() - start
+                _put(outbox, item, self.stop)
+        except _Stopped:
+            pass
+        except Exception as e:
+            self._fail(e)
+
+    def _finish(self, i: int) -> None:
+        """Finish a worker of the stage `i`, the last one tells the workers of the following stage to finish."""
+        with self._lock:
+            self._remaining[i] -= 1
+            last = self._remaining[i] == 0
+
+        if last:
+            following = self.workers[i + 1] if i + 1 < len(self.stages) else 1
+            for _ in range(following):
+                _put(self.queues[i + 1], _DONE, self.stop)
+
+    def _fail(self, error: BaseException) -> None:
+        self.errors.append(error)
+        self.stop.set()
+
+
+def _in_order(queue: Queue, stop: threading.Event,
+              errors: List[BaseException]) -> Iterator[Tuple[Any, List[Document], float]]:
+    """Get the processed batches, which may be finished out of order by stages with several workers, in order."""
+    pending: Dict[int, List[Any]] = {}
+    following = 0
+    while True:
+        try:
+            item = _get(queue, stop)
+        except _Stopped:
+            raise errors[0]
+        if item is _DONE:
+            return
+
+        pending[item[0]] = item
+        while following in pending:
+            _, payload, batch, seconds = pending.pop(following)
+            following += 1
+            yield payload, batch, seconds
+
+
+def _get(queue: Queue, stop: threading.Event) -> Any:
+    while True:
+        try:
+            return queue.get(timeout=_POLL)
+        except Empty:
+            if stop.is_set():
+                raise _Stopped()
+
+
+def _put(queue: Queue, item: Any, stop: threading.Event) -> None:
+    while True:
+        try:
+            return queue.put(item, timeout=_POLL)
+        except Full:
+            if stop.is_set():
+                raise _Stopped()
@@ -0,0 +1,74 @@
+"""Fingerprint Module.
+
+Stable hashes of the contents used by the transformers of a pipeline, i.e. their options and the models,
+vocabularies and files they use, so `Compose` can key the documents it caches by what produced them. Unlike a
+`repr`, a fingerprint does not depend on object addresses and changes when the contents of a file change.
+
+Values are fingerprinted recursively: strings, numbers, `None`, lists, tuples, dictionaries, numpy arrays and
+objects with a `fingerprint()` method, e.g. the transformers and the vocabularies. Any other object, whose contents
+are unknown, has no fingerprint.
+"""
+
+import hashlib
+from typing import (
+    Any,
+    Optional
+)
+
+_BLOCK_SIZE = 1 << 20
+
+
+def fingerprint(*values: Any) -> Optional[str]:
+    """Fingerprint of a sequence of values.
+
+    Args:
+        *values: Values to be fingerprinted.
+
+    Returns: Optional[str], SHA-256 hex digest, `None` if any of the values can not be fingerprinted.
+    """
+    h = hashlib.sha256()
+    return h.hexdigest() if _update(h, values) else None
+
+
+def file_fingerprint(path: str) -> str:
+    """Fingerprint of the contents of a file.
+
+    Args:
+        path (str): File path.
+
+    Returns: str, SHA-256 hex digest.
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_BLOCK_SIZE), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _update(h: Any, value: Any) -> bool:
+    """Add a value to a hash, returns False if the value can not be fingerprinted."""
+    if value is None or isinstance(value, (str, bytes, bool, int, float)):
+        h.update(repr(value).encode('utf-8', 'surrogatepass'))
+        h.update(b'\0')
+        return True
+
+    if isinstance(value, (list, tuple, dict)):
+        items = list(value.items()) if isinstance(value, dict) else value
+        h.update(f'{type(value).__name__}[{len(items)}]'.encode())
+        return all(_update(h, item) for item in items)
+
+    if hasattr(value, 'dtype') and hasattr(value, 'tobytes'):
+        # numpy arrays, hashed without copying them when they are contiguous
+        h.update(f'array[{value.dtype.str}, {value.shape}]'.encode())
+        h.update(value.data if value.flags.c_contiguous else value.tobytes())
+        return True
+
+    method = getattr(value, 'fingerprint', None)
+    if callable(method):
+        digest = method()
+        if digest is None:
+            return False
+        h.update(f'{type(value).__name__}({digest})'.encode())
+        return True
+
+    return False
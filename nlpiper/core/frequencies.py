@@ -0,0 +1,238 @@
+"""Token Frequencies Module.
+
+Counters of the frequencies of the tokens of a corpus, updated as the documents are processed, e.g. by the
+`CountTokens` transformer of a pipeline. Both implementations can be merged, e.g. the counters of several worker
+processes, and converted into a `Vocabulary` with the most common tokens for `VocabularyFilter`:
+
+- `TokenFrequencies`: exact count of every token.
+- `SketchFrequencies`: bounded memory count-min sketch, which overestimates the counts by a small error, and keeps
+  the `top_k` most common tokens, suited for corpora whose vocabulary does not fit in memory.
+
+Empty tokens, e.g. replaced by an empty string by a normalizer, are not counted.
+"""
+
+import heapq
+import zlib
+from collections import Counter
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple
+)
+
+from nlpiper.core.vocabulary import Vocabulary
+from nlpiper.logger import log
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy as np
+        return np
+
+    except ImportError:
+        log.error("To use the sketch frequencies please install numpy. "
+                  "See the docs at https://numpy.org/ for more information.")
+        raise
+
+
+class _Frequencies:
+    """Common methods of the token frequencies counters."""
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Most common tokens and their counts, from the most common to the least common.
+
+        Args:
+            n (Optional[int]): Number of tokens, by default all the counted tokens.
+
+        Returns: List[Tuple[str, int]]
+        """
+        raise NotImplementedError
+
+    def vocabulary(self, top_n: Optional[int] = None, min_count: int = 1, case_sensitive: bool = True) -> Vocabulary:
+        """Vocabulary with the most common tokens, e.g. to be used by `VocabularyFilter`.
+
+        Args:
+            top_n (Optional[int]): Maximum number of tokens, by default all the tokens with at least `min_count`.
+            min_count (int): Minimum count of the tokens.
+            case_sensitive (bool): Case sensitivity of the vocabulary, see `Vocabulary`.
+
+        Returns: Vocabulary
+        """
+        return Vocabulary((token for token, count in self.most_common(top_n) if count >= min_count),
+                          case_sensitive=case_sensitive)
+
+
+class TokenFrequencies(_Frequencies):
+    """Exact frequencies of tokens."""
+
+    def __init__(self, counts: Optional[Mapping[str, int]] = None):
+        """Exact frequencies of tokens.
+
+        Args:
+            counts (Optional[Mapping[str, int]]): Initial counts of the tokens.
+        """
+        self._counts: Counter = Counter(counts or {})
+
+    def update(self, tokens: Iterable[str]) -> None:
+        """Count tokens.
+
+        Args:
+            tokens (Iterable[str]): Tokens to be counted.
+        """
+        self._counts.update(token for token in tokens if token)
+
+    def merge(self, other: 'TokenFrequencies') -> 'TokenFrequencies':
+        """Add the counts of another counter, e.g. of a worker process.
+
+        Args:
+            other (TokenFrequencies): Counter to be merged.
+
+        Returns: TokenFrequencies, the counter itself.
+        """
+        self._counts.update(other._counts)
+        return self
+
+    @property
+    def total(self) -> int:
+        """Number of tokens counted."""
+        return sum(self._counts.values())
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        return self._counts.most_common(n)
+
+    def __getitem__(self, token: str) -> int:
+        return self._counts[token]
+
+    def __contains__(self, token: object) -> bool:
+        return token in self._counts
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __repr__(self) -> str:
+        return "%s(<%d tokens>)" % (self.__class__.__name__, len(self._counts))
+
+
+class SketchFrequencies(_Frequencies):
+    """Approximate frequencies of tokens with bounded memory."""
+
+    def __init__(self, width: int = 2 ** 20, depth: int = 4, top_k: int = 10_000, seed: int = 0):
+        """Approximate frequencies of tokens with bounded memory.
+
+        The counts are kept in a count-min sketch, `depth` rows of `width` counters, each token adds its count to
+        a counter of each row, chosen by a CRC32 hash, and its estimated count is the minimum of its counters. The
+        estimate is never lower than the real count, and with probability `1 - exp(-depth)` it is higher by at
+        most `e / width` times the total number of tokens counted.
+
+        Only the `top_k` tokens with the highest estimates are kept, so the memory used does not depend on the
+        size of the vocabulary.
+
+        Args:
+            width (int): Number of counters of each row.
+            depth (int): Number of rows.
+            top_k (int): Number of most common tokens kept.
+            seed (int): Seed of the hashes, only counters with the same seed can be merged.
+        """
+        if width <= 0 or depth <= 0 or top_k <= 0:
+            raise ValueError("Width, depth and top_k must be positive numbers.")
+
+        self.np = _import_numpy()
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.seed = seed
+        self.table = self.np.zeros((depth, width), dtype=self.np.int64)
+        self._top: Dict[str, int] = {}
+        self._threshold = 0
+
+    def _columns(self, tokens: List[str]) -> Any:
+        """Counter of each token in each row, with shape `(depth, len(tokens))`."""
+        encoded = [token.encode('utf-8') for token in tokens]
+        hashes = self.np.array([[zlib.crc32(token, self.seed + row) for token in encoded]
+                                for row in range(self.depth)], dtype=self.np.int64).reshape(self.depth, -1)
+        return hashes % self.width
+
+    def _estimates(self, columns: Any) -> Any:
+        return self.table[self.np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def _track(self, tokens: List[str], estimates: List[int]) -> None:
+        """Keep the tokens whose estimates may be among the `top_k` highest."""
+        top = self._top
+        for token, estimate in zip(tokens, estimates):
+            if estimate >= self._threshold or token in top:
+                top[token] = estimate
+
+        # Pruned only when twice as large, so the cost of pruning is amortised over many updates
+        if len(top) > 2 * self.top_k:
+            self._top = dict(heapq.nlargest(self.top_k, top.items(), key=lambda item: item[1]))
+            self._threshold = min(self._top.values())
+
+    def update(self, tokens: Iterable[str]) -> None:
+        """Count tokens, each distinct token is hashed once per call.
+
+        Args:
+            tokens (Iterable[str]): Tokens to be counted.
+        """
+        counts = Counter(token for token in tokens if token)
+        if not counts:
+            return
+
+        np = self.np
+        distinct = list(counts)
+        columns = self._columns(distinct)
+        values = np.fromiter(counts.values(), dtype=np.int64, count=len(distinct))
+        for row in range(self.depth):
+            # Distinct tokens may share a counter, so the counts are accumulated unbuffered
+            np.add.at(self.table[row], columns[row], values)
+
+        self._track(distinct, self._estimates(columns).tolist())
+
+    def merge(self, other: 'SketchFrequencies') -> 'SketchFrequencies':
+        """Add the counts of another counter, e.g. of a worker process.
+
+        Args:
+            other (SketchFrequencies): Counter with the same width, depth and seed.
+
+        Returns: SketchFrequencies, the counter itself.
+        """
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Only sketches with the same width, depth and seed can be merged.")
+
+        self.table += other.table
+        tokens = list(self._top.keys() | other._top.keys())
+        self._top = {}
+        self._threshold = 0
+        if tokens:
+            self._track(tokens, self._estimates(self._columns(tokens)).tolist())
+        return self
+
+    @property
+    def total(self) -> int:
+        """Number of tokens counted."""
+        return int(self.table[0].sum())
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        n = self.top_k if n is None else min(n, self.top_k)
+        return heapq.nlargest(n, self._top.items(), key=lambda item: item[1])
+
+    def __getitem__(self, token: str) -> int:
+        """Estimated count of a token, never lower than its real count."""
+        return int(self._estimates(self._columns([token]))[0])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        # Modules can not be pickled, numpy is imported again when unpickled
+        state.pop('np', None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.np = _import_numpy()
+
+    def __repr__(self) -> str:
+        return "%s(width=%r, depth=%r, top_k=%r, seed=%r)" % (
+            self.__class__.__name__, self.width, self.depth, self.top_k, self.seed)
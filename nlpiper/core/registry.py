@@ -0,0 +1,251 @@
+"""Resource Registry Module.
+
+Heavy backend objects, e.g. Hunspell dictionaries, NLTK stemmers or stop word lists, are expensive to build and
+are frequently requested with the same parameters by several transformers of the same pipeline. The registry
+keeps one instance per backend, language and options for the whole process and hands it out to every transformer
+that asks for it, counting how many transformers are currently holding each resource.
+
+Resources may not be thread safe, e.g. Hunspell objects, and be shared by transformers applied by different threads,
+e.g. the `Stemmer` and `SpellCheck` stages of a pipeline, so each resource has a lock, see
+:meth:`ResourceRegistry.lock`, which the transformers hold while using it.
+
+Resources loaded with :meth:`ResourceRegistry.preload` are pinned in memory, so when the registry is populated
+before forking worker processes, the workers inherit the already loaded objects copy-on-write instead of loading
+their own copies.
+
+Example:
+    >>> from nlpiper.core.registry import registry
+    >>> registry.preload('snowball', 'english')  # doctest: +SKIP
+    >>> from nlpiper.transformers.normalizers import Stemmer
+    >>> Stemmer(version='nltk').stemmer is Stemmer(version='nltk').stemmer  # doctest: +SKIP
+    True
+"""
+
+import os
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+    Set,
+    Tuple
+)
+
+from nlpiper.logger import log
+
+
+def _load_hunspell(language: str, *args, **kwargs) -> Any:
+    from hunspell import Hunspell
+    return Hunspell(lang=language, *args, **kwargs)
+
+
+def _load_snowball(language: str, *args, **kwargs) -> Any:
+    import nltk  # noqa: F401
+    from nltk.stem.snowball import SnowballStemmer
+    return SnowballStemmer(language=language, *args, **kwargs)
+
+
+def _load_stopwords(language: str) -> Any:
+    import nltk
+    from nlpiper.core.vocabulary import Vocabulary
+    nltk.download("stopwords")
+    return Vocabulary(nltk.corpus.stopwords.words(language))
+
+
+def _load_symspell(language: str, max_distance: int = 2, index_path: Optional[str] = None,
+                   hunspell_data_dir: Optional[str] = None) -> Any:
+    from nlpiper.core.symspell import SymSpellIndex
+    if index_path is not None:
+        return SymSpellIndex.load(index_path)
+
+    return SymSpellIndex.from_hunspell(_hunspell_dictionary(language, hunspell_data_dir) + '.dic',
+                                       max_distance=max_distance)
+
+
+def _hunspell_dictionary(language: str, hunspell_data_dir: Optional[str] = None) -> str:
+    """Path, without extension, of the Hunspell dictionary files of a language, by default those of cyhunspell."""
+    if hunspell_data_dir is None:
+        import hunspell
+        hunspell_data_dir = os.path.join(os.path.dirname(hunspell.__file__), 'dictionaries')
+    return os.path.join(hunspell_data_dir, language)
+
+
+def _freeze(value: Any) -> Hashable:
+    """Convert a value into a hashable representation to be used as part of a registry key."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class ResourceRegistry:
+    """Process level registry of shared and reference-counted backend resources."""
+
+    def __init__(self) -> None:
+        """Process level registry of shared and reference-counted backend resources.
+
+        By default the following backends are available:
+
+        - ``'hunspell'``: ``hunspell.Hunspell`` spellchecker and stemmer.
+        - ``'snowball'``: ``nltk.stem.snowball.SnowballStemmer`` stemmer.
+        - ``'stopwords'``: NLTK stop words vocabulary.
+        - ``'symspell'``: ``nlpiper.core.symspell.SymSpellIndex`` built from a Hunspell dictionary or loaded from
+          a saved index.
+        """
+        self._loaders: Dict[str, Callable[..., Any]] = {}
+        self._resources: Dict[Tuple, Any] = {}
+        self._references: Dict[Tuple, int] = {}
+        self._pinned: Set[Tuple] = set()
+        self._locks: Dict[int, Any] = {}
+        self._lock = threading.RLock()
+
+        self.register('hunspell', _load_hunspell)
+        self.register('snowball', _load_snowball)
+        self.register('stopwords', _load_stopwords)
+        self.register('symspell', _load_symspell)
+
+    def register(self, backend: str, loader: Callable[..., Any]) -> None:
+        """Register a loader for a backend.
+
+        Args:
+            backend (str): Backend name.
+            loader (Callable[..., Any]): Callable receiving the language and options and returning the resource.
+        """
+        self._loaders[backend] = loader
+
+    @staticmethod
+    def key(backend: str, language: str, *args, **kwargs) -> Tuple:
+        """Build the key which identifies a resource.
+
+        Args:
+            backend (str): Backend name.
+            language (str): Resource language.
+            *args: Options used to load the resource.
+            **kwargs: Options used to load the resource.
+
+        Returns: Tuple
+        """
+        return backend, language, _freeze(args), _freeze(kwargs)
+
+    def acquire(self, backend: str, language: str, *args, **kwargs) -> Any:
+        """Get a shared resource, loading it if it is not available yet.
+
+        Each call increments the number of references of the resource, which must be released with
+        :meth:`release` when the resource is no longer needed.
+
+        Args:
+            backend (str): Backend name.
+            language (str): Resource language.
+            *args: Options used to load the resource.
+            **kwargs: Options used to load the resource.
+
+        Returns: Any
+        """
+        if backend not in self._loaders:
+            raise ValueError(f"Backend {repr(backend)} is not registered, "
+                             f"available backends: {', '.join(map(repr, self._loaders))}.")
+
+        key = self.key(backend, language, *args, **kwargs)
+        with self._lock:
+            if key not in self._resources:
+                log.info("[Loading] %s resource for %r", backend, language)
+                self._resources[key] = self._loaders[backend](language, *args, **kwargs)
+                self._references[key] = 0
+            self._references[key] += 1
+            return self._resources[key]
+
+    def release(self, backend: str, language: str, *args, **kwargs) -> None:
+        """Release a reference to a shared resource.
+
+        When the resource has no references left and was not preloaded it is removed from the registry.
+
+        Args:
+            backend (str): Backend name.
+            language (str): Resource language.
+            *args: Options used to load the resource.
+            **kwargs: Options used to load the resource.
+        """
+        key = self.key(backend, language, *args, **kwargs)
+        with self._lock:
+            if self._references.get(key, 0) == 0:
+                return
+
+            self._references[key] -= 1
+            if self._references[key] == 0 and key not in self._pinned:
+                log.info("[Releasing] %s resource for %r", backend, language)
+                self._locks.pop(id(self._resources[key]), None)
+                del self._resources[key]
+                del self._references[key]
+
+    def preload(self, backend: str, language: str, *args, **kwargs) -> Any:
+        """Load a resource and keep it in the registry even without references.
+
+        Preloading resources before forking worker processes allows the workers to share them copy-on-write.
+
+        Args:
+            backend (str): Backend name.
+            language (str): Resource language.
+            *args: Options used to load the resource.
+            **kwargs: Options used to load the resource.
+
+        Returns: Any
+        """
+        key = self.key(backend, language, *args, **kwargs)
+        with self._lock:
+            resource = self.acquire(backend, language, *args, **kwargs)
+            self._references[key] -= 1
+            self._pinned.add(key)
+            return resource
+
+    def lock(self, resource: Any) -> Any:
+        """Get the lock which guards a shared resource.
+
+        Transformers which use resources that are not thread safe hold their lock while using them, since the
+        same resource may be used by other transformers at the same time.
+
+        Args:
+            resource (Any): Resource acquired from the registry.
+
+        Returns: Any, a `threading.Lock`
+        """
+        with self._lock:
+            return self._locks.setdefault(id(resource), threading.Lock())
+
+    def references(self, backend: str, language: str, *args, **kwargs) -> int:
+        """Get the number of references of a resource.
+
+        Args:
+            backend (str): Backend name.
+            language (str): Resource language.
+            *args: Options used to load the resource.
+            **kwargs: Options used to load the resource.
+
+        Returns: int
+        """
+        return self._references.get(self.key(backend, language, *args, **kwargs), 0)
+
+    def clear(self) -> None:
+        """Remove all resources from the registry, including the preloaded ones."""
+        with self._lock:
+            self._resources.clear()
+            self._references.clear()
+            self._pinned.clear()
+            self._locks.clear()
+
+    def __contains__(self, key: Tuple) -> bool:
+        return key in self._resources
+
+    def __len__(self) -> int:
+        return len(self._resources)
+
+
+registry = ResourceRegistry()
@@ -0,0 +1,80 @@
+"""Segmentation Module.
+
+Splits long documents in segments at safe boundaries, so the segments can be processed in parallel and stitched
+back together. Texts are cut, in order of preference, after paragraph breaks, line breaks, sentence candidates
+(`.`, `!` or `?` followed by whitespace) or any whitespace, so a token is never split between two segments, and
+the whitespace of a boundary is always kept whole at the end of a segment.
+"""
+
+import re
+from typing import (
+    List,
+    Sequence,
+    TypeVar
+)
+
+T = TypeVar('T')
+
+_BOUNDARIES = [
+    re.compile(r'\n[^\S\n]*\n\s*'),
+    re.compile(r'\n\s*'),
+    re.compile(r'[.!?]["\')\]]*\s+'),
+    re.compile(r'\s+'),
+]
+_WHITESPACE = _BOUNDARIES[-1]
+
+
+def _cut(text: str, start: int, end: int) -> int:
+    """Position after the preferred boundary ending before `end`, or after the first whitespace from `end`."""
+    for pattern in _BOUNDARIES:
+        last = None
+        for last in pattern.finditer(text, start, end):
+            pass
+        if last is not None:
+            # The boundary may continue after the end of the window
+            return pattern.match(text, last.start()).end()  # type: ignore
+
+    match = _WHITESPACE.search(text, end)
+    return match.end() if match is not None else len(text)
+
+
+def split_text(text: str, size: int) -> List[str]:
+    """Split a text in segments of about `size` characters at safe boundaries.
+
+    Segments are at most `size` characters long, except when there is no whitespace in a segment, which is
+    then extended until the next whitespace. Joining the segments gives back the text.
+
+    Args:
+        text (str): Text to be split.
+        size (int): Maximum number of characters of each segment.
+
+    Returns: List[str]
+    """
+    if size <= 0:
+        raise ValueError(f"Segment size must be a positive number, {size} given.")
+
+    segments = []
+    start = 0
+    while len(text) - start > size:
+        end = _cut(text, start, start + size)
+        segments.append(text[start:end])
+        start = end
+
+    if start < len(text) or not segments:
+        segments.append(text[start:])
+    return segments
+
+
+def split_tokens(tokens: Sequence[T], size: int) -> List[Sequence[T]]:
+    """Split a list of tokens in segments of `size` tokens.
+
+    Args:
+        tokens (Sequence[T]): Tokens to be split.
+        size (int): Number of tokens of each segment.
+
+    Returns: List[Sequence[T]]
+    """
+    if size <= 0:
+        raise ValueError(f"Segment size must be a positive number, {size} given.")
+
+    return [tokens[start:start + size] for start in range(0, len(tokens), size)] or [tokens[:0]]
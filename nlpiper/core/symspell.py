@@ -0,0 +1,338 @@
+"""Symmetric Delete Spelling Module.
+
+Implementation of the symmetric delete spelling correction algorithm (SymSpell). All the strings obtained by
+deleting up to `max_distance` characters from each word of a dictionary are precomputed, so the candidates
+for a misspelt token are found by generating the deletes of the token and looking them up in the index,
+instead of comparing the token with every word of the dictionary.
+
+Candidates are verified with a Levenshtein distance bounded by the maximum distance allowed, which stops
+as soon as the distance is known to be larger than the bound.
+
+Indexes built from Hunspell dictionaries include the words derived from each stem by the prefixes and suffixes of
+the affix file, e.g. plurals or verb forms, so the inflected words are also candidates for the corrections.
+"""
+
+import os
+import pickle
+import re
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Set,
+    Tuple
+)
+
+
+def bounded_edit_distance(source: str, target: str, max_distance: int) -> int:
+    """Levenshtein distance between two strings, bounded by a maximum distance.
+
+    Computes the same distance as `nltk.metrics.distance.edit_distance` with its default arguments, however it
+    stops as soon as the distance is known to exceed `max_distance`.
+
+    Args:
+        source (str): First string.
+        target (str): Second string.
+        max_distance (int): Maximum distance of interest.
+
+    Returns: int, the distance between the strings or `max_distance + 1` if it exceeds the maximum distance.
+    """
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+    if source == target:
+        return 0
+
+    previous = list(range(len(target) + 1))
+    for i, s in enumerate(source, 1):
+        current = [i] + [0] * len(target)
+        for j, t in enumerate(target, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (s != t))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+
+    return min(previous[-1], max_distance + 1)
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """All the strings obtained by deleting up to `max_distance` characters from a word, including the word."""
+    out = {word}
+    edits = {word}
+    for _ in range(max_distance):
+        edits = {edit[:i] + edit[i + 1:] for edit in edits for i in range(len(edit))}
+        out |= edits
+    return out
+
+
+def _common_prefix(source: str, target: str) -> int:
+    """Number of leading characters shared by two strings."""
+    n = 0
+    for s, t in zip(source, target):
+        if s != t:
+            break
+        n += 1
+    return n
+
+
+class _Affix(NamedTuple):
+    """Prefix or suffix rule of a Hunspell affix file."""
+
+    strip: str
+    add: str
+    condition: Pattern
+    cross_product: bool
+
+
+class _Affixes(NamedTuple):
+    """Rules of a Hunspell affix file needed to expand the stems of its dictionary."""
+
+    flag_type: str
+    aliases: List[str]
+    prefixes: Dict[str, List[_Affix]]
+    suffixes: Dict[str, List[_Affix]]
+    # Flags of the stems which are not words by themselves, e.g. `NEEDAFFIX` or `FORBIDDENWORD`
+    not_words: Set[str]
+
+
+def _condition(condition: str, suffix: bool) -> Pattern:
+    """Regular expression of the condition of a Hunspell affix rule, e.g. `[^aeiou]y`."""
+    # Character classes and `.` have the same meaning in regular expressions, other characters are literals
+    pattern = ''.join(part if part == '.' or part.startswith('[') else re.escape(part)
+                      for part in re.findall(r'\[[^\]]*\]|.', condition))
+    return re.compile(f'(?:{pattern})$' if suffix else pattern)
+
+
+def _read_affixes(path: str, encoding: str) -> _Affixes:
+    """Read the prefix and suffix rules of a Hunspell affix file."""
+    affixes = _Affixes('char', [], {}, {}, set())
+    aliases = False
+    cross_products: Dict[Tuple[str, str], bool] = {}
+    with open(path, encoding=encoding, errors='ignore') as f:
+        for line in f:
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+
+            if fields[0] == 'FLAG' and len(fields) > 1:
+                affixes = affixes._replace(flag_type=fields[1])
+            elif fields[0] in ('NEEDAFFIX', 'FORBIDDENWORD', 'ONLYINCOMPOUND') and len(fields) > 1:
+                affixes.not_words.add(fields[1])
+            elif fields[0] == 'AF' and len(fields) > 1:
+                # The first line gives the number of aliases
+                if aliases:
+                    affixes.aliases.append(fields[1])
+                aliases = True
+            elif fields[0] in ('PFX', 'SFX') and len(fields) > 3:
+                # The first line of each affix is its header, with the cross product option
+                key = (fields[0], fields[1])
+                if key not in cross_products:
+                    cross_products[key] = fields[2] == 'Y'
+                    continue
+
+                rule = _affix(fields, cross_products[key])
+                if rule is not None:
+                    rules = affixes.suffixes if fields[0] == 'SFX' else affixes.prefixes
+                    rules.setdefault(fields[1], []).append(rule)
+
+    return affixes
+
+
+def _affix(fields: List[str], cross_product: bool) -> Optional[_Affix]:
+    """Affix rule of a line of a Hunspell affix file, e.g. `SFX S y ies [^aeiou]y`, `None` if it is not valid."""
+    strip = '' if fields[2] == '0' else fields[2]
+    # Continuation flags of the affix, e.g. `add/flags`, are not expanded
+    add = fields[3].split('/')[0]
+    add = '' if add == '0' else add
+    try:
+        condition = _condition(fields[4] if len(fields) > 4 else '.', suffix=fields[0] == 'SFX')
+    except re.error:
+        return None
+    return _Affix(strip, add, condition, cross_product)
+
+
+def _flags(text: str, affixes: _Affixes) -> List[str]:
+    """Flags of a dictionary entry, in the format of the affix file, in their order so the expansion is stable."""
+    if affixes.aliases and text.isdigit() and 0 < int(text) <= len(affixes.aliases):
+        text = affixes.aliases[int(text) - 1]
+    if affixes.flag_type == 'long':
+        flags = [text[i:i + 2] for i in range(0, len(text), 2)]
+    elif affixes.flag_type == 'num':
+        flags = text.split(',')
+    else:
+        flags = list(text)
+    return list(dict.fromkeys(flags))
+
+
+def _expand(stem: str, flags: List[str], affixes: _Affixes) -> List[str]:
+    """Words derived from a stem by its prefixes and suffixes, including the combinations of both."""
+    suffixed = []
+    for flag in flags:
+        for rule in affixes.suffixes.get(flag, ()):
+            if stem.endswith(rule.strip) and rule.condition.search(stem):
+                suffixed.append((stem[:len(stem) - len(rule.strip)] + rule.add, rule.cross_product))
+
+    words = [word for word, _ in suffixed]
+    for flag in flags:
+        for rule in affixes.prefixes.get(flag, ()):
+            bases = [stem] + [word for word, cross in suffixed if cross and rule.cross_product]
+            words.extend(rule.add + base[len(rule.strip):] for base in bases
+                         if base.startswith(rule.strip) and rule.condition.match(base))
+    return words
+
+
+class SymSpellIndex:
+    """Symmetric delete index for spelling correction."""
+
+    def __init__(self, words: Iterable[str], max_distance: int = 2):
+        """Symmetric delete index for spelling correction.
+
+        Args:
+            words (Iterable[str]): Words of the dictionary, their order is used to break ties between candidates
+                with the same distance and common prefix with a token, the first word being preferred.
+            max_distance (int): Maximum distance supported by the lookups.
+        """
+        self.max_distance = max_distance
+        self.words: List[str] = []
+        self._ranks: Dict[str, int] = {}
+        self._index: Dict[str, List[int]] = {}
+
+        for word in words:
+            if word in self._ranks:
+                continue
+            rank = len(self.words)
+            self._ranks[word] = rank
+            self.words.append(word)
+            for delete in _deletes(word, max_distance):
+                self._index.setdefault(delete, []).append(rank)
+
+    @classmethod
+    def from_hunspell(cls, path: str, max_distance: int = 2) -> 'SymSpellIndex':
+        """Build the index from the words of a Hunspell dictionary.
+
+        The stems listed in the dictionary file are expanded with the prefixes and suffixes of the affix file
+        with the same name, if available, including the combinations of a prefix and a suffix. The stems come
+        first in the dictionary order, followed by the derived words, so stems are preferred in case of tie.
+        Compound words and the affixes of the affixes (continuation flags) are not expanded, so corrections into
+        those words are only found by the `hunspell` backend of `SpellCheck`.
+
+        Args:
+            path (str): Path to the Hunspell dictionary, `.dic` file, the encoding and the affixes are read from
+                the `.aff` file with the same name, if available.
+            max_distance (int): Maximum distance supported by the lookups.
+
+        Returns: SymSpellIndex
+        """
+        encoding = 'utf-8'
+        aff = os.path.splitext(path)[0] + '.aff'
+        if os.path.exists(aff):
+            with open(aff, encoding='latin-1') as f:
+                for line in f:
+                    if line.startswith('SET '):
+                        encoding = line.split()[1]
+                        break
+        affixes = _read_affixes(aff, encoding) if os.path.exists(aff) else _Affixes('char', [], {}, {}, set())
+
+        with open(path, encoding=encoding, errors='ignore') as f:
+            lines = f.read().splitlines()[1:]
+
+        stems, derived = [], []
+        for line in lines:
+            fields = line.split()
+            if not fields:
+                continue
+            stem, _, text = fields[0].partition('/')
+            flags = _flags(text, affixes) if text else []
+            if not any(flag in affixes.not_words for flag in flags):
+                stems.append(stem)
+            derived.extend(_expand(stem, flags, affixes))
+
+        return cls((word for word in stems + derived if word), max_distance=max_distance)
+
+    def candidates(self, token: str, max_distance: Optional[int] = None) -> List[str]:
+        """Find the closest words to a token.
+
+        Args:
+            token (str): Token to be corrected.
+            max_distance (Optional[int]): Maximum distance between the token and the words, by default the maximum
+                distance of the index. It can not be larger than the maximum distance of the index.
+
+        Returns: List[str], the words with the lowest distance, from the longest common prefix with the token to the
+            shortest and then in the dictionary order, or an empty list if there is no word within the maximum
+            distance.
+        """
+        max_distance = self.max_distance if max_distance is None else max_distance
+        if max_distance > self.max_distance:
+            raise ValueError(f"Maximum distance {max_distance} is larger than the index maximum distance "
+                             f"{self.max_distance}.")
+
+        if token in self._ranks:
+            return [token]
+
+        best_distance, best_ranks = max_distance + 1, []
+        checked: Set[int] = set()
+        for delete in _deletes(token, max_distance):
+            for rank in self._index.get(delete, ()):
+                if rank in checked:
+                    continue
+                checked.add(rank)
+
+                distance = bounded_edit_distance(token, self.words[rank], best_distance)
+                if distance < best_distance:
+                    best_distance, best_ranks = distance, [rank]
+                elif distance == best_distance <= max_distance:
+                    best_ranks.append(rank)
+
+        # Ties are broken by the characters kept at the start of the token, which are less often misspelt
+        return [self.words[rank] for rank in
+                sorted(best_ranks, key=lambda rank: (-_common_prefix(token, self.words[rank]), rank))]
+
+    def lookup(self, token: str, max_distance: Optional[int] = None) -> Optional[str]:
+        """Find the closest word to a token.
+
+        Args:
+            token (str): Token to be corrected.
+            max_distance (Optional[int]): Maximum distance between the token and the word, by default the maximum
+                distance of the index. It can not be larger than the maximum distance of the index.
+
+        Returns: Optional[str], the word with the lowest distance, see `candidates` for the ties, or `None` if there
+            is no word within the maximum distance.
+        """
+        candidates = self.candidates(token, max_distance)
+        return candidates[0] if candidates else None
+
+    def save(self, path: str) -> None:
+        """Store the index on disk.
+
+        Args:
+            path (str): File path where the index will be stored.
+        """
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'SymSpellIndex':
+        """Load an index stored with `save`, only load files from trusted sources.
+
+        Args:
+            path (str): File path where the index was stored.
+
+        Returns: SymSpellIndex
+        """
+        with open(path, 'rb') as f:
+            index = pickle.load(f)
+
+        if not isinstance(index, cls):
+            raise ValueError(f"{path} does not contain a {cls.__name__}.")
+        return index
+
+    def __contains__(self, word: object) -> bool:
+        return word in self._ranks
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __repr__(self) -> str:
+        return "%s(<%d words>, max_distance=%r)" % (self.__class__.__name__, len(self.words), self.max_distance)
@@ -0,0 +1,257 @@
+"""Vectorizer Module.
+
+Sparse bag of words features computed from the `cleaned` values of the tokens of the documents, e.g. the output
+of `Compose.pipe`, so the text is not tokenized again to build them. The tokens of a whole batch are mapped to
+vocabulary columns at once and counted with a single sort, instead of a dictionary of counts per document, and
+the batch is returned in compressed sparse row (CSR) format.
+
+The vocabulary grows as batches are fitted, so large corpora can be fitted in a streaming fashion, and the
+fitted state can be stored and loaded.
+"""
+
+import pickle
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    cast
+)
+
+from nlpiper.core.document import Document, Token
+from nlpiper.logger import log
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy as np
+        return np
+
+    except ImportError:
+        log.error("To use the vectorizer please install numpy. "
+                  "See the docs at https://numpy.org/ for more information.")
+        raise
+
+
+class CSRMatrix(NamedTuple):
+    """Sparse matrix in compressed sparse row format.
+
+    The columns of row `i` are `indices[indptr[i]:indptr[i + 1]]`, with values `data[indptr[i]:indptr[i + 1]]`,
+    it can be converted with `scipy.sparse.csr_matrix((data, indices, indptr), shape=shape)`.
+
+    Attributes:
+        data (numpy.ndarray): Values of the non-zero entries.
+        indices (numpy.ndarray): Column of each value, sorted within each row.
+        indptr (numpy.ndarray): Position in `data` and `indices` where each row starts, with `n_rows + 1` entries.
+        shape (Tuple[int, int]): Number of rows and columns.
+    """
+
+    data: Any
+    indices: Any
+    indptr: Any
+    shape: Tuple[int, int]
+
+
+class Vectorizer:
+    """Sparse bag of words and TF-IDF features of the tokens of documents."""
+
+    def __init__(self, vocabulary: Optional[Iterable[str]] = None, idf: bool = False, norm: Optional[str] = None):
+        """Sparse bag of words and TF-IDF features of the tokens of documents.
+
+        Args:
+            vocabulary (Optional[Iterable[str]]): Initial tokens of the vocabulary, the column of each token is its
+                position, tokens found when fitting are added after them.
+            idf (bool): If True the counts are weighted by the smoothed inverse document frequency of the token,
+                `log((1 + n_docs) / (1 + df)) + 1`, with the frequencies of the fitted documents.
+            norm (Optional[str]): `"l2"` normalises each row to unit length, by default the rows are not normalised.
+        """
+        if norm not in (None, 'l2'):
+            raise ValueError(f"{norm!r} norm is not available, it can only be None or 'l2'.")
+
+        self.np = _import_numpy()
+        self.idf = idf
+        self.norm = norm
+        self.vocabulary: Dict[str, int] = {}
+        for token in vocabulary or []:
+            self.vocabulary.setdefault(token, len(self.vocabulary))
+        # Tokens given on creation keep their columns when the vectorizer is fitted again
+        self._initial_vocabulary = list(self.vocabulary)
+        self.n_docs = 0
+        self._df = self.np.zeros(len(self.vocabulary), dtype=self.np.int64)
+
+    @property
+    def tokens(self) -> List[str]:
+        """Tokens of the vocabulary, in the order of their columns."""
+        return list(self.vocabulary)
+
+    @property
+    def document_frequencies(self) -> Any:
+        """Number of fitted documents with each token of the vocabulary."""
+        return self._df[:len(self.vocabulary)]
+
+    @property
+    def idf_weights(self) -> Any:
+        """Smoothed inverse document frequency of each token of the vocabulary."""
+        np = self.np
+        return (np.log((1 + self.n_docs) / (1 + self.document_frequencies)) + 1).astype(np.float32)
+
+    def _counts(self, docs: List[Document], grow: bool) -> Tuple[Any, Any, Any]:
+        """Count the tokens of each document.
+
+        Args:
+            docs (List[Document]): Documents with tokens.
+            grow (bool): If True unknown tokens are added to the vocabulary, otherwise they are ignored.
+
+        Returns: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray], row, column and count of each distinct token
+            of each document, sorted by row and column.
+        """
+        np = self.np
+        for d in docs:
+            if d.tokens is None:
+                raise RuntimeError("Vectorizer can not be applied on documents without tokens")
+
+        index = self.vocabulary
+        tokens = (token.cleaned for d in docs for token in cast(List[Token], d.tokens))
+        # Empty tokens, e.g. removed by a normalizer, are ignored
+        if grow:
+            columns = (index.setdefault(token, len(index)) if token else -1 for token in tokens)
+        else:
+            columns = (index.get(token, -1) if token else -1 for token in tokens)
+
+        lengths = [len(cast(List[Token], d.tokens)) for d in docs]
+        columns = np.fromiter(columns, dtype=np.int64, count=sum(lengths))
+        rows = np.repeat(np.arange(len(docs)), lengths)
+        known = columns >= 0
+
+        # A single sort of `row * n_columns + column` groups the occurrences of each token of each document
+        n_columns = max(len(index), 1)
+        keys, counts = np.unique(rows[known] * n_columns + columns[known], return_counts=True)
+        rows, columns = np.divmod(keys, n_columns)
+
+        return rows, columns, counts
+
+    def partial_fit(self, docs: List[Document]) -> 'Vectorizer':
+        """Add the tokens of a batch of documents to the vocabulary and update the document frequencies.
+
+        Args:
+            docs (List[Document]): Documents with tokens.
+
+        Returns: Vectorizer, the vectorizer itself.
+        """
+        np = self.np
+        _, columns, _ = self._counts(docs, grow=True)
+
+        if len(self._df) < len(self.vocabulary):
+            # Grow the frequencies geometrically, so streaming many batches copies them a few times only
+            df = np.zeros(max(len(self.vocabulary), 2 * len(self._df)), dtype=np.int64)
+            df[:len(self._df)] = self._df
+            self._df = df
+        self._df[:len(self.vocabulary)] += np.bincount(columns, minlength=len(self.vocabulary))
+        self.n_docs += len(docs)
+
+        return self
+
+    def fit(self, docs: Iterable[Document], batch_size: int = 1024) -> 'Vectorizer':
+        """Fit the vectorizer on a stream of documents, replacing the fitted state, in batches of documents.
+
+        The vocabulary is reset to the tokens given on creation, the tokens of the documents are added after them.
+
+        Args:
+            docs (Iterable[Document]): Documents with tokens, e.g. the output of `Compose.pipe`.
+            batch_size (int): Number of documents fitted at once.
+
+        Returns: Vectorizer, the vectorizer itself.
+        """
+        if batch_size <= 0:
+            raise ValueError(f"Batch size must be a positive number, {batch_size} given.")
+
+        self.vocabulary = {token: i for i, token in enumerate(self._initial_vocabulary)}
+        self.n_docs = 0
+        self._df = self.np.zeros(len(self.vocabulary), dtype=self.np.int64)
+
+        docs = iter(docs)
+        while True:
+            batch = list(islice(docs, batch_size))
+            if not batch:
+                return self
+            self.partial_fit(batch)
+
+    def transform(self, docs: List[Document]) -> CSRMatrix:
+        """Compute the features of a batch of documents, tokens not in the vocabulary are ignored.
+
+        Args:
+            docs (List[Document]): Documents with tokens.
+
+        Returns: CSRMatrix, with a row per document and a column per token of the vocabulary. The values are the
+            token counts, weighted by `idf_weights` if `idf` and normalised if `norm` are set, in float32.
+        """
+        np = self.np
+        rows, columns, counts = self._counts(docs, grow=False)
+
+        data = counts.astype(np.float32)
+        if self.idf:
+            data *= self.idf_weights[columns]
+        if self.norm == 'l2':
+            norms = np.sqrt(np.bincount(rows, weights=data ** 2, minlength=len(docs)))
+            data /= norms[rows].astype(np.float32)
+
+        indptr = np.zeros(len(docs) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(docs)), out=indptr[1:])
+
+        return CSRMatrix(data, columns, indptr, (len(docs), len(self.vocabulary)))
+
+    def fit_transform(self, docs: List[Document]) -> CSRMatrix:
+        """Fit the vectorizer on a batch of documents, see `partial_fit`, and compute their features.
+
+        Args:
+            docs (List[Document]): Documents with tokens.
+
+        Returns: CSRMatrix
+        """
+        return self.partial_fit(docs).transform(docs)
+
+    def save(self, path: str) -> None:
+        """Store the fitted vectorizer on disk.
+
+        Args:
+            path (str): File path where the vectorizer will be stored.
+        """
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> 'Vectorizer':
+        """Load a vectorizer stored with `save`, only load files from trusted sources.
+
+        Args:
+            path (str): File path where the vectorizer was stored.
+
+        Returns: Vectorizer
+        """
+        with open(path, 'rb') as f:
+            vectorizer = pickle.load(f)
+
+        if not isinstance(vectorizer, cls):
+            raise ValueError(f"{path} does not contain a {cls.__name__}.")
+        return vectorizer
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        # Modules can not be pickled, numpy is imported again when unpickled
+        state.pop('np', None)
+        state['_df'] = self.document_frequencies.copy()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.np = _import_numpy()
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+    def __repr__(self) -> str:
+        return "%s(<%d tokens>, idf=%r, norm=%r)" % (self.__class__.__name__, len(self.vocabulary), self.idf, self.norm)
@@ -0,0 +1,303 @@
+"""Vocabulary Module.
+
+Vocabularies are used by the transformers that need to check if a token belongs to a set of tokens, e.g.
+`RemoveStopWords` and `VocabularyFilter`. Both implementations offer membership tests which do not depend
+on the vocabulary size:
+
+- `Vocabulary`: in-memory hash set, shared copy-on-write by forked worker processes.
+- `MappedVocabulary`: sorted vocabulary stored on disk and memory-mapped, suited for vocabularies with millions
+  of entries, since its pages are shared by every process using the same file.
+
+`IdVocabulary` maps tokens to integer IDs instead, so documents can keep compact arrays of IDs instead of a string
+object per token.
+
+Case folding is applied once when the vocabulary is built, so only the token being checked needs to be folded.
+"""
+
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Optional
+)
+
+from nlpiper.core.fingerprint import file_fingerprint, fingerprint
+
+_MAGIC = b'NLPVOCAB'
+_HEADER = struct.Struct('<8sBQ')
+_OFFSET = struct.Struct('<Q')
+
+
+class Vocabulary:
+    """In-memory vocabulary with constant time membership."""
+
+    def __init__(self, tokens: Iterable[str], case_sensitive: bool = True):
+        """In-memory vocabulary with constant time membership.
+
+        Args:
+            tokens (Iterable[str]): Tokens that define the vocabulary.
+            case_sensitive (bool): When `False`, tokens are lower cased when the vocabulary is built and when
+                checking if a token belongs to it.
+        """
+        self.case_sensitive = case_sensitive
+        self._tokens = frozenset(tokens if case_sensitive else (token.lower() for token in tokens))
+        self._repr: Optional[str] = None
+
+    def __contains__(self, token: object) -> bool:
+        if not isinstance(token, str):
+            return False
+        return (token if self.case_sensitive else token.lower()) in self._tokens
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tokens)
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __repr__(self) -> str:
+        # The tokens are frozen, so the representation, which is part of the steps of every document filtered by
+        # the vocabulary, is only built once
+        if self._repr is None:
+            self._repr = "%s(%r, case_sensitive=%r)" % (self.__class__.__name__, sorted(self._tokens),
+                                                        self.case_sensitive)
+        return self._repr
+
+    def __getstate__(self):
+        # The representation is built again by the copies, if needed, instead of being sent to worker processes
+        state = self.__dict__.copy()
+        state['_repr'] = None
+        return state
+
+    def fingerprint(self) -> Optional[str]:
+        """Stable hash of the tokens of the vocabulary, see `nlpiper.core.fingerprint`."""
+        return fingerprint(sorted(self._tokens), self.case_sensitive)
+
+    def save(self, path: str) -> 'MappedVocabulary':
+        """Store the vocabulary on disk to be used as a memory-mapped vocabulary.
+
+        Args:
+            path (str): File path where the vocabulary will be stored.
+
+        Returns: MappedVocabulary
+        """
+        return MappedVocabulary.build(self._tokens, path, case_sensitive=self.case_sensitive)
+
+
+class MappedVocabulary:
+    """Memory-mapped on-disk vocabulary.
+
+    The file stores the number of tokens, their offsets and the sorted UTF-8 encoded tokens, membership is
+    checked with a binary search over the memory-mapped file, without loading the vocabulary into memory.
+    """
+
+    def __init__(self, path: str):
+        """Memory-mapped on-disk vocabulary.
+
+        Args:
+            path (str): Path of a vocabulary file created with `MappedVocabulary.build` or `Vocabulary.save`.
+        """
+        self.path = path
+        self._open()
+
+    def _open(self) -> None:
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, case_sensitive, size = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{self.path} is not a valid vocabulary file.")
+
+        self.case_sensitive = bool(case_sensitive)
+        self._size = size
+        self._data = _HEADER.size + (size + 1) * _OFFSET.size
+
+    @classmethod
+    def build(cls, tokens: Iterable[str], path: str, case_sensitive: bool = True) -> 'MappedVocabulary':
+        """Build a vocabulary file and memory-map it.
+
+        Args:
+            tokens (Iterable[str]): Tokens that define the vocabulary.
+            path (str): File path where the vocabulary will be stored.
+            case_sensitive (bool): When `False`, tokens are lower cased when the vocabulary is built and when
+                checking if a token belongs to it.
+
+        Returns: MappedVocabulary
+        """
+        # UTF-8 keeps code point ordering, so sorted strings are also sorted as bytes
+        folded = tokens if case_sensitive else (token.lower() for token in tokens)
+        encoded = [token.encode('utf-8') for token in sorted(set(folded))]
+
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, case_sensitive, len(encoded)))
+            offset = 0
+            for token in encoded:
+                f.write(_OFFSET.pack(offset))
+                offset += len(token)
+            f.write(_OFFSET.pack(offset))
+            for token in encoded:
+                f.write(token)
+
+        return cls(path)
+
+    def _token(self, index: int) -> bytes:
+        start, end = struct.unpack_from('<QQ', self._map, _HEADER.size + index * _OFFSET.size)
+        return self._map[self._data + start:self._data + end]
+
+    def __contains__(self, token: object) -> bool:
+        if not isinstance(token, str):
+            return False
+        key = (token if self.case_sensitive else token.lower()).encode('utf-8')
+        index = bisect_left(_Tokens(self), key)
+        return index < self._size and self._token(index) == key
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._token(i).decode('utf-8') for i in range(self._size))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return "%s(%r)" % (self.__class__.__name__, self.path)
+
+    def fingerprint(self) -> Optional[str]:
+        """Stable hash of the contents of the vocabulary file, see `nlpiper.core.fingerprint`."""
+        return file_fingerprint(self.path)
+
+    def __getstate__(self):
+        # Worker processes reopen the file instead of receiving a copy of the mapped vocabulary
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self._open()
+
+
+class IdVocabulary:
+    """Growable vocabulary which maps tokens to consecutive integer IDs."""
+
+    def __init__(self, tokens: Iterable[str] = (), unknown: str = '<unk>'):
+        """Growable vocabulary which maps tokens to consecutive integer IDs.
+
+        The ID `0` is reserved to the unknown token, the following IDs are given to the tokens in the order they
+        are added, so a vocabulary stored with `save` gives the same IDs to the same tokens in every process.
+        While the vocabulary matches the file it was stored to or loaded from, its `repr` loads that file, so
+        pipelines with the vocabulary can be created again from the steps of their documents.
+
+        Args:
+            tokens (Iterable[str]): Initial tokens of the vocabulary.
+            unknown (str): Token returned when decoding the ID `0`, given to unknown tokens when the vocabulary does
+                not grow.
+        """
+        self.unknown = unknown
+        self.path: Optional[str] = None
+        self._tokens: List[str] = [unknown]
+        self._ids = {unknown: 0}
+        self.add(tokens)
+
+    def add(self, tokens: Iterable[str]) -> None:
+        """Add the tokens which are not in the vocabulary yet.
+
+        Args:
+            tokens (Iterable[str]): Tokens to be added.
+        """
+        for token in dict.fromkeys(tokens):
+            if token not in self._ids:
+                self._ids[token] = len(self._tokens)
+                self._tokens.append(token)
+                # The vocabulary no longer matches its file
+                self.path = None
+
+    def encode(self, tokens: Iterable[str], grow: bool = True) -> array:
+        """Convert tokens to their IDs.
+
+        Args:
+            tokens (Iterable[str]): Tokens to be converted.
+            grow (bool): If True tokens not in the vocabulary are added to it, otherwise they get the ID `0`.
+
+        Returns: array, unsigned integers array (type code `'I'`) with the ID of each token.
+        """
+        if grow:
+            tokens = list(tokens)
+            self.add(tokens)
+            return array('I', map(self._ids.__getitem__, tokens))
+
+        get = self._ids.get
+        return array('I', [get(token, 0) for token in tokens])
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        """Convert IDs back to their tokens.
+
+        Args:
+            ids (Iterable[int]): IDs returned by `encode`, e.g. an array or a numpy array.
+
+        Returns: List[str]
+        """
+        tokens = self._tokens
+        return [tokens[i] for i in ids]
+
+    def __contains__(self, token: object) -> bool:
+        return token in self._ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tokens)
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __repr__(self) -> str:
+        if self.path is not None:
+            return "%s.load(%r)" % (self.__class__.__name__, self.path)
+        return "%s(<%d tokens>, unknown=%r)" % (self.__class__.__name__, len(self._tokens), self.unknown)
+
+    def fingerprint(self) -> Optional[str]:
+        """Stable hash of the tokens of the vocabulary, in the order of their IDs, see `nlpiper.core.fingerprint`."""
+        return fingerprint(self._tokens)
+
+    def save(self, path: str) -> None:
+        """Store the vocabulary on disk as a JSON list of the tokens in the order of their IDs.
+
+        Args:
+            path (str): File path where the vocabulary will be stored.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self._tokens, f, ensure_ascii=False)
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str) -> 'IdVocabulary':
+        """Load a vocabulary stored with `save`.
+
+        Args:
+            path (str): File path where the vocabulary was stored.
+
+        Returns: IdVocabulary
+        """
+        with open(path, encoding='utf-8') as f:
+            tokens = json.load(f)
+
+        if not isinstance(tokens, list) or not tokens or not all(isinstance(token, str) for token in tokens):
+            raise ValueError(f"{path} is not a valid vocabulary file.")
+        if len(set(tokens)) != len(tokens):
+            raise ValueError(f"{path} is not a valid vocabulary file, it has repeated tokens.")
+
+        vocabulary = cls(tokens[1:], unknown=tokens[0])
+        vocabulary.path = path
+        return vocabulary
+
+
+class _Tokens:
+    """Sequence view of the tokens of a mapped vocabulary, used by the binary search."""
+
+    def __init__(self, vocabulary: MappedVocabulary):
+        self._vocabulary = vocabulary
+
+    def __getitem__(self, index: int) -> bytes:
+        return self._vocabulary._token(index)
+
+    def __len__(self) -> int:
+        return len(self._vocabulary)
@@ -1,13 +1,42 @@
 """Base Transformer Module."""
 
+import weakref
 from enum import Enum, auto
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    cast
+)
 
 from nlpiper.core import Document
+from nlpiper.core.document import Token
+from nlpiper.core.fingerprint import fingerprint
+from nlpiper.core.registry import registry
 from nlpiper.logger import log
 
 
 class BaseTransformer:
-    """Base class to all Transformers."""
+    """Base class to all Transformers.
+
+    Transformers which give the same result when applied to the segments of a long document, split at whitespace,
+    as when applied to the whole document have `segmentable = True`, so `Compose` can split long documents and
+    process the segments in parallel.
+
+    Transformers whose result only depends on the document and on their `repr` have `cacheable = True`, so the
+    documents processed by a `Compose` with a cache can be reused.
+
+    Transformers which can process several batches at once, from different threads, have `thread_safe = True`, so
+    `Compose.pipe` can give them several workers.
+    """
+
+    segmentable: bool = True
+    cacheable: bool = True
+    thread_safe: bool = True
 
     def __init__(self, *args, **kwargs):
         self.args = args
@@ -25,6 +54,76 @@ class BaseTransformer:
     def __call__(self, doc: Document, inplace: bool = False) -> Document:
         raise NotImplementedError
 
+    def fingerprint(self) -> Optional[str]:
+        """Stable hash of the options of the transformer and of the contents of the models and files it uses.
+
+        Transformers which use models or files that are not part of their options add their contents, see
+        `nlpiper.core.fingerprint`.
+
+        Returns: Optional[str], `None` if the transformer uses objects whose contents are unknown.
+        """
+        return fingerprint(self.__class__.__name__, self.args, self.kwargs)
+
+    def batch(self, docs: List[Document], inplace: bool = False) -> Optional[List[Document]]:
+        """Apply the transformer to a batch of documents.
+
+        Transformers which are able to process several documents at once more efficiently override this method.
+
+        Args:
+            docs (List[Document]): Documents to be transformed.
+            inplace (bool): if False will return new doc objects,
+                            otherwise will change the objects passed as parameter.
+
+        Returns: List[Document]
+        """
+        out = [self(doc, inplace) for doc in docs]
+        return None if inplace else out
+
+    def _acquire_resource(self, backend: str, language: str, *args, **kwargs) -> Any:
+        """Get a backend resource shared with other transformers through the resource registry.
+
+        The resource is released when the transformer is garbage collected. Copies of the transformer, made with
+        `copy`, `deepcopy` or pickle, share the resource and acquire their own reference to it.
+
+        Args:
+            backend (str): Backend name registered in the resource registry.
+            language (str): Resource language.
+            *args: Options used to load the resource.
+            **kwargs: Options used to load the resource.
+
+        Returns: Any
+        """
+        resource = registry.acquire(backend, language, *args, **kwargs)
+        self._resources = getattr(self, '_resources', []) + [(backend, language, args, kwargs)]
+        self._shared = getattr(self, '_shared', []) + [resource]
+        finalizer = weakref.finalize(self, registry.release, backend, language, *args, **kwargs)
+        finalizer.atexit = False
+        return resource
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        # Shared resources are not copied, the copy acquires them again from the registry
+        shared = {id(resource): i for i, resource in enumerate(state.pop('_shared', []))}
+        for name, value in state.items():
+            if id(value) in shared:
+                state[name] = _SharedResource(shared[id(value)])
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._resources, self._shared = [], []
+        for backend, language, args, kwargs in state.get('_resources', []):
+            self._acquire_resource(backend, language, *args, **kwargs)
+        for name, value in state.items():
+            if isinstance(value, _SharedResource):
+                setattr(self, name, self._shared[value.position])
+
+
+class _SharedResource(NamedTuple):
+    """Placeholder of a shared resource in the state of a copied or pickled transformer."""
+
+    position: int
+
 
 class TransformersType(Enum):
     CLEANERS = auto()
@@ -33,6 +132,38 @@ class TransformersType(Enum):
     EMBEDDINGS = auto()
 
 
+def _validate_document(doc: Document, transformer_type: TransformersType) -> None:
+    if not isinstance(doc, Document):
+        raise TypeError("Argument doc is not of type Document")
+
+    if transformer_type in (TransformersType.CLEANERS, TransformersType.TOKENIZERS):
+        if doc.tokens is not None:
+            raise RuntimeError(
+                f"{transformer_type.name.title()} transformer can not be applied on documents with tokens"
+            )
+    elif transformer_type in (TransformersType.NORMALIZERS, TransformersType.EMBEDDINGS):
+        if doc.tokens is None:
+            raise RuntimeError(
+                f"{transformer_type.name.title()} transformer can not be applied on documents without tokens"
+            )
+        elif doc.embedded is not None:
+            raise RuntimeError(
+                f"{transformer_type.name.title()} transformer can not be applied on documents with embeddings"
+            )
+    else:
+        raise RuntimeError("TransformerType behavior not implemented")
+
+
+def _tokens(doc: Document) -> List[Token]:
+    """Tokens of a document validated to have tokens."""
+    return cast(List[Token], doc.tokens)
+
+
+def _cleaned(docs: Iterable[Document]) -> List[str]:
+    """Cleaned tokens of documents validated to have tokens, in order."""
+    return cast(List[str], [token.cleaned for d in docs for token in _tokens(d)])
+
+
 # Decorators
 def validate(transformer_type: TransformersType):
     """Validate a transformation call.
@@ -43,27 +174,7 @@ def validate(transformer_type: TransformersType):
     """
     def inner_validate(func):
         def wrapper(*args, **kwargs):
-            doc: Document = args[1]
-            if not isinstance(doc, Document):
-                raise TypeError("Argument doc is not of type Document")
-
-            if transformer_type in (TransformersType.CLEANERS, TransformersType.TOKENIZERS):
-                if doc.tokens is not None:
-                    raise RuntimeError(
-                        f"{transformer_type.name.title()} transformer can not be applied on documents with tokens"
-                    )
-            elif transformer_type in (TransformersType.NORMALIZERS, TransformersType.EMBEDDINGS):
-                if doc.tokens is None:
-                    raise RuntimeError(
-                        f"{transformer_type.name.title()} transformer can not be applied on documents without tokens"
-                    )
-                elif doc.embedded is not None:
-                    raise RuntimeError(
-                        f"{transformer_type.name.title()} transformer can not be applied on documents with embeddings"
-                    )
-            else:
-                raise RuntimeError("TransformerType behavior not implemented")
-
+            _validate_document(args[1], transformer_type)
             return func(*args, **kwargs)
         return wrapper
     return inner_validate
@@ -82,3 +193,138 @@ def add_step(func):
         return out
 
     return wrapper
+
+
+class BaseTokenNormalizer(BaseTransformer):
+    """Base class to normalizers which transform each token independently of the others.
+
+    The result of these normalizers only depends on the `cleaned` value of each token, so they are applied once
+    per distinct token (type) and the result is copied to every occurrence of the type.
+    """
+
+    def normalize(self, cleaned: str) -> Dict[str, Any]:
+        """Normalize a token.
+
+        Args:
+            cleaned (str): Token `cleaned` value.
+
+        Returns: Dict[str, Any], token attributes to be updated, which must include `cleaned`.
+        """
+        raise NotImplementedError
+
+    def normalize_types(self, types: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Normalize a collection of distinct tokens.
+
+        Args:
+            types (Iterable[str]): Distinct token `cleaned` values.
+
+        Returns: Dict[str, Dict[str, Any]], token attributes to be updated by type.
+        """
+        return {cleaned: self.normalize(cleaned) for cleaned in types}
+
+    def _steps(self) -> List[str]:
+        """Steps registered in the documents normalized by this normalizer."""
+        return [repr(self)]
+
+    @validate(TransformersType.NORMALIZERS)
+    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
+        """Normalize tokens.
+
+        Args:
+            doc (Document): Document to be normalized.
+            inplace (bool): if False will return a new doc object,
+                            otherwise will change the object passed as parameter.
+
+        Returns: Document
+        """
+        d = doc if inplace else doc._deepcopy()
+
+        normalize_tokens([_tokens(d)], [self])
+        d.steps.extend(self._steps())
+
+        return None if inplace else d
+
+    def batch(self, docs: List[Document], inplace: bool = False) -> Optional[List[Document]]:
+        """Normalize the tokens of a batch of documents, once per distinct token of the whole batch.
+
+        Args:
+            docs (List[Document]): Documents to be normalized.
+            inplace (bool): if False will return new doc objects,
+                            otherwise will change the objects passed as parameter.
+
+        Returns: List[Document]
+        """
+        return normalize_batch(docs, [self], inplace)
+
+
+def chain_types(types: Iterable[str], normalizers: List[BaseTokenNormalizer]) -> Dict[str, Dict[str, Any]]:
+    """Apply a chain of token normalizers to a collection of distinct tokens.
+
+    Each normalizer is applied once per distinct value produced by the previous normalizers.
+
+    Args:
+        types (Iterable[str]): Distinct token `cleaned` values.
+        normalizers (List[BaseTokenNormalizer]): Normalizers applied in order.
+
+    Returns: Dict[str, Dict[str, Any]], token attributes to be updated by type.
+    """
+    updates: Dict[str, Dict[str, Any]] = {cleaned: {} for cleaned in types}
+    current = {cleaned: cleaned for cleaned in updates}
+
+    for normalizer in normalizers:
+        out = normalizer.normalize_types(set(current.values()))
+        for cleaned, fields in updates.items():
+            result = out[current[cleaned]]
+            fields.update(result)
+            current[cleaned] = result['cleaned']
+
+    return updates
+
+
+def normalize_tokens(tokens: List[List[Token]], normalizers: List[BaseTokenNormalizer]) -> None:
+    """Apply a chain of token normalizers once per distinct token.
+
+    The distinct `cleaned` values of all the token lists are collected, the whole chain of normalizers is applied
+    to them and the resulting attributes are copied back to each token, which gives the same tokens as applying
+    each normalizer to each token.
+
+    Args:
+        tokens (List[List[Token]]): Token lists to be normalized, e.g. the tokens of a batch of documents.
+        normalizers (List[BaseTokenNormalizer]): Normalizers applied in order.
+    """
+    types = {token.cleaned for token_list in tokens for token in token_list}
+    # Normalized tokens have a `cleaned` value
+    updates: Dict[Any, Dict[str, Any]] = chain_types(cast(Set[str], types), normalizers)
+
+    for token_list in tokens:
+        for token in token_list:
+            for attribute, value in updates[token.cleaned].items():
+                # Skip unchanged attributes to avoid the validation of the assignment
+                if getattr(token, attribute) != value:
+                    setattr(token, attribute, value)
+
+
+def normalize_batch(docs: List[Document], normalizers: List[BaseTokenNormalizer],
+                    inplace: bool = False) -> Optional[List[Document]]:
+    """Apply a chain of token normalizers to a batch of documents, once per distinct token of the batch.
+
+    Args:
+        docs (List[Document]): Documents to be normalized.
+        normalizers (List[BaseTokenNormalizer]): Normalizers applied in order.
+        inplace (bool): if False will return new doc objects,
+                        otherwise will change the objects passed as parameter.
+
+    Returns: List[Document]
+    """
+    for doc in docs:
+        _validate_document(doc, TransformersType.NORMALIZERS)
+
+    out = docs if inplace else [doc._deepcopy() for doc in docs]
+
+    normalize_tokens([_tokens(d) for d in out], normalizers)
+
+    steps = [step for n in normalizers for step in n._steps()]
+    for d in out:
+        d.steps.extend(steps)
+
+    return None if inplace else out
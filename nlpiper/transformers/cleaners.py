@@ -255,6 +255,9 @@ class CleanMarkup(BaseTransformer):
         'Title 1'
     """
 
+    # Markup elements may span several segments
+    segmentable = False
+
     def __init__(self, features: str = "html.parser", *args, **kwargs):
         """Remove HTML and XML.
 
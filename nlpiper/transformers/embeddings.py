@@ -1,14 +1,25 @@
 """Embeddings Module."""
 
+import zlib
 from typing import (
     Any,
-    Optional
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple
 )
 
 from nlpiper.core.document import Document
+from nlpiper.core.fingerprint import fingerprint
 from nlpiper.transformers.base import (
     BaseTransformer,
     TransformersType,
+    _cleaned,
+    _tokens,
+    _validate_document,
     add_step,
     validate
 )
@@ -16,11 +27,398 @@ from nlpiper.logger import log
 
 __all__ = [
     "GensimEmbeddings",
+    "HashingEmbeddings",
     "TorchTextEmbeddings"
 ]
 
 
-class GensimEmbeddings(BaseTransformer):
+def _import_gensim_keyed_vectors() -> Any:
+    try:
+        from gensim.models import KeyedVectors
+        return KeyedVectors
+
+    except ImportError:
+        log.error("Please install gensim. "
+                  "See the docs at https://radimrehurek.com/gensim/ for more information.")
+        raise
+
+
+def save_keyed_vectors(vectors: Any, path: str) -> None:
+    """Store embeddings in the gensim KeyedVectors format, with the vectors matrix in a separate `.npy` file.
+
+    The stored embeddings can be loaded as a read-only memory map with `load_keyed_vectors`.
+
+    Args:
+        vectors (Any): Gensim KeyedVectors or torchtext Vectors, e.g. `Glove` or `FastText`.
+        path (str): File path where the embeddings will be stored, the matrix is stored in `{path}.vectors.npy`.
+    """
+    KeyedVectors = _import_gensim_keyed_vectors()
+
+    if not isinstance(vectors, KeyedVectors):
+        kv = KeyedVectors(vectors.dim, count=len(vectors.itos), dtype=vectors.vectors.numpy().dtype)
+        kv.add_vectors(vectors.itos, vectors.vectors.to('cpu').detach().numpy())
+        vectors = kv
+
+    vectors.save(path, separately=['vectors'])
+
+
+def load_keyed_vectors(path: str, mmap: Optional[str] = 'r') -> Any:
+    """Load embeddings stored with `save_keyed_vectors`, or gensim `KeyedVectors.save`, as a memory map.
+
+    With a read-only memory map the vectors matrix is not loaded in memory, its pages are read from the file
+    on demand and shared by all the processes which load the same file. `GensimEmbeddings` created with these
+    embeddings reopen the file when unpickled, e.g. in worker processes, instead of copying the matrix.
+
+    Args:
+        path (str): File path where the embeddings were stored.
+        mmap (Optional[str]): Memory map mode, `None` loads the vectors in memory. (Default: `'r'`)
+
+    Returns: gensim.models.KeyedVectors
+    """
+    KeyedVectors = _import_gensim_keyed_vectors()
+
+    kv = KeyedVectors.load(path, mmap=mmap)
+    if mmap is not None:
+        kv.mapfile_path = path
+    return kv
+
+
+def quantize(vectors: Any, dtype: str = 'int8', scale: str = 'vector') -> Tuple[Any, Optional[Any]]:
+    """Convert embeddings to a smaller data type.
+
+    With `float16` the vectors are converted with a relative error around `1e-3`. With `int8` each value is
+    divided by a scale, the maximum absolute value of each vector or of each dimension divided by 127, and
+    rounded, so the absolute error of each value is at most half of its scale.
+
+    Args:
+        vectors (numpy.ndarray): Vector or matrix with a vector per row.
+        dtype (str): Data type, `"float32"`, `"float16"` or `"int8"`.
+        scale (str): Scale used with `int8`, one per vector, `"vector"`, or one per dimension, `"dimension"`.
+
+    Returns: Tuple[numpy.ndarray, Optional[numpy.ndarray]], the converted vectors and the scale, which is `None`
+        for float data types, has shape `(n_vectors, 1)` with `"vector"` and `(dim,)` with `"dimension"`.
+    """
+    import numpy as np
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype in ('float32', 'float16'):
+        return vectors.astype(dtype, copy=False), None
+    if dtype != 'int8':
+        raise ValueError(f"{dtype!r} data type is not available, it can only be 'float32', 'float16' or 'int8'.")
+    if scale not in ('vector', 'dimension'):
+        raise ValueError(f"{scale!r} scale is not available, it can only be 'vector' or 'dimension'.")
+
+    if scale == 'vector':
+        scales = np.max(np.abs(vectors), axis=-1, keepdims=True, initial=0) / 127
+    else:
+        scales = np.max(np.abs(vectors.reshape(-1, vectors.shape[-1])), axis=0, initial=0) / 127
+    scales[scales == 0] = 1
+
+    return np.rint(vectors / scales).astype(np.int8), scales
+
+
+def dequantize(vectors: Any, scale: Optional[Any] = None) -> Any:
+    """Convert embeddings created with `quantize` back to float32.
+
+    Args:
+        vectors (numpy.ndarray): Vector or matrix returned by `quantize`, or rows of it.
+        scale (Optional[numpy.ndarray]): Scale returned by `quantize`, or the rows of the scale matching the
+            rows of the vectors when scaled by vector.
+
+    Returns: numpy.ndarray
+    """
+    import numpy as np
+
+    vectors = np.asarray(vectors).astype(np.float32)
+    return vectors if scale is None else vectors * scale
+
+
+class BaseEmbeddings(BaseTransformer):
+    """Base class to embeddings which look up a vector per token.
+
+    The vectors of all the tokens of a document, or of a batch of documents, are looked up at once in a
+    `(n_tokens, vector_size)` matrix. Each document keeps its contiguous matrix in `tokens_embedded`, the token
+    embeddings are rows of this matrix and the document embedding is computed with a single reduction over it.
+
+    When the token embeddings are not kept, the vectors are looked up in chunks of `chunk_size` tokens which
+    are reduced into the document embeddings, so the memory used does not depend on the number of tokens.
+
+    The embeddings can be stored with a smaller data type, see `quantize`, the document embedding is computed
+    in float32 before the conversion. With `int8` the scales are kept in the document attributes
+    `tokens_embedded_scale` and `embedded_scale`, use `dequantize` to recover the float32 embeddings.
+    """
+
+    # The document embedding pools the tokens of the whole document
+    segmentable = False
+
+    np: Any
+    apply_doc: str
+    vector_size: int
+    # Empty tokens, e.g. left by the removal of stop words, are not pooled in the document embedding
+    skip_empty: bool = False
+    keep_tokens: bool = True
+    dtype: Optional[str] = None
+    scale: str = 'vector'
+    chunk_size: int = 4096
+
+    _defaults = {'keep_tokens': True, 'dtype': None, 'scale': 'vector'}
+
+    @classmethod
+    def _options(cls, **options) -> Dict[str, Any]:
+        """Options with values different from the default, which are included in the representation."""
+        return {k: v for k, v in options.items() if v != cls._defaults[k]}
+
+    def _init_options(self, apply_doc: str, keep_tokens: bool, dtype: Optional[str], scale: str) -> None:
+        assert apply_doc in ('sum', 'mean', 'max'), \
+            'apply_doc value is not valid, can only be: `"mean"`, `"sum"` or `"max"`.'
+        assert dtype in (None, 'float32', 'float16', 'int8'), \
+            'dtype value is not valid, can only be: `None`, `"float32"`, `"float16"` or `"int8"`.'
+        assert scale in ('vector', 'dimension'), 'scale value is not valid, can only be: `"vector"` or `"dimension"`.'
+        self.apply_doc = apply_doc
+        self.keep_tokens = keep_tokens
+        self.dtype = dtype
+        self.scale = scale
+
+    def _set_embedded(self, d: Document, vector: Any) -> None:
+        if self.dtype is None:
+            d.embedded = vector
+            return
+
+        d.embedded, scale = quantize(vector, self.dtype)
+        if scale is not None:
+            d.embedded_scale = scale
+
+    def _vectors(self, tokens: List[str]) -> Any:
+        """Look up the vectors of a list of tokens.
+
+        Args:
+            tokens (List[str]): Tokens to be embedded, at least one.
+
+        Returns: numpy.ndarray, matrix with shape `(len(tokens), vector_size)`.
+        """
+        raise NotImplementedError
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        # Modules can not be pickled, numpy is imported again when unpickled
+        state.pop('np', None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        import numpy as np
+
+        super().__setstate__(state)
+        self.np = np
+
+    def _pooled(self, lengths: Any, chunks: Iterable[Tuple[Any, Any]]) -> Any:
+        """Reduce chunks of token vectors into the documents embeddings, in float32.
+
+        Args:
+            lengths (numpy.ndarray): Number of tokens pooled of each document.
+            chunks (Iterable[Tuple[numpy.ndarray, numpy.ndarray]]): Token vectors, in the order of the documents,
+                and the document index of each vector.
+
+        Returns: numpy.ndarray, matrix with shape `(len(lengths), vector_size)`, documents without tokens are zeros.
+        """
+        np = self.np
+        reduce = np.maximum if self.apply_doc == 'max' else np.add
+        pooled = np.full((len(lengths), self.vector_size), -np.inf if self.apply_doc == 'max' else 0,
+                         dtype=np.float32)
+        for vectors, ids in chunks:
+            if not len(ids):
+                continue
+            # Reduce the rows of each document in the chunk and merge them with the previous chunks
+            segments = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+            ids = ids[segments]
+            pooled[ids] = reduce(pooled[ids], reduce.reduceat(vectors, segments, axis=0))
+
+        if self.apply_doc == 'mean':
+            pooled /= np.maximum(lengths, 1)[:, None]
+        pooled[lengths == 0] = 0
+
+        return pooled
+
+    def _pool(self, docs: List[Document]) -> None:
+        np = self.np
+        tokens = _cleaned(docs)
+        doc_ids = np.repeat(np.arange(len(docs)), [len(_tokens(d)) for d in docs])
+        if self.skip_empty:
+            doc_ids = doc_ids[self._pooled_rows(tokens)]
+            tokens = [token for token in tokens if token]
+        lengths = np.bincount(doc_ids, minlength=len(docs))
+
+        pooled = self._pooled(lengths, ((self._vectors(tokens[start:start + self.chunk_size]),
+                                         doc_ids[start:start + self.chunk_size])
+                                        for start in range(0, len(tokens), self.chunk_size)))
+
+        for d, length, vector in zip(docs, lengths, pooled):
+            self._set_embedded(d, vector.copy() if length else np.zeros(self.vector_size))
+
+    def _embed(self, docs: List[Document]) -> None:
+        if not self.keep_tokens:
+            return self._pool(docs)
+
+        tokens = _cleaned(docs)
+        vectors: Any = self._vectors(tokens) if tokens else None
+
+        start = 0
+        for d in docs:
+            end = start + len(_tokens(d))
+            if end > start:
+                # Each document owns its matrix, so it does not keep the matrix of the whole batch alive
+                matrix = vectors[start:end] if len(docs) == 1 else vectors[start:end].copy()
+                if self.dtype is not None:
+                    matrix = matrix.astype(self.np.float32, copy=False)
+                pooled = self._pool_matrix(d, matrix)
+            else:
+                matrix = self.np.zeros((0, self.vector_size), dtype=self.np.float32)
+                pooled = self.np.zeros(self.vector_size)
+
+            if self.dtype is not None:
+                matrix, scale = quantize(matrix, self.dtype, self.scale)
+                if scale is not None:
+                    d.tokens_embedded_scale = scale
+
+            d.tokens_embedded = matrix
+            for token, vector in zip(_tokens(d), matrix):
+                token.embedded = vector
+            self._set_embedded(d, pooled)
+            start = end
+
+    def _pooled_rows(self, tokens: List[str]) -> Any:
+        """Rows of the tokens vectors pooled in the document embeddings."""
+        if not self.skip_empty:
+            return slice(None)
+        return self.np.fromiter(map(bool, tokens), dtype=bool, count=len(tokens))
+
+    def _pool_matrix(self, d: Document, matrix: Any) -> Any:
+        """Document embedding from the matrix of its tokens vectors."""
+        if self.skip_empty:
+            matrix = matrix[self._pooled_rows(_cleaned([d]))]
+            if not len(matrix):
+                return self.np.zeros(self.vector_size)
+        return getattr(self.np, self.apply_doc)(matrix, axis=0)
+
+    @validate(TransformersType.EMBEDDINGS)
+    @add_step
+    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
+        """Embeddings extraction.
+
+        Args:
+            doc (Document): Document to be embedded.
+            inplace (bool): if False will return a new doc object,
+                            otherwise will change the object passed as parameter.
+
+        Returns: Document
+        """
+        d = doc if inplace else doc._deepcopy()
+
+        self._embed([d])
+
+        return None if inplace else d
+
+    def batch(self, docs: List[Document], inplace: bool = False) -> Optional[List[Document]]:
+        """Embeddings extraction of a batch of documents, looking up the vectors of all the tokens at once.
+
+        Args:
+            docs (List[Document]): Documents to be embedded.
+            inplace (bool): if False will return new doc objects,
+                            otherwise will change the objects passed as parameter.
+
+        Returns: List[Document]
+        """
+        for doc in docs:
+            _validate_document(doc, TransformersType.EMBEDDINGS)
+
+        out = docs if inplace else [doc._deepcopy() for doc in docs]
+
+        self._embed(out)
+
+        step = repr(self)
+        for d in out:
+            d.steps.append(step)
+
+        return None if inplace else out
+
+    def embed_batch(self, docs: List[Document]) -> 'EmbeddingsBatch':
+        """Embed a batch of documents into padded arrays, ready to be used by a model.
+
+        The documents are not changed, the vectors of all the tokens are looked up at once and copied into a
+        preallocated `(len(docs), max_len, vector_size)` array, padded with zeros.
+
+        Args:
+            docs (List[Document]): Documents with tokens to be embedded.
+
+        Returns: EmbeddingsBatch, with the tokens embeddings, the number of tokens and the embedding of each document.
+            The arrays are float32, float16 if `dtype="float16"`, or the model data type if `dtype` is not set.
+        """
+        for doc in docs:
+            _validate_document(doc, TransformersType.EMBEDDINGS)
+
+        np = self.np
+        lengths = np.array([len(_tokens(d)) for d in docs], dtype=np.int64)
+        tokens = _cleaned(docs)
+        doc_ids = np.repeat(np.arange(len(docs)), lengths)
+
+        vectors = self._vectors(tokens) if tokens else np.zeros((0, self.vector_size), dtype=np.float32)
+        if self.dtype is not None:
+            vectors = vectors.astype(np.float32, copy=False)
+        rows = self._pooled_rows(tokens)
+        pooled = self._pooled(np.bincount(doc_ids[rows], minlength=len(docs)), [(vectors[rows], doc_ids[rows])])
+
+        max_len = int(lengths.max(initial=0))
+        out = np.zeros((len(docs), max_len, self.vector_size), dtype=vectors.dtype)
+        # Position of each token in the flattened array, `document * max_len + position in the document`
+        starts = np.cumsum(lengths) - lengths
+        positions = doc_ids * max_len + np.arange(len(tokens)) - starts[doc_ids]
+        out.reshape(-1, self.vector_size)[positions] = vectors
+
+        if self.dtype == 'float16':
+            out, pooled = out.astype(np.float16), pooled.astype(np.float16)
+        elif self.dtype is None:
+            pooled = pooled.astype(vectors.dtype, copy=False)
+
+        return EmbeddingsBatch(np.arange(len(docs)), out, lengths, pooled)
+
+    def embed_buckets(self, docs: List[Document], batch_size: int = 32) -> Iterator['EmbeddingsBatch']:
+        """Embed documents into padded batches of documents with similar number of tokens.
+
+        The documents are sorted by number of tokens and split in batches of `batch_size` documents, which
+        minimises the padding of each batch, see `embed_batch`.
+
+        Args:
+            docs (List[Document]): Documents with tokens to be embedded.
+            batch_size (int): Number of documents of each batch.
+
+        Returns: Iterator[EmbeddingsBatch], the `indices` of each batch are the positions of its documents in `docs`.
+        """
+        if batch_size <= 0:
+            raise ValueError(f"Batch size must be a positive number, {batch_size} given.")
+
+        order = self.np.argsort([len(_tokens(d)) for d in docs], kind='stable')
+        for start in range(0, len(docs), batch_size):
+            indices = order[start:start + batch_size]
+            batch = self.embed_batch([docs[i] for i in indices])
+            yield batch._replace(indices=indices)
+
+
+class EmbeddingsBatch(NamedTuple):
+    """Padded embeddings of a batch of documents.
+
+    Attributes:
+        indices (numpy.ndarray): Position of each document of the batch in the embedded documents.
+        vectors (numpy.ndarray): Tokens embeddings with shape `(batch, max_len, vector_size)`, padded with zeros.
+        lengths (numpy.ndarray): Number of tokens of each document.
+        pooled (numpy.ndarray): Documents embeddings with shape `(batch, vector_size)`.
+    """
+
+    indices: Any
+    vectors: Any
+    lengths: Any
+    pooled: Any
+
+
+class GensimEmbeddings(BaseEmbeddings):
     """Gensim Embedding extraction.
 
     Callable arguments:
@@ -47,17 +445,28 @@ class GensimEmbeddings(BaseTransformer):
         <class 'numpy.ndarray'>
     """
 
-    def __init__(self, keyed_vectors: Any, apply_doc: str = 'mean'):
+    def __init__(self, keyed_vectors: Any, apply_doc: str = 'mean', keep_tokens: bool = True,
+                 dtype: Optional[str] = None, scale: str = 'vector'):
         """Gensim Embedding extraction.
 
+        Keyed vectors loaded with `load_keyed_vectors` are memory mapped, so they are shared by the processes
+        using them, and are reopened instead of copied when the transformer is pickled.
+
         Args:
             keyed_vectors (Any): Gensim model based on keyedVectors,
                 see more in: https://radimrehurek.com/gensim/models/keyedvectors.html
             apply_doc (str): Mode to calculate the embeddings vector for the document,
-                which could be `"mean"` or `"sum"` of the tokens.
+                which could be `"mean"`, `"sum"` or `"max"` of the tokens.
+            keep_tokens (bool): If False only the document embedding is computed, the tokens vectors are
+                reduced as they are looked up and are not kept in the tokens.
+            dtype (Optional[str]): Data type of the embeddings, `"float32"`, `"float16"` or `"int8"`, see `quantize`,
+                by default the data type of the model.
+            scale (str): Scale of the `int8` tokens embeddings, one per token, `"vector"`, or one per dimension for
+                each document, `"dimension"`. The document embedding is always scaled by vector.
         """
-        super().__init__(keyed_vectors=keyed_vectors, apply_doc=apply_doc)
-        assert apply_doc in ('sum', 'mean'), 'apply_doc value is not valid, can only be: `"mean"` or `"sum"`.'
+        options = self._options(keep_tokens=keep_tokens, dtype=dtype, scale=scale)
+        super().__init__(keyed_vectors=keyed_vectors, apply_doc=apply_doc, **options)
+        self._init_options(apply_doc, keep_tokens, dtype, scale)
 
         try:
             import numpy as np
@@ -71,42 +480,66 @@ class GensimEmbeddings(BaseTransformer):
             import gensim
             assert isinstance(keyed_vectors, gensim.models.KeyedVectors), 'keyed_vectors is not of type `KeyedVectors`'
             self.keyed_vectors = keyed_vectors
-            self.apply_doc = apply_doc
 
         except ImportError:
             log.error("Please install gensim. "
                       "See the docs at https://radimrehurek.com/gensim/ for more information.")
             raise
+        self.vector_size = keyed_vectors.vector_size
         self.kwargs['vector_size'] = keyed_vectors.vector_size
         self.kwargs['mapfile_path'] = keyed_vectors.mapfile_path
 
-    @validate(TransformersType.EMBEDDINGS)
-    @add_step
-    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
-        """Gensim Embedding extraction.
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        # Memory mapped keyed vectors are reopened when unpickled instead of copying the vectors
+        if self.keyed_vectors.mapfile_path is not None:
+            state['keyed_vectors'] = None
+            state['kwargs'] = {**self.kwargs, 'keyed_vectors': None}
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        super().__setstate__(state)
+        if self.keyed_vectors is None:
+            self.keyed_vectors = load_keyed_vectors(self.kwargs['mapfile_path'])
+            self.kwargs['keyed_vectors'] = self.keyed_vectors
+
+    def fingerprint(self) -> Optional[str]:
+        """Stable hash of the options and of the keys and vectors of the model, see `BaseTransformer.fingerprint`."""
+        kv = self.keyed_vectors
+        options = {k: v for k, v in self.kwargs.items() if k not in ('keyed_vectors', 'mapfile_path')}
+        # FastText keyed vectors also compute vectors from the n-grams of the keys
+        return fingerprint(self.__class__.__name__, options, kv.index_to_key, kv.vectors,
+                           getattr(kv, 'vectors_ngrams', None))
+
+    def _vectors(self, tokens: List[str]) -> Any:
+        """Look up the vectors of a list of tokens with a single fancy index over the keyed vectors matrix.
 
         Args:
-            doc (Document): Document to be normalized.
-            inplace (bool): if False will return a new doc object,
-                            otherwise will change the object passed as parameter.
+            tokens (List[str]): Tokens to be embedded, at least one.
 
-        Returns: Document
+        Returns: numpy.ndarray, matrix with shape `(len(tokens), vector_size)`, unknown tokens are zero vectors.
         """
-        d = doc if inplace else doc._deepcopy()
+        kv = self.keyed_vectors
+        key_to_index = kv.key_to_index
+        index = self.np.fromiter((key_to_index.get(token, -1) for token in tokens), dtype=self.np.int64,
+                                 count=len(tokens))
+        oov = index < 0
 
-        for token in d.tokens:
-            try:
-                token.embedded = self.keyed_vectors[token.cleaned]
-            except KeyError:
-                token.embedded = self.np.zeros(self.keyed_vectors.vector_size, dtype=self.np.float32)
+        if len(kv.vectors):
+            vectors = kv.vectors[self.np.where(oov, 0, index)]
+            vectors[oov] = 0
+        else:
+            vectors = self.np.zeros((len(tokens), self.vector_size), dtype=self.np.float32)
 
-        d.embedded = (getattr(self.np, self.apply_doc)([token.embedded for token in d.tokens], axis=0)
-                      if len(d.tokens) != 0 else self.np.zeros(self.keyed_vectors.vector_size))
+        # Some keyed vectors compute the vector of keys without index, e.g. FastText from the key n-grams
+        for i in self.np.flatnonzero(oov):
+            if tokens[i] in kv:
+                vectors[i] = kv[tokens[i]]
 
-        return None if inplace else d
+        return vectors
 
 
-class TorchTextEmbeddings(BaseTransformer):
+class TorchTextEmbeddings(BaseEmbeddings):
     """Torchtext Embeddings extraction.
 
     Callable arguments:
@@ -135,18 +568,26 @@ class TorchTextEmbeddings(BaseTransformer):
 
     """
 
-    def __init__(self, model: Any, apply_doc: str = 'mean', **kwargs):
+    def __init__(self, model: Any, apply_doc: str = 'mean', keep_tokens: bool = True, dtype: Optional[str] = None,
+                 scale: str = 'vector', **kwargs):
         """Torchtext Embeddings extraction.
 
         Args:
             model (Any): Torchtext embedding model. Available models: [`Glove`, `CharNGram`, `FastText`].
                 Check further info here: https://pytorch.org/text/stable/vocab.html#pretrained-word-embeddings
             apply_doc (str): Mode to calculate the embeddings vector for the document,
-                which could be `"mean"` or `"sum"` of the tokens.
+                which could be `"mean"`, `"sum"` or `"max"` of the tokens.
+            keep_tokens (bool): If False only the document embedding is computed, the tokens vectors are
+                reduced as they are looked up and are not kept in the tokens.
+            dtype (Optional[str]): Data type of the embeddings, `"float32"`, `"float16"` or `"int8"`, see `quantize`,
+                by default the data type of the model.
+            scale (str): Scale of the `int8` tokens embeddings, one per token, `"vector"`, or one per dimension for
+                each document, `"dimension"`. The document embedding is always scaled by vector.
 
         """
-        super().__init__(model=model, apply_doc=apply_doc, **kwargs)
-        assert apply_doc in ('sum', 'mean'), 'apply_doc value is not valid, can only be: `"mean"` or `"sum"`.'
+        options = self._options(keep_tokens=keep_tokens, dtype=dtype, scale=scale)
+        super().__init__(model=model, apply_doc=apply_doc, **options, **kwargs)
+        self._init_options(apply_doc, keep_tokens, dtype, scale)
 
         try:
             import numpy as np
@@ -160,37 +601,142 @@ class TorchTextEmbeddings(BaseTransformer):
             import torchtext
             assert issubclass(model.__class__, torchtext.vocab.Vectors), 'vectors is not of type `Vectors`'
             self.model = model
-            self.apply_doc = apply_doc
 
         except ImportError:
             log.error("Please install torchtext. "
                       "See the docs at https://pytorch.org/text/stable/index.html for more information.")
             raise
+        self.vector_size = self.model.dim
         self.kwargs['vector_size'] = self.model.dim
 
-    @validate(TransformersType.EMBEDDINGS)
-    @add_step
-    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
-        """Torchtext Embeddings extraction.
+    def fingerprint(self) -> Optional[str]:
+        """Stable hash of the options and of the tokens and vectors of the model, see `BaseTransformer.fingerprint`."""
+        options = {k: v for k, v in self.kwargs.items() if k != 'model'}
+        return fingerprint(self.__class__.__name__, options, self.model.itos, self.model.vectors.cpu().numpy())
+
+    def _vectors(self, tokens: List[str]) -> Any:
+        """Look up the vectors of a list of tokens with a single call to the model.
+
+        The tensor with the vectors of all the tokens is converted once to a numpy array.
 
         Args:
-            doc (Document): Document to be normalized.
-            inplace (bool): if False will return a new doc object,
-                otherwise will change the object passed as parameter.
+            tokens (List[str]): Tokens to be embedded, at least one.
 
-        Returns: Document
+        Returns: numpy.ndarray, matrix with shape `(len(tokens), vector_size)`.
         """
-        d = doc if inplace else doc._deepcopy()
+        return self.model \
+            .get_vecs_by_tokens(tokens) \
+            .to('cpu') \
+            .detach() \
+            .numpy() \
+            .reshape(len(tokens), -1)
 
-        for token in d.tokens:
-            token.embedded = self.model \
-                .get_vecs_by_tokens(token.cleaned) \
-                .reshape(-1) \
-                .to('cpu') \
-                .detach() \
-                .numpy()
 
-        d.embedded = (getattr(self.np, self.apply_doc)([token.embedded for token in d.tokens], axis=0)
-                      if len(d.tokens) != 0 else self.np.zeros(self.model.dim))
+class HashingEmbeddings(BaseEmbeddings):
+    """Hashing Embeddings extraction.
 
-        return None if inplace else d
+    Callable arguments:
+
+    Args:
+        doc (Document): Document to extract embeddings.
+        inplace (bool): if False will return a new doc object,
+            otherwise will change the object passed as parameter.
+
+    Returns:
+        Document with Hashing Embedding or None if `inplace=True`.
+
+    Example:
+        >>> from nlpiper.transformers.embeddings import HashingEmbeddings
+        >>> from nlpiper.core.document import Document
+        >>> from nlpiper.transformers.tokenizers import BasicTokenizer
+        >>> doc = Document('Test random stuff.')
+        >>> t = BasicTokenizer()
+        >>> t(doc, inplace=True)
+        >>> e = HashingEmbeddings(vector_size=64, char_ngrams=(3, 5))
+        >>> e(doc).embedded.shape
+        (64,)
+    """
+
+    # Empty tokens have no features, their vectors are zeros as with the tokens missing from a model
+    skip_empty = True
+
+    def __init__(self, vector_size: int = 256, char_ngrams: Optional[Tuple[int, int]] = None, seed: int = 0,
+                 apply_doc: str = 'mean', keep_tokens: bool = True, dtype: Optional[str] = None,
+                 scale: str = 'vector'):
+        """Hashing Embedding extraction.
+
+        The embeddings do not need a model, each token is split in features, the token and optionally its
+        character n-grams, and each feature adds `+1` or `-1` to a dimension chosen by its CRC32 hash. The
+        token vector is normalised to unit length. The hashes do not depend on the process, so the same token
+        has the same embedding in every run.
+
+        Args:
+            vector_size (int): Dimension of the embeddings.
+            char_ngrams (Optional[Tuple[int, int]]): Minimum and maximum length of the character n-grams of
+                the token, delimited by `<` and `>`, used as features, by default only the token is used.
+            seed (int): Seed of the hashes, embeddings with different seeds use different dimensions.
+            apply_doc (str): Mode to calculate the embeddings vector for the document,
+                which could be `"mean"`, `"sum"` or `"max"` of the tokens.
+            keep_tokens (bool): If False only the document embedding is computed, the tokens vectors are
+                reduced as they are computed and are not kept in the tokens.
+            dtype (Optional[str]): Data type of the embeddings, `"float32"`, `"float16"` or `"int8"`, see `quantize`,
+                by default float32.
+            scale (str): Scale of the `int8` tokens embeddings, one per token, `"vector"`, or one per dimension for
+                each document, `"dimension"`. The document embedding is always scaled by vector.
+        """
+        options = self._options(keep_tokens=keep_tokens, dtype=dtype, scale=scale)
+        hashing = {k: v for k, v in (('char_ngrams', char_ngrams), ('seed', seed)) if v not in (None, 0)}
+        super().__init__(vector_size=vector_size, **hashing, apply_doc=apply_doc, **options)
+        self._init_options(apply_doc, keep_tokens, dtype, scale)
+
+        assert isinstance(vector_size, int) and vector_size > 0, 'vector_size must be a positive integer.'
+        assert char_ngrams is None or 0 < char_ngrams[0] <= char_ngrams[1], \
+            'char_ngrams must be `None` or the minimum and maximum length of the n-grams.'
+
+        try:
+            import numpy as np
+            self.np = np
+        except ImportError:
+            log.error("To use embeddings please install numpy. "
+                      "See the docs at https://numpy.org/ for more information.")
+            raise
+
+        self.vector_size = vector_size
+        self.char_ngrams = char_ngrams
+        self.seed = seed
+
+    def _features(self, token: str) -> List[str]:
+        if self.char_ngrams is None:
+            return [token]
+
+        word = f"<{token}>"
+        min_n, max_n = self.char_ngrams
+        return [token] + [word[i:i + n] for n in range(min_n, max_n + 1) for i in range(len(word) - n + 1)]
+
+    def _vectors(self, tokens: List[str]) -> Any:
+        """Compute the vectors of a list of tokens, hashing the features of each distinct token once.
+
+        Args:
+            tokens (List[str]): Tokens to be embedded, at least one.
+
+        Returns: numpy.ndarray, matrix with shape `(len(tokens), vector_size)`.
+        """
+        np = self.np
+        distinct = {token: i for i, token in enumerate(dict.fromkeys(tokens))}
+        features = [self._features(token) for token in distinct]
+
+        rows = np.repeat(np.arange(len(features)), [len(f) for f in features])
+        hashes = np.fromiter((zlib.crc32(feature.encode('utf-8'), self.seed) for f in features for feature in f),
+                             dtype=np.uint32, count=len(rows))
+        # The lower bits choose the dimension and the highest bit the sign of the feature
+        signs = np.where(hashes >> 31, -1.0, 1.0)
+        vectors = np.bincount(rows * self.vector_size + hashes % self.vector_size, weights=signs,
+                              minlength=len(features) * self.vector_size)
+        vectors = vectors.reshape(len(features), self.vector_size).astype(np.float32)
+        if '' in distinct:
+            vectors[distinct['']] = 0
+
+        norm = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norm == 0, 1, norm)
+
+        return vectors[np.fromiter((distinct[token] for token in tokens), dtype=np.int64, count=len(tokens))]
@@ -1,22 +1,46 @@
 """Normalizer Module."""
 
+import os
 from string import punctuation
 from typing import (
+    Any,
+    Dict,
+    Iterable,
     Optional,
-    List
+    Sequence,
+    List,
+    Union
 )
 
-from nlpiper.core import Document
+from nlpiper.core.cache import (
+    SqliteCache,
+    TieredCache,
+    create_cache
+)
+from nlpiper.core.fingerprint import file_fingerprint, fingerprint
+from nlpiper.core.frequencies import SketchFrequencies, TokenFrequencies
+from nlpiper.core.registry import _hunspell_dictionary, registry
+from nlpiper.core.vocabulary import IdVocabulary, MappedVocabulary, Vocabulary
+from nlpiper.core.document import Document
 from nlpiper.transformers.base import (
+    BaseTokenNormalizer,
     BaseTransformer,
     TransformersType,
+    _cleaned,
+    _tokens,
+    _validate_document,
     add_step,
+    chain_types,
     validate
 )
 from nlpiper.logger import log
 
 __all__ = [
     "CaseTokens",
+    "CountTokens",
+    "EncodeTokens",
+    "FusedNormalizer",
+    "RemoveEmptyTokens",
     "RemovePunctuation",
     "RemoveStopWords",
     "VocabularyFilter",
@@ -24,8 +48,40 @@ __all__ = [
     "Stemmer"
 ]
 
+# Options which do not change the results of the transformers with a cache
+_CACHE_OPTIONS = ('cache_size', 'cache_policy', 'cache_path')
+
+
+def _bulk(backend: Any, method: str, tokens: Sequence[str]) -> Dict[str, Any]:
+    """Call a backend method for several tokens.
+
+    Uses the bulk version of the method, e.g. cyhunspell `bulk_suggest`, when the backend provides it.
+    """
+    if not tokens:
+        return {}
+
+    bulk = getattr(backend, f'bulk_{method}', None)
+    if bulk is not None:
+        return dict(bulk(list(tokens)))
+
+    func = getattr(backend, method)
+    return {token: func(token) for token in tokens}
+
 
-class CaseTokens(BaseTransformer):
+def _hunspell_fingerprint(language: str, hunspell_data_dir: Optional[str] = None) -> Optional[str]:
+    """Fingerprint of the Hunspell dictionary files of a language, `None` if they are not found."""
+    try:
+        path = _hunspell_dictionary(language, hunspell_data_dir)
+    except (ImportError, AttributeError):
+        return None
+
+    files = [path + '.aff', path + '.dic']
+    if not all(os.path.isfile(file) for file in files):
+        return None
+    return fingerprint([file_fingerprint(file) for file in files])
+
+
+class CaseTokens(BaseTokenNormalizer):
     """Uppercase or Lowercase tokens."""
 
     def __init__(self, mode='lower'):
@@ -40,50 +96,34 @@ class CaseTokens(BaseTransformer):
         super().__init__(mode=mode)
         self.mode = mode
 
-    @validate(TransformersType.NORMALIZERS)
-    @add_step
-    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
-        """Uppercase or Lowercase tokens.
+    def normalize(self, cleaned: str) -> Dict[str, Any]:
+        """Uppercase or Lowercase a token.
 
         Args:
-            doc (Document): Document to be normalized.
-            inplace (bool): if False will return a new doc object,
-                            otherwise will change the object passed as parameter.
+            cleaned (str): Token to be normalized.
 
-        Returns: Document
+        Returns: Dict[str, Any]
         """
-        d = doc if inplace else doc._deepcopy()
-
-        for token in d.tokens:
-            token.cleaned = getattr(token.cleaned, self.mode)()
+        return {'cleaned': getattr(cleaned, self.mode)()}
 
-        return None if inplace else d
 
-
-class RemovePunctuation(BaseTransformer):
+class RemovePunctuation(BaseTokenNormalizer):
     """Remove Punctuation."""
 
-    @validate(TransformersType.NORMALIZERS)
-    @add_step
-    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
-        """Remove punctuation.
+    _table = str.maketrans('', '', punctuation)
+
+    def normalize(self, cleaned: str) -> Dict[str, Any]:
+        """Remove punctuation from a token.
 
         Args:
-            doc (Document): Document to be normalized.
-            inplace (bool): if False will return a new doc object,
-                            otherwise will change the object passed as parameter.
+            cleaned (str): Token to be normalized.
 
-        Returns: Document
+        Returns: Dict[str, Any]
         """
-        d = doc if inplace else doc._deepcopy()
-
-        for token in d.tokens:
-            token.cleaned = token.cleaned.translate(str.maketrans('', '', punctuation))
-
-        return None if inplace else d
+        return {'cleaned': cleaned.translate(self._table)}
 
 
-class RemoveStopWords(BaseTransformer):
+class RemoveStopWords(BaseTokenNormalizer):
     """Remove Stop Words."""
 
     def __init__(self, language: str = "english", case_sensitive: bool = True):
@@ -100,82 +140,95 @@ class RemoveStopWords(BaseTransformer):
         super().__init__(language=language, case_sensitive=case_sensitive)
         self.case_sensitive = "__str__" if case_sensitive else "lower"
         try:
-            import nltk
-            nltk.download("stopwords")
-            self.stopwords = nltk.corpus.stopwords.words(language)
+            self.stopwords = self._acquire_resource('stopwords', language)
 
         except ImportError:
             log.error("Please install NLTK. "
                       "See the docs at https://www.nltk.org/install.html for more information.")
             raise
 
-    @validate(TransformersType.NORMALIZERS)
-    @add_step
-    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
-        """Remove Stop Words.
+    def normalize(self, cleaned: str) -> Dict[str, Any]:
+        """Remove a token if it is a stop word.
 
         Args:
-            doc (Document): Document to be normalized.
-            inplace (bool): if False will return a new doc object,
-                            otherwise will change the object passed as parameter.
+            cleaned (str): Token to be normalized.
 
-        Returns: Document
+        Returns: Dict[str, Any]
         """
-        d = doc if inplace else doc._deepcopy()
+        return {'cleaned': "" if getattr(cleaned, self.case_sensitive)() in self.stopwords else cleaned}
 
-        for token in d.tokens:
-            token.cleaned = "" if getattr(token.cleaned, self.case_sensitive)() in self.stopwords else token.cleaned
-
-        return None if inplace else d
+    def fingerprint(self) -> Optional[str]:
+        """Stable hash of the options and of the stop words, see `BaseTransformer.fingerprint`."""
+        return fingerprint(self.__class__.__name__, self.args, self.kwargs, self.stopwords)
 
 
-class VocabularyFilter(BaseTransformer):
+class VocabularyFilter(BaseTokenNormalizer):
     """Only allow tokens from a pre-defined vocabulary."""
 
-    def __init__(self, vocabulary: List[str], case_sensitive: bool = True):
+    def __init__(self, vocabulary: Union[List[str], Vocabulary, MappedVocabulary], case_sensitive: bool = True):
         """Only allow tokens from a pre-defined vocabulary.
 
         Only accept tokens that are in the vocabulary, otherwise the token will be replace by an empty string, `""`.
 
         Args:
-            vocabulary (str): List of tokens that define the vocabulary.
+            vocabulary (Union[List[str], Vocabulary, MappedVocabulary]): List of tokens that define the vocabulary,
+             or an already built `Vocabulary` or `MappedVocabulary`, which allows to share large vocabularies
+             between transformers and processes.
             case_sensitive (bool): When `True`, the detection of a token in the vocabulary will be case sensitive,
              e.g. `vocab = ['this']`, if `'This'` is a token, since 'T' is upper case and will not be considered as a
              token from the vocabulary and will be replaced by an empty string, `""`, otherwise, will be considered
             as in vocabulary and kept.
         """
         super().__init__(vocabulary=vocabulary, case_sensitive=case_sensitive)
-        self.vocab = vocabulary if case_sensitive else [token.lower() for token in vocabulary]
-        self.case_sensitive = "__str__" if case_sensitive else "lower"
+        if isinstance(vocabulary, (Vocabulary, MappedVocabulary)):
+            if vocabulary.case_sensitive != case_sensitive:
+                raise ValueError(f"Vocabulary case sensitivity ({vocabulary.case_sensitive}) does not match "
+                                 f"case_sensitive={case_sensitive}.")
+            self.vocab = vocabulary
+        else:
+            self.vocab = Vocabulary(vocabulary, case_sensitive=case_sensitive)
 
-    @validate(TransformersType.NORMALIZERS)
-    @add_step
-    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
-        """Remove Stop Words.
+    def __repr__(self) -> str:
+        # The vocabulary can not change, so the representation is built once and shared by the steps of all the
+        # documents
+        if self.__dict__.get('_repr') is None:
+            self._repr = super().__repr__()
+        return self._repr
 
-        Args:
-            doc (Document): Document to be normalized.
-            inplace (bool): if `False` will return a new doc object,
-                            otherwise will change the object passed as parameter.
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        state.pop('_repr', None)
+        return state
 
-        Returns: Document
-        """
-        d = doc if inplace else doc._deepcopy()
+    def normalize(self, cleaned: str) -> Dict[str, Any]:
+        """Remove a token if it is not in the vocabulary.
 
-        for token in d.tokens:
-            token.cleaned = "" if getattr(token.cleaned, self.case_sensitive)() not in self.vocab else token.cleaned
+        Args:
+            cleaned (str): Token to be normalized.
 
-        return None if inplace else d
+        Returns: Dict[str, Any]
+        """
+        return {'cleaned': "" if cleaned not in self.vocab else cleaned}
 
 
-class Stemmer(BaseTransformer):
+class Stemmer(BaseTokenNormalizer):
     """Stem tokens."""
 
-    def __init__(self, version: str = 'nltk', language: str = "english", *args, **kwargs):
+    # Hunspell objects and the in-memory caches are not thread safe
+    thread_safe = False
+
+    def __init__(self, version: str = 'nltk', language: str = "english", *args, cache_size: int = 0,
+                 cache_policy: str = 'lru', cache_path: Optional[str] = None, **kwargs):
         """Stem tokens.
 
         Stemmer currently supports two way to stem the tokens, using NLTK SnowballStemmer or using Hunspell.
 
+        Since the same words are stemmed over and over again, the stems can be memoised in a bounded cache
+        by token, which can also be persisted to disk between runs.
+
+        The distinct tokens of a document, or of a batch of documents when using `Compose.pipe`, are stemmed
+        at once, with the cyhunspell `bulk_stem` method if available.
+
         Args:
             version (str): Currently there are two stemmers available: `nltk` and `hunspell`.
             language (str): Available languages for `nltk`: "arabic", "danish", "dutch", "english", "finnish", "french",
@@ -183,13 +236,20 @@ class Stemmer(BaseTransformer):
              "swedish". (Default: `"english"`) For `hunspell`  by default the following languages are available:
              `'en_AU'`, `'en_CA'`, `'en_GB'`, `'en_NZ'`, `'en_US'`, `'en_ZA'`, however is possible to use other
              dictionaries, for this please check https://pypi.org/project/cyhunspell/
+            cache_size (int): Maximum number of stems kept in the cache, if `0` the stems are not cached.
+             (Default: `0`)
+            cache_policy (str): Cache eviction policy, `"lru"` (least recently used) or `"lfu"` (least frequently
+             used). (Default: `"lru"`)
+            cache_path (Optional[str]): File used to persist the cache, if the file exists the cached stems are
+             loaded from it, use `save_cache` to store them. (Default: `None`)
         """
-        super().__init__(version=version, language=language, *args, **kwargs)
+        options: Dict[str, Any] = {}
+        if cache_size:
+            options.update(cache_size=cache_size, cache_policy=cache_policy, cache_path=cache_path)
+        super().__init__(version=version, language=language, *args, **options, **kwargs)
         if version == 'nltk':
             try:
-                import nltk  # noqa: F401
-                from nltk.stem.snowball import SnowballStemmer
-                self.stemmer = SnowballStemmer(language=language, *args, **kwargs)
+                self.stemmer = self._acquire_resource('snowball', language, *args, **kwargs)
 
             except ImportError:
                 log.error("Please install NLTK. "
@@ -198,8 +258,7 @@ class Stemmer(BaseTransformer):
 
         elif version == 'hunspell':
             try:
-                from hunspell import Hunspell
-                self.stemmer = Hunspell(lang=language, *args, **kwargs)
+                self.stemmer = self._acquire_resource('hunspell', language, *args, **kwargs)
 
             except ImportError:
                 log.error("Please install cyhunspell. "
@@ -210,36 +269,120 @@ class Stemmer(BaseTransformer):
             raise ValueError(f"Currently {repr(version)} is not available."
                              f" You can opt by using 'nltk' or 'hunspell' to stem the tokens.")
 
-    @validate(TransformersType.NORMALIZERS)
-    @add_step
-    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
-        """Stem tokens.
+        self.cache = create_cache(cache_size, cache_policy) if cache_size else None
+        self.cache_path = cache_path
+        if self.cache is not None and cache_path is not None and os.path.exists(cache_path):
+            self.cache.load(cache_path, tag=self._cache_tag)
+
+    @property
+    def _cache_tag(self) -> str:
+        """Stemmer configuration, including the backend options, without the options which do not change stems."""
+        params = ', '.join(["%r" % a for a in self.args] +
+                           ["%s=%r" % (k, v) for k, v in self.kwargs.items() if k not in _CACHE_OPTIONS])
+        return "%s(%s)" % (self.__class__.__name__, params)
+
+    def fingerprint(self) -> Optional[str]:
+        """Stable hash of the options and of the NLTK version or the Hunspell dictionary files.
+
+        See `BaseTransformer.fingerprint`, the cache options are not included since they do not change the stems.
+        """
+        if self.kwargs['version'] == 'nltk':
+            import nltk
+            backend: Optional[str] = nltk.__version__
+        else:
+            backend = _hunspell_fingerprint(self.kwargs['language'], self.kwargs.get('hunspell_data_dir'))
+        return None if backend is None else fingerprint(self._cache_tag, backend)
+
+    def save_cache(self, path: Optional[str] = None) -> None:
+        """Persist the cached stems to disk.
 
         Args:
-            doc (Document): Document to be normalized.
-            inplace (bool): if False will return a new doc object,
-                            otherwise will change the object passed as parameter.
+            path (Optional[str]): File where the stems will be stored, by default uses `cache_path`.
+        """
+        path = path or self.cache_path
+        if self.cache is None or path is None:
+            raise RuntimeError("Stemmer needs a `cache_size` and a `cache_path` to save the cache.")
+        self.cache.save(path, tag=self._cache_tag)
+
+    def _stem_types(self, types: Iterable[str]) -> Dict[str, str]:
+        stems: Dict[str, str] = {}
+        misses = []
+        for cleaned in types:
+            stem = self.cache.get(cleaned) if self.cache is not None else None
+            if stem is None:
+                misses.append(cleaned)
+            else:
+                stems[cleaned] = stem
 
-        Returns: Document
+        # The Hunspell object may be shared with other transformers, e.g. a SpellCheck applied by another thread
+        with registry.lock(self.stemmer):
+            found = _bulk(self.stemmer, 'stem', misses)
+
+        for cleaned, stem in found.items():
+            # Hunspell returns a tuple with all the possible stems, which is empty for unknown words
+            if isinstance(stem, (tuple, list)):
+                stem = stem[0] if stem else ''
+            if isinstance(stem, bytes):
+                stem = stem.decode()
+
+            stems[cleaned] = stem
+            if self.cache is not None:
+                self.cache.put(cleaned, stem)
+
+        return stems
+
+    def normalize(self, cleaned: str) -> Dict[str, Any]:
+        """Stem a token.
+
+        Args:
+            cleaned (str): Token to be normalized.
+
+        Returns: Dict[str, Any]
         """
-        d = doc if inplace else doc._deepcopy()
+        return self.normalize_types([cleaned])[cleaned]
 
-        for token in d.tokens:
-            stem = self.stemmer.stem(token.cleaned)
-            stem = stem[0] if isinstance(stem, tuple) else stem
-            token.cleaned = stem if stem else token.cleaned
-            token.stem = stem if stem else token.cleaned
+    def normalize_types(self, types: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Stem a collection of distinct tokens at once.
 
-        return None if inplace else d
+        Args:
+            types (Iterable[str]): Distinct token `cleaned` values.
+
+        Returns: Dict[str, Dict[str, Any]]
+        """
+        out = {}
+        for cleaned, stem in self._stem_types(types).items():
+            stem = stem if stem else cleaned
+            out[cleaned] = {'cleaned': stem, 'stem': stem}
+        return out
 
 
-class SpellCheck(BaseTransformer):
+class SpellCheck(BaseTokenNormalizer):
     """Perform Spellcheck on tokens."""
 
-    def __init__(self, language: str = "en_GB", max_distance: Optional[int] = None, *args, **kwargs):
+    # Hunspell objects are not thread safe
+    thread_safe = False
+
+    def __init__(self, language: str = "en_GB", max_distance: Optional[int] = None, *args, backend: str = 'hunspell',
+                 index_path: Optional[str] = None, cache_size: int = 0, cache_policy: str = 'lru',
+                 cache_path: Optional[str] = None, **kwargs):
         """Perform Spellcheck on tokens.
 
-        Uses Hunspell spellchecker engine.
+        Uses Hunspell spellchecker engine by default. Alternatively, the `symspell` backend looks up the
+        corrections of the tokens which Hunspell finds misspelt in a symmetric delete index, built from the
+        Hunspell dictionary, with its stems expanded by its affixes, or loaded from `index_path`, which finds the
+        closest words within `max_distance` without requesting Hunspell suggestions. Both backends pick a word
+        with the lowest distance, however they may pick a different one: the `hunspell` backend only considers
+        the words suggested by Hunspell, which may include compound words that are not in the index, and takes
+        the first of them in case of tie, while the index considers every word of the dictionary and breaks ties
+        by the longest common prefix with the token.
+
+        Spell checking results can be cached by `(language, max_distance, token)`, in a bounded in-memory cache
+        which can be backed by a SQLite file, which keeps the results between runs. The results are stored in a
+        table of the options and of the Hunspell dictionary and symspell index files, see `fingerprint`, so
+        instances with other dictionaries do not share them.
+
+        The distinct tokens of a document, or of a batch of documents when using `Compose.pipe`, are checked
+        at once, and the suggestions are requested with the cyhunspell `bulk_suggest` method if available.
 
         Args:
             language (str): By default the following dictionaries are available: `'en_AU'`, `'en_CA'`, `'en_GB'`,
@@ -251,21 +394,43 @@ class SpellCheck(BaseTransformer):
               suggested words by Hunspell and calculate the levenshtein distance between the token and the suggestions,
               and will replace the token by the word with the lower distance if is also lower than the `max_distance`,
               otherwise will maintain the original token. Default(`None`)
+            backend (str): Spell checking backend, `"hunspell"` or `"symspell"`. Default(`"hunspell"`)
+            index_path (Optional[str]): Index saved with `SymSpellIndex.save` used by the `symspell` backend, if
+             `None` the index is built from the Hunspell dictionary of `language`. Default(`None`)
+            cache_size (int): Maximum number of results kept in memory, if `0` the results are not cached.
+             Default(`0`)
+            cache_policy (str): In-memory cache eviction policy, `"lru"` (least recently used) or `"lfu"` (least
+             frequently used). Default(`"lru"`)
+            cache_path (Optional[str]): SQLite file used as a second level cache, shared between runs and processes,
+             the results of each batch of tokens are committed at once.
+             Default(`None`)
             args: For further utilities check https://pypi.org/project/cyhunspell/
             kwargs: For further utilities check https://pypi.org/project/cyhunspell/
         """
-        super().__init__(language=language, max_distance=max_distance, *args, **kwargs)
+        if backend not in ('hunspell', 'symspell'):
+            raise ValueError(f"Currently {repr(backend)} is not available."
+                             f" You can opt by using 'hunspell' or 'symspell' to spell check the tokens.")
+
+        options: Dict[str, Any] = {'backend': backend, 'index_path': index_path} if backend != 'hunspell' else {}
+        if cache_size:
+            options.update(cache_size=cache_size, cache_policy=cache_policy, cache_path=cache_path)
+        super().__init__(language=language, max_distance=max_distance, *args, **options, **kwargs)
+        self.language = language
         self.max_distance = max_distance
+        self.backend = backend
         try:
-            from hunspell import Hunspell
-            self.h = Hunspell(lang=language, *args, **kwargs)
+            self.h = self._acquire_resource('hunspell', language, *args, **kwargs)
+            if backend == 'symspell' and max_distance:
+                self.index = self._acquire_resource('symspell', language, max_distance=max_distance,
+                                                    index_path=index_path,
+                                                    hunspell_data_dir=kwargs.get('hunspell_data_dir'))
 
         except ImportError:
             log.error("Please install cyhunspell. "
                       "See the docs at https://pypi.org/project/cyhunspell/ for more information.")
             raise
 
-        if max_distance:
+        if max_distance and backend == 'hunspell':
             try:
                 import nltk  # noqa: F401
                 from nltk.metrics.distance import edit_distance
@@ -276,10 +441,197 @@ class SpellCheck(BaseTransformer):
                           "See the docs at https://www.nltk.org/install.html for more information.")
                 raise
 
+        self.cache = None
+        if cache_size:
+            self.cache = TieredCache(create_cache(cache_size, cache_policy), self._disk_cache(cache_path))
+
+    def _disk_cache(self, cache_path: Optional[str]) -> Optional[SqliteCache]:
+        """On-disk cache, in a table of the fingerprint, so instances with other dictionaries do not share it."""
+        if cache_path is None:
+            return None
+
+        digest = self.fingerprint()
+        if digest is None:
+            log.warning("Spell checking results of %r are not stored in %s, its Hunspell dictionary files are not "
+                        "found", self, cache_path)
+            return None
+        return SqliteCache(cache_path, table=f'spellcheck_{digest[:32]}')
+
+    def fingerprint(self) -> Optional[str]:
+        """Stable hash of the options and of the Hunspell dictionary and symspell index files.
+
+        See `BaseTransformer.fingerprint`, the cache options are not included since they do not change the
+        corrections.
+        """
+        dictionary = _hunspell_fingerprint(self.language, self.kwargs.get('hunspell_data_dir'))
+        if dictionary is None:
+            return None
+
+        index_path = self.kwargs.get('index_path')
+        index = file_fingerprint(index_path) if index_path is not None else None
+        options = {k: v for k, v in self.kwargs.items() if k not in _CACHE_OPTIONS}
+        return fingerprint(self.__class__.__name__, self.args, options, dictionary, index)
+
+    def _closest(self, cleaned: str, suggestions: Sequence[str]) -> str:
+        if not suggestions:
+            return cleaned
+
+        distances = [self.edit_distance(cleaned, s) for s in suggestions]
+        min_distance = min(distances)
+
+        return suggestions[distances.index(min_distance)] if self.max_distance >= min_distance else cleaned
+
+    def _lookup(self, tokens: Sequence[str]) -> Dict[str, str]:
+        """Closest words of the index, with the ties broken by the index, see `SymSpellIndex.candidates`."""
+        return {token: self.index.lookup(token, self.max_distance) or token for token in tokens}
+
+    def _check_types(self, tokens: Sequence[str]) -> Dict[str, str]:
+        # The Hunspell object may be shared with other transformers, e.g. a Stemmer applied by another thread
+        with registry.lock(self.h):
+            correct = _bulk(self.h, 'spell', tokens)
+            wrong = [token for token in tokens if not correct[token]]
+            suggestions = _bulk(self.h, 'suggest', wrong) if self.max_distance and self.backend == 'hunspell' else {}
+
+        out = {token: token for token in tokens if correct[token]}
+        if not self.max_distance:
+            out.update((token, '') for token in wrong)
+        elif self.backend == 'symspell':
+            out.update(self._lookup(wrong))
+        else:
+            out.update((token, self._closest(token, suggestions[token])) for token in wrong)
+        return out
+
+    def _spell_types(self, types: Iterable[str]) -> Dict[str, str]:
+        if self.cache is None:
+            return self._check_types(list(types))
+
+        out: Dict[str, str] = {}
+        misses = []
+        for cleaned in types:
+            result = self.cache.get((self.language, self.max_distance, cleaned))
+            if result is None:
+                misses.append(cleaned)
+            else:
+                out[cleaned] = result
+
+        for cleaned, result in self._check_types(misses).items():
+            self.cache.put((self.language, self.max_distance, cleaned), result)
+            out[cleaned] = result
+        if misses:
+            # The results of each batch are committed at once, so other processes can use them
+            self.cache.flush()
+        return out
+
+    def warm_cache(self, tokens: Iterable[str]) -> None:
+        """Fill the cache with the spell checking results of a corpus.
+
+        Args:
+            tokens (Iterable[str]): Tokens to be spell checked, e.g. the cleaned tokens of a corpus.
+        """
+        if self.cache is None:
+            raise RuntimeError("SpellCheck needs a `cache_size` to warm the cache.")
+
+        misses = [token for token in set(tokens) if (self.language, self.max_distance, token) not in self.cache]
+        for token, result in self._check_types(misses).items():
+            self.cache.put((self.language, self.max_distance, token), result)
+        self.cache.flush()
+
+    def normalize(self, cleaned: str) -> Dict[str, Any]:
+        """Perform Spellcheck on a token.
+
+        Args:
+            cleaned (str): Token to be normalized.
+
+        Returns: Dict[str, Any]
+        """
+        return {'cleaned': self._spell_types([cleaned])[cleaned]}
+
+    def normalize_types(self, types: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Perform Spellcheck on a collection of distinct tokens at once.
+
+        Args:
+            types (Iterable[str]): Distinct token `cleaned` values.
+
+        Returns: Dict[str, Dict[str, Any]]
+        """
+        return {cleaned: {'cleaned': result} for cleaned, result in self._spell_types(types).items()}
+
+
+class FusedNormalizer(BaseTokenNormalizer):
+    """Apply a sequence of token normalizers in a single pass over the tokens."""
+
+    def __init__(self, normalizers: List[BaseTokenNormalizer]):
+        """Apply a sequence of token normalizers in a single pass over the tokens.
+
+        The normalizers are chained for each distinct token and each token is updated once with the final result,
+        instead of once per normalizer. The documents steps still register each of the normalizers, so documents
+        can be rolled back to any of them.
+
+        Args:
+            normalizers (List[BaseTokenNormalizer]): Token normalizers applied in order, fused normalizers are
+                flattened.
+        """
+        if not normalizers:
+            raise ValueError("FusedNormalizer requires at least one normalizer.")
+
+        flat: List[BaseTokenNormalizer] = []
+        for n in normalizers:
+            if not isinstance(n, BaseTokenNormalizer):
+                raise TypeError(f"{n!r} is not a token normalizer.")
+            flat.extend(n.normalizers if isinstance(n, FusedNormalizer) else [n])
+
+        super().__init__(flat)
+        self.normalizers: List[BaseTokenNormalizer] = flat
+        self.thread_safe = all(n.thread_safe for n in flat)
+
+    def _steps(self) -> List[str]:
+        return [step for n in self.normalizers for step in n._steps()]
+
+    def normalize(self, cleaned: str) -> Dict[str, Any]:
+        """Apply the sequence of normalizers to a token.
+
+        Args:
+            cleaned (str): Token to be normalized.
+
+        Returns: Dict[str, Any]
+        """
+        return self.normalize_types([cleaned])[cleaned]
+
+    def normalize_types(self, types: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Apply the sequence of normalizers to a collection of distinct tokens.
+
+        Args:
+            types (Iterable[str]): Distinct token `cleaned` values.
+
+        Returns: Dict[str, Dict[str, Any]]
+        """
+        return chain_types(types, self.normalizers)
+
+
+class RemoveEmptyTokens(BaseTransformer):
+    """Remove empty tokens."""
+
+    # Token positions are relative to the whole document
+    segmentable = False
+
+    def __init__(self, keep_positions: bool = False):
+        """Remove empty tokens.
+
+        Normalizers such as `RemoveStopWords`, `VocabularyFilter`, `SpellCheck` and `RemovePunctuation` replace
+        tokens by an empty string, `""`, instead of removing them. This transformer removes them in one pass, so
+        the following transformers, e.g. embeddings, do not process them.
+
+        Args:
+            keep_positions (bool): When `True`, the position of each remaining token in the list of tokens before
+                any removal is kept in the document attribute `token_positions`.
+        """
+        super().__init__(keep_positions=keep_positions)
+        self.keep_positions = keep_positions
+
     @validate(TransformersType.NORMALIZERS)
     @add_step
     def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
-        """
+        """Remove empty tokens.
 
         Args:
             doc (Document): Document to be normalized.
@@ -290,18 +642,143 @@ class SpellCheck(BaseTransformer):
         """
         d = doc if inplace else doc._deepcopy()
 
-        def suggest(cleaned: str):
-            if self.max_distance:
-                suggestions = self.h.suggest(cleaned)
+        tokens = _tokens(d)
+        kept = [i for i, token in enumerate(tokens) if token.cleaned]
 
-                distances = [self.edit_distance(cleaned, s) for s in suggestions]
-                min_distance = min(distances)
+        # Positions from previous removals are always updated, so they remain valid
+        positions = d.token_positions
+        if positions is not None:
+            d.token_positions = [positions[i] for i in kept]
+        elif self.keep_positions:
+            d.token_positions = kept
 
-                return suggestions[distances.index(min_distance)] if self.max_distance >= min_distance else cleaned
-            else:
-                return ''
+        if len(kept) < len(tokens):
+            # Tokens are kept inplace to avoid validating them again
+            tokens[:] = [tokens[i] for i in kept]
+
+        return None if inplace else d
+
+
+class EncodeTokens(BaseTransformer):
+    """Encode tokens as integer IDs."""
 
-        for token in d.tokens:
-            token.cleaned = token.cleaned if self.h.spell(token.cleaned) else suggest(token.cleaned)
+    # IDs are given in the order the tokens are found in the document
+    segmentable = False
+    # IDs depend on the vocabulary contents, which are not part of the repr
+    cacheable = False
+    # The vocabulary grows as the documents are encoded
+    thread_safe = False
+
+    def __init__(self, vocabulary: Optional[IdVocabulary] = None, grow: bool = True, keep_tokens: bool = True):
+        """Encode tokens as integer IDs.
+
+        The `cleaned` value of each token is converted to its ID in a vocabulary shared by the documents, and the
+        IDs are kept in the document attribute `token_ids` as an unsigned integers array, `array('I')`, which
+        takes 4 bytes per token instead of a string object per token. Use `decode` to recover the tokens.
+
+        To give the same IDs to the same tokens in different processes or runs, store the vocabulary with
+        `IdVocabulary.save` and create the transformer with the loaded vocabulary and `grow=False`. Documents can
+        only be rolled back through this step, or the pipeline created again from their steps, if the vocabulary
+        matched its file when they were encoded, see `IdVocabulary`.
+
+        Args:
+            vocabulary (Optional[IdVocabulary]): Vocabulary with the IDs of the tokens, by default a new vocabulary.
+            grow (bool): If True tokens not in the vocabulary are added to it, otherwise they get the ID `0`.
+            keep_tokens (bool): If False the tokens are removed from the document after being encoded, its `tokens`
+                are set to `None`, so token transformers can not be applied after this one.
+        """
+        self.vocabulary = vocabulary if vocabulary is not None else IdVocabulary()
+        # The repr shows the vocabulary used, not a new one
+        super().__init__(vocabulary=self.vocabulary, grow=grow, keep_tokens=keep_tokens)
+        self.grow = grow
+        self.keep_tokens = keep_tokens
+
+    @validate(TransformersType.NORMALIZERS)
+    @add_step
+    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
+        """Encode tokens as integer IDs.
+
+        Args:
+            doc (Document): Document to be encoded.
+            inplace (bool): if False will return a new doc object,
+                            otherwise will change the object passed as parameter.
+
+        Returns: Document
+        """
+        d = doc if inplace else doc._deepcopy()
+
+        d.token_ids = self.vocabulary.encode(_cleaned([d]), grow=self.grow)
+        if not self.keep_tokens:
+            d.tokens = None
 
         return None if inplace else d
+
+    def decode(self, doc: Document) -> List[str]:
+        """Recover the `cleaned` values of the tokens of an encoded document.
+
+        Args:
+            doc (Document): Document encoded by this transformer.
+
+        Returns: List[str], the tokens, unknown tokens are decoded as the vocabulary unknown token.
+        """
+        token_ids = getattr(doc, 'token_ids', None)
+        if token_ids is None:
+            raise RuntimeError("Document does not have token IDs, it was not encoded by `EncodeTokens`")
+        return self.vocabulary.decode(token_ids)
+
+
+class CountTokens(BaseTransformer):
+    """Count the frequencies of the tokens."""
+
+    # Counters are not thread safe
+    segmentable = False
+    # Documents must be counted every time they are processed
+    cacheable = False
+    thread_safe = False
+
+    def __init__(self, frequencies: Optional[Union[TokenFrequencies, SketchFrequencies]] = None):
+        """Count the frequencies of the tokens.
+
+        Counts the `cleaned` values of the tokens of the documents which go through the pipeline, the documents are
+        not changed, so the transformer is not added to their steps. With `Compose.pipe` the tokens of each batch
+        are counted at once. The counters of several workers can be merged with `frequencies.merge`, and
+        `frequencies.vocabulary` creates the vocabulary of a `VocabularyFilter` with the most common tokens.
+
+        Args:
+            frequencies (Optional[Union[TokenFrequencies, SketchFrequencies]]): Counter updated with the tokens,
+                by default a new exact counter, use `SketchFrequencies` to count with bounded memory.
+        """
+        super().__init__(frequencies=frequencies)
+        self.frequencies = frequencies if frequencies is not None else TokenFrequencies()
+
+    @validate(TransformersType.NORMALIZERS)
+    def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
+        """Count the frequencies of the tokens.
+
+        Args:
+            doc (Document): Document with the tokens to be counted.
+            inplace (bool): if False will return a new doc object,
+                            otherwise will change the object passed as parameter.
+
+        Returns: Document
+        """
+        self.frequencies.update(_cleaned([doc]))
+
+        return None if inplace else doc._deepcopy()
+
+    def batch(self, docs: List[Document], inplace: bool = False) -> Optional[List[Document]]:
+        """Count the frequencies of the tokens of a batch of documents at once.
+
+        Args:
+            docs (List[Document]): Documents with the tokens to be counted.
+            inplace (bool): if False will return new doc objects,
+                            otherwise will change the objects passed as parameter.
+
+        Returns: List[Document]
+        """
+        for doc in docs:
+            _validate_document(doc, TransformersType.NORMALIZERS)
+
+        self.frequencies.update(_cleaned(docs))
+
+        return None if inplace else [doc._deepcopy() for doc in docs]
@@ -5,6 +5,7 @@ from nlpiper.core.document import (
     Document,
     Token
 )
+from nlpiper.core.fingerprint import fingerprint
 from nlpiper.logger import log
 from nlpiper.transformers.base import (
     BaseTransformer,
@@ -49,6 +50,9 @@ class MosesTokenizer(BaseTransformer):
     Transformer to tokenize a Document using Sacremoses, https://github.com/alvations/sacremoses
     """
 
+    # The last token of a text, e.g. a final period, is split differently than in the middle of a text
+    segmentable = False
+
     def __init__(self, *args, **kwargs):
         """SacreMoses tokenizer.
 
@@ -91,6 +95,9 @@ class StanzaTokenizer(BaseTransformer):
     Transformer to tokenize a Document using stanza, https://github.com/stanfordnlp/stanza
     """
 
+    # The tokens, sentences and entities predicted by the model depend on the whole text
+    segmentable = False
+
     def __init__(self, language: str = 'en', processors='tokenize', *args, **kwargs):
         """Stanza tokenizer.
 
@@ -108,12 +115,17 @@ class StanzaTokenizer(BaseTransformer):
             self.p = Pipeline(lang=language, processors=processors, tokenize_pretokenized=False, *args,
                               **kwargs)
             self.processors = processors
+            self.version = stanza.__version__
 
         except ImportError:
             log.error("Please install Stanza. "
                       "See the docs at https://github.com/stanfordnlp/stanza for more information.")
             raise
 
+    def fingerprint(self) -> Optional[str]:
+        """Stable hash of the options and of the Stanza version, which determines the downloaded models."""
+        return fingerprint(self.__class__.__name__, self.args, self.kwargs, self.version)
+
     @validate(TransformersType.TOKENIZERS)
     @add_step
     def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
@@ -168,6 +180,10 @@ class SpacyTokenizer(BaseTransformer):
         >>> out.tokens
         [Token(original='NLPiper', cleaned='NLPiper', lemma='nlpiper', stem=None, ner='ORG', embedded=None, ner_iob='B', tag='NN'), Token(original='is', cleaned='is', lemma='be', stem=None, ner='', embedded=None, ner_iob='O', tag='VBZ'), Token(original='fun', cleaned='fun', lemma='fun', stem=None, ner='', embedded=None, ner_iob='O', tag='JJ'), Token(original='.', cleaned='.', lemma='.', stem=None, ner='', embedded=None, ner_iob='O', tag='.')]
     """  # noqa: E501
+
+    # The lemmas, entities and tags predicted by the model depend on the whole text
+    segmentable = False
+
     def __init__(self, name: str = 'en_core_web_sm', *args, **kwargs):
         """Spacy tokenizer.
 
@@ -178,12 +194,19 @@ class SpacyTokenizer(BaseTransformer):
         try:
             import spacy
             self.nlp = spacy.load(name, *args, **kwargs)
+            self.version = spacy.__version__
 
         except ImportError:
             log.error("Please install Spacy. "
                       "See the docs at https://spacy.io/usage for more information.")
             raise
 
+    def fingerprint(self) -> Optional[str]:
+        """Stable hash of the options and of the spaCy and model versions."""
+        meta = self.nlp.meta
+        return fingerprint(self.__class__.__name__, self.args, self.kwargs, self.version, meta.get('name'),
+                           meta.get('version'))
+
     @validate(TransformersType.TOKENIZERS)
     @add_step
     def __call__(self, doc: Document, inplace: bool = False) -> Optional[Document]:
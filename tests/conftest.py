@@ -13,3 +13,53 @@ def hide_available_pkg(request, monkeypatch):
         return import_orig(name, *args, **kwargs)
 
     monkeypatch.setattr(builtins, '__import__', mocked_import)
+
+
+class FakeHunspell:
+    """Minimal Hunspell replacement, used to test the transformers logic without cyhunspell."""
+
+    words = ('This', 'is', 'a', 'stop', 'Word', 'word', 'fast', 'test', 'text', 'tent')
+
+    def __init__(self, lang='en_GB', *args, **kwargs):
+        self.lang = lang
+        self.calls = {'spell': 0, 'suggest': 0, 'stem': 0}
+
+    def spell(self, word):
+        self.calls['spell'] += 1
+        return word in self.words
+
+    def suggest(self, word):
+        self.calls['suggest'] += 1
+        return tuple(w for w in self.words if w[0].lower() == word[:1].lower())
+
+    def stem(self, word):
+        self.calls['stem'] += 1
+        return ('fast',) if word.startswith('fast') else ()
+
+
+class FakeBulkHunspell(FakeHunspell):
+    """Hunspell replacement with the cyhunspell bulk methods."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls.update(bulk_suggest=0, bulk_stem=0)
+
+    def bulk_suggest(self, words):
+        self.calls['bulk_suggest'] += 1
+        return {word: self.suggest(word) for word in words}
+
+    def bulk_stem(self, words):
+        self.calls['bulk_stem'] += 1
+        return {word: self.stem(word) for word in words}
+
+
+@pytest.fixture(scope="function")
+def fake_hunspell(request, monkeypatch):
+    """Replace cyhunspell by FakeHunspell, or by FakeBulkHunspell if parametrized indirectly with `'bulk'`."""
+    import sys
+    import types
+
+    module = types.ModuleType('hunspell')
+    module.Hunspell = FakeBulkHunspell if getattr(request, 'param', None) == 'bulk' else FakeHunspell
+    monkeypatch.setitem(sys.modules, 'hunspell', module)
+    return module.Hunspell
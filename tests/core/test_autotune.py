@@ -0,0 +1,94 @@
+import pytest
+
+from nlpiper.core.autotune import BatchSizeTuner
+
+
+def run(tuner, cost, batches=50):
+    """Feed the tuner with the latency of a batch given by `cost(batch_size)`."""
+    sizes = []
+    for _ in range(batches):
+        sizes.append(tuner.batch_size)
+        tuner.record(tuner.batch_size, cost(tuner.batch_size))
+    return sizes
+
+
+class TestBatchSizeTuner:
+
+    def test_grows_while_throughput_improves(self):
+        # Fixed overhead per batch, the throughput improves with the batch size until 64 documents
+        tuner = BatchSizeTuner(min_size=1, max_size=1024, samples=2)
+        tuner.reset(8)
+
+        sizes = run(tuner, lambda size: 1 + size / 64 if size <= 64 else size / 8)
+
+        assert sizes[:8] == [8, 8, 16, 16, 32, 32, 64, 64]
+        assert tuner.converged
+        assert tuner.batch_size == 64
+        assert tuner.stats['best_size'] == 64
+
+    @pytest.mark.parametrize('start', [256, 1024])
+    def test_shrinks_when_starting_above_the_best_size(self, start):
+        # The throughput is the highest with 64 documents and drops with larger batches
+        tuner = BatchSizeTuner(min_size=1, max_size=1024, samples=2)
+        tuner.reset(start)
+
+        sizes = run(tuner, lambda size: 1 + size / 64 + (size / 64) ** 2)
+
+        assert sizes[:2] == [start, start]
+        assert sizes[-1] == 64
+        assert tuner.converged
+        assert tuner.stats['best_size'] == 64
+
+    def test_keeps_the_initial_size_when_it_is_the_best(self):
+        tuner = BatchSizeTuner(min_size=1, max_size=1024, samples=1)
+        tuner.reset(64)
+
+        sizes = run(tuner, lambda size: 1 + size / 64 + (size / 64) ** 2)
+
+        assert sizes[:4] == [64, 128, 32, 64]
+        assert tuner.batch_size == 64
+        assert tuner.converged
+
+    def test_max_size(self):
+        tuner = BatchSizeTuner(min_size=1, max_size=100, samples=1)
+        tuner.reset(32)
+
+        run(tuner, lambda size: 1.0)
+
+        assert tuner.batch_size == 100
+        assert tuner.converged
+
+    def test_latency_ceiling(self):
+        tuner = BatchSizeTuner(min_size=4, max_size=1024, max_latency=1.0, samples=1)
+        tuner.reset(4)
+
+        sizes = run(tuner, lambda size: 0.5 + size / 40)
+
+        # 32 documents take 1.3s, so the tuner goes back to 16 documents, the largest within the ceiling
+        assert 32 in sizes and 64 not in sizes
+        assert tuner.batch_size == 16
+        assert tuner.limit == 16
+        assert tuner.converged
+
+    def test_latency_ceiling_from_start(self):
+        tuner = BatchSizeTuner(min_size=2, max_size=1024, max_latency=1.0, samples=1)
+        tuner.reset(256)
+
+        run(tuner, lambda size: size / 20)
+
+        assert tuner.batch_size <= 20
+        assert tuner.batch_size >= 2
+
+    def test_partial_batches_are_ignored(self):
+        tuner = BatchSizeTuner(samples=1)
+        tuner.reset(16)
+
+        tuner.record(3, 100.0)
+
+        assert tuner.batch_size == 16
+        assert tuner.best_size is None
+
+    @pytest.mark.parametrize('inputs', [{'min_size': 0}, {'min_size': 10, 'max_size': 5}, {'samples': 0}])
+    def test_invalid_input(self, inputs):
+        with pytest.raises(ValueError):
+            BatchSizeTuner(**inputs)
@@ -0,0 +1,216 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from nlpiper.core.cache import (
+    DocumentCache,
+    LFUCache,
+    LRUCache,
+    SqliteCache,
+    create_cache
+)
+from nlpiper.core.document import Document
+from nlpiper.transformers.tokenizers import BasicTokenizer
+
+
+class TestLRUCache:
+
+    def test_get_and_put(self):
+        cache = LRUCache(2)
+
+        assert cache.get('a') is None
+        cache.put('a', 1)
+        assert cache.get('a') == 1
+        assert 'a' in cache
+        assert cache.stats == {'hits': 1, 'misses': 1, 'evictions': 0, 'hit_ratio': 0.5, 'size': 1, 'maxsize': 2}
+
+    def test_evict_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert 'c' in cache
+        assert cache.evictions == 1
+        assert len(cache) == 2
+
+    def test_clear(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.get('a')
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.hit_ratio == 0.0
+
+
+class TestLFUCache:
+
+    def test_evict_least_frequently_used(self):
+        cache = LFUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.get('a')
+        cache.get('b')
+        cache.put('c', 3)
+
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert 'c' in cache
+
+        # Ties are broken by evicting the least recently used entry
+        cache.get('c')
+        cache.put('d', 4)
+        assert 'a' in cache
+        assert 'c' not in cache
+        assert cache.evictions == 2
+
+    def test_update_value(self):
+        cache = LFUCache(2)
+        cache.put('a', 1)
+        cache.put('a', 2)
+
+        assert cache.get('a') == 2
+        assert len(cache) == 1
+
+
+class TestCachePersistence:
+
+    @pytest.mark.parametrize('policy', ['lru', 'lfu'])
+    def test_save_and_load(self, policy, tmpdir):
+        path = str(tmpdir.join('cache.pkl'))
+        cache = create_cache(10, policy)
+        cache.put('a', 1)
+        cache.put(('b', 1), 'c')
+        cache.save(path, tag='tag')
+
+        out = create_cache(10, policy)
+        out.load(path, tag='tag')
+        assert dict(out.items()) == dict(cache.items())
+
+        other = create_cache(10, policy)
+        other.load(path, tag='other')
+        assert len(other) == 0
+
+    def test_invalid_policy(self):
+        with pytest.raises(ValueError):
+            create_cache(10, 'random')
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            LRUCache(0)
+
+
+class TestDocumentCache:
+
+    def test_get_and_put(self):
+        cache = DocumentCache(2)
+        key = cache.key("Compose([BasicTokenizer()])", 'some text')
+        doc = BasicTokenizer()(Document('some text'))
+
+        assert cache.get(key) is None
+        cache.put(key, doc)
+        out = cache.get(key)
+
+        assert out == doc
+        assert out is not doc and cache.get(key) is not out
+        assert key in cache and len(cache) == 1
+        stats = cache.stats
+        assert (stats['hits'], stats['misses'], stats['hit_ratio']) == (2, 1, 2 / 3)
+        assert stats['bytes_read'] == 2 * stats['bytes_written'] > 0
+        assert stats['memory']['bytes'] == stats['bytes_written']
+
+    def test_key(self):
+        key = DocumentCache.key("Compose([BasicTokenizer()])", 'text')
+
+        assert key == DocumentCache.key("Compose([BasicTokenizer()])", 'text')
+        assert key != DocumentCache.key("Compose([BasicTokenizer()])", 'text ')
+        assert key != DocumentCache.key("Compose([CaseTokens(mode='lower')])", 'text')
+
+    def test_disk(self, tmpdir):
+        path = str(tmpdir.join('documents.db'))
+        cache = DocumentCache(1, path=path)
+        cache.put('a', Document('a'))
+        cache.put('b', Document('b'))
+        cache.flush()
+
+        out = DocumentCache(1, path=path)
+
+        assert out.get('a') == Document('a')
+        assert out.stats['disk']['hits'] == 1
+        assert len(out) == 2
+
+        out.clear()
+        assert len(out) == 0 and out.stats['bytes_read'] == 0
+
+
+class TestSqliteCache:
+
+    def test_get_and_put(self, tmpdir):
+        cache = SqliteCache(str(tmpdir.join('cache.db')))
+
+        assert cache.get('a') is None
+        cache.put('a', [1])
+
+        assert cache.get('a') == [1]
+        assert cache.stats == {'hits': 1, 'misses': 1, 'evictions': 0, 'hit_ratio': 0.5, 'size': 1, 'maxsize': None}
+
+    def test_concurrent_counters(self, tmpdir):
+        cache = SqliteCache(str(tmpdir.join('cache.db')))
+        cache.put('a', 1)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: cache.get('a' if i % 2 else 'b'), range(400)))
+
+        assert (cache.hits, cache.misses) == (200, 200)
+
+    def test_connections_sharing_file(self, tmpdir):
+        path = str(tmpdir.join('cache.db'))
+        first = SqliteCache(path, timeout=1)
+        second = SqliteCache(path, timeout=1)
+
+        # Pending writes do not lock the file for the other connection
+        first.put('a', 1)
+        second.put('b', 2)
+        second.flush()
+        assert first.get('a') == 1 and first.get('b') == 2
+
+        first.flush()
+        assert second.get('a') == 1
+        assert len(first) == len(second) == 2
+
+        first.close()
+        second.close()
+        del first, second
+
+    def test_threads_writing_to_shared_file(self, tmpdir):
+        path = str(tmpdir.join('cache.db'))
+        caches = [SqliteCache(path, commit_every=10, timeout=5) for _ in range(4)]
+
+        def write(i):
+            for j in range(50):
+                caches[i].put((i, j), j)
+            caches[i].flush()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(write, range(4)))
+
+        assert len(SqliteCache(path)) == 200
+        assert all(cache.get((3, 49)) == 49 for cache in caches)
+
+    def test_pickle(self, tmpdir):
+        import pickle
+
+        cache = SqliteCache(str(tmpdir.join('cache.db')), table='entries')
+        cache.put('a', 1)
+
+        out = pickle.loads(pickle.dumps(cache))
+        out.put('b', 2)
+        out.flush()
+
+        assert repr(out) == repr(cache)
+        assert cache.get('b') == 2 and out.get('a') == 1
@@ -1,6 +1,8 @@
 import pytest
 
 from nlpiper.transformers import cleaners, normalizers, tokenizers
+from nlpiper.transformers.base import BaseTransformer
+from nlpiper.core.autotune import BatchSizeTuner
 from nlpiper.core.composition import Compose
 from nlpiper.core.document import (
     Document,
@@ -8,6 +10,34 @@ from nlpiper.core.document import (
 )
 
 
+class BatchRecorder(BaseTransformer):
+    """Transformer which records the lengths of the documents of each batch."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def __call__(self, doc, inplace=False):
+        return None if inplace else doc._deepcopy()
+
+    def batch(self, docs, inplace=False):
+        self.batches.append([len(d.cleaned) for d in docs])
+        return super().batch(docs, inplace)
+
+
+class Opaque(BaseTransformer):
+    """Transformer with an option which can not be fingerprinted."""
+
+    def __call__(self, doc, inplace=False):
+        return None if inplace else doc._deepcopy()
+
+
+class NotThreadSafe(Opaque):
+    """Transformer which can only be applied by one thread at a time."""
+
+    thread_safe = False
+
+
 class TestCompose:
 
     @pytest.mark.parametrize('inputs,results', [
@@ -141,3 +171,402 @@ class TestCompose:
         assert len(doc.steps) == len(pipe.transformers)
         assert len(out.steps) == len(doc.steps) - steps
         assert out.steps == doc.steps[:-steps]
+
+    @pytest.mark.parametrize('batch_size', [1, 2, 10])
+    @pytest.mark.parametrize('inplace', [False, True])
+    def test_pipe(self, batch_size, inplace):
+        texts = ['Basic Test 1.', 'Another test, 2', '', 'TEST test']
+        pipe = Compose([
+            cleaners.CleanNumber(),
+            tokenizers.BasicTokenizer(),
+            normalizers.CaseTokens(),
+            normalizers.RemovePunctuation()
+        ])
+
+        expected = [pipe(Document(text)) for text in texts]
+        docs = [Document(text) for text in texts]
+
+        out = list(pipe.pipe(docs, batch_size=batch_size, inplace=inplace))
+
+        assert [d.tokens for d in out] == [d.tokens for d in expected]
+        assert [d.steps for d in out] == [d.steps for d in expected]
+        assert all(d is o for d, o in zip(docs, out)) == inplace
+
+    def test_pipe_invalid_batch_size(self):
+        with pytest.raises(ValueError):
+            list(Compose([tokenizers.BasicTokenizer()]).pipe([Document('test')], batch_size=0))
+
+    @pytest.mark.parametrize('inplace', [False, True])
+    def test_pipe_length_buckets(self, inplace):
+        texts = ['a' * n for n in [5, 1, 9, 3, 7, 2, 8]]
+        recorder = BatchRecorder()
+        pipe = Compose([recorder, tokenizers.BasicTokenizer()])
+        docs = [Document(text) for text in texts]
+
+        out = list(pipe.pipe(docs, batch_size=2, window=4, inplace=inplace))
+
+        # Each window is sorted by length and the output keeps the input order
+        assert recorder.batches == [[1, 3], [5, 9], [2, 7], [8]]
+        assert [d.cleaned for d in out] == texts
+        assert [d.tokens for d in out] == [pipe(Document(text)).tokens for text in texts]
+        assert all(d is o for d, o in zip(docs, out)) == inplace
+
+    def test_pipe_max_latency(self):
+        recorder = BatchRecorder()
+
+        out = list(Compose([recorder]).pipe((Document(text) for text in ['a', 'bb', 'ccc']), batch_size=2,
+                                            window=2, max_latency=0))
+
+        assert recorder.batches == [[1], [2], [3]]
+        assert [d.cleaned for d in out] == ['a', 'bb', 'ccc']
+
+    def test_pipe_max_latency_with_stalled_source(self):
+        import threading
+        import time
+
+        recorder = BatchRecorder()
+        released = threading.Event()
+
+        def source():
+            yield Document('a')
+            released.wait(5)
+            yield Document('bb')
+
+        out = Compose([recorder]).pipe(source(), batch_size=10, max_latency=0.05)
+
+        # The partial batch is processed while the source waits for its next document
+        start = time.monotonic()
+        assert next(out).cleaned == 'a'
+        assert time.monotonic() - start < 2
+        released.set()
+        assert [d.cleaned for d in out] == ['bb']
+        assert recorder.batches == [[1], [2]]
+
+    def test_pipe_max_latency_source_error(self):
+        def source():
+            yield Document('a')
+            raise KeyError('source')
+
+        with pytest.raises(KeyError):
+            list(Compose([BatchRecorder()]).pipe(source(), batch_size=10, max_latency=1))
+
+    def test_pipe_stats(self):
+        pipe = Compose([tokenizers.BasicTokenizer()])
+
+        list(pipe.pipe((Document('test') for _ in range(10)), batch_size=4))
+        stats = pipe.stats
+
+        assert stats['docs'] == 10
+        assert stats['batches'] == 3
+        assert stats['batch_size'] == 4
+        assert stats['docs_per_second'] > 0
+        assert 0 < stats['mean_batch_seconds'] <= stats['max_batch_seconds']
+        assert stats['autotune'] is None
+
+    def test_pipe_autotune(self):
+        recorder = BatchRecorder()
+        tuner = BatchSizeTuner(min_size=2, max_size=8, samples=1, tolerance=-1)
+        pipe = Compose([recorder, tokenizers.BasicTokenizer()])
+        texts = [f"test {i}" for i in range(30)]
+
+        out = list(pipe.pipe((Document(text) for text in texts), batch_size=2, autotune=tuner))
+
+        # A negative tolerance accepts any throughput, so the batch size grows until the maximum
+        assert [len(batch) for batch in recorder.batches] == [2, 4, 8, 8, 8]
+        assert [d.cleaned for d in out] == texts
+        assert pipe.stats['autotune']['batch_size'] == 8
+        assert pipe.stats['batch_size'] == 8
+
+    @pytest.mark.parametrize('workers', [1, [2, 1, 3, 1]])
+    @pytest.mark.parametrize('window', [None, 4])
+    def test_pipe_workers(self, workers, window):
+        texts = [f"Test {'a' * (i % 5)} number {i}." for i in range(25)]
+        pipe = Compose([
+            cleaners.CleanNumber(),
+            tokenizers.BasicTokenizer(),
+            normalizers.CaseTokens(),
+            normalizers.RemovePunctuation()
+        ])
+
+        out = list(pipe.pipe((Document(text) for text in texts), batch_size=2, window=window, workers=workers))
+
+        expected = [pipe(Document(text)) for text in texts]
+        assert [d.tokens for d in out] == [d.tokens for d in expected]
+        assert [d.steps for d in out] == [d.steps for d in expected]
+        assert pipe.stats['docs'] == 25
+
+    def test_pipe_stage_workers(self):
+        pipe = Compose([
+            tokenizers.BasicTokenizer(),
+            normalizers.CaseTokens(),
+            normalizers.RemovePunctuation(),
+            BatchRecorder()
+        ])
+
+        # The fused normalizers run with the largest number of workers among them
+        assert pipe._stage_workers([1, 2, 4, 1]) == [1, 4, 1]
+        assert Compose(pipe.transformers, fuse=False)._stage_workers([1, 2, 4, 1]) == [1, 2, 4, 1]
+        with pytest.raises(ValueError):
+            list(pipe.pipe([Document('test')], workers=[1, 2]))
+
+    def test_pipe_workers_of_transformers_not_thread_safe(self):
+        pipe = Compose([tokenizers.BasicTokenizer(), normalizers.CaseTokens(), normalizers.Stemmer(),
+                        normalizers.EncodeTokens()])
+
+        assert pipe._stage_workers([4, 1, 1, 1]) == [4, 1, 1]
+        # The fused stage is not thread safe if any of its normalizers is not
+        with pytest.raises(ValueError):
+            pipe._stage_workers([1, 2, 1, 1])
+        with pytest.raises(ValueError):
+            list(pipe.pipe([Document('test')], workers=[1, 1, 1, 2]))
+
+    def test_pipe_stages_sharing_resource(self, fake_hunspell, monkeypatch):
+        import threading
+        import time
+
+        active, overlaps = [], []
+        guard = threading.Lock()
+
+        def tracked(method):
+            def call(self, word):
+                with guard:
+                    active.append(word)
+                    overlaps.append(len(active))
+                time.sleep(0.001)
+                with guard:
+                    active.remove(word)
+                return method(self, word)
+            return call
+
+        monkeypatch.setattr(fake_hunspell, 'stem', tracked(fake_hunspell.stem))
+        monkeypatch.setattr(fake_hunspell, 'spell', tracked(fake_hunspell.spell))
+        stemmer = normalizers.Stemmer(version='hunspell', language='fake_shared')
+        spell_check = normalizers.SpellCheck(language='fake_shared')
+        assert stemmer.stemmer is spell_check.h
+
+        # Each stage runs in its own thread, the shared Hunspell object is used by one of them at a time
+        pipe = Compose([tokenizers.BasicTokenizer(), stemmer, spell_check], fuse=False)
+        docs = [Document(f'fast test word{i} stop{i}') for i in range(20)]
+        out = list(pipe.pipe(docs, batch_size=2, workers=1))
+
+        assert len(out) == 20
+        assert max(overlaps) == 1
+
+    def test_pipe_invalid_window(self):
+        with pytest.raises(ValueError):
+            list(Compose([tokenizers.BasicTokenizer()]).pipe([Document('test')], batch_size=4, window=2))
+
+    @pytest.mark.parametrize('fuse', [True, False])
+    def test_fuse_normalizers(self, fuse):
+        pipe = Compose([
+            tokenizers.BasicTokenizer(),
+            normalizers.CaseTokens(),
+            normalizers.RemovePunctuation()
+        ], fuse=fuse)
+
+        doc = pipe(Document('Basic Test, 1.'))
+
+        assert [t.cleaned for t in doc.tokens] == ['basic', 'test', '1']
+        assert doc.steps == ['BasicTokenizer()', "CaseTokens(mode='lower')", 'RemovePunctuation()']
+        assert repr(pipe) == "Compose([BasicTokenizer(), CaseTokens(mode='lower'), RemovePunctuation()])"
+        assert isinstance(pipe._stages()[1], normalizers.FusedNormalizer) == fuse
+
+        # Stages are rebuilt when the transformers change
+        pipe.transformers.append(normalizers.CaseTokens(mode='upper'))
+        assert [t.cleaned for t in pipe(Document('Basic Test, 1.')).tokens] == ['BASIC', 'TEST', '1']
+
+    @pytest.mark.parametrize('segment_size,workers', [(1, 1), (10, 2), (40, 4), (1000, 2)])
+    @pytest.mark.parametrize('tokenize', [False, True])
+    def test_call_segmented(self, segment_size, workers, tokenize):
+        text = "The 1st sentence, here.\nThe 2nd one!\n\nA new paragraph... with more words."
+        pipe = Compose([
+            cleaners.CleanNumber(),
+            tokenizers.BasicTokenizer(),
+            normalizers.CaseTokens(),
+            normalizers.RemovePunctuation(),
+            normalizers.RemoveEmptyTokens(),
+            normalizers.CaseTokens(mode='upper')
+        ])
+        doc = Document(text)
+        if tokenize:
+            doc = Compose(pipe.transformers[:2])(doc)
+            pipe = Compose(pipe.transformers[2:])
+
+        expected = pipe(doc)
+        out = pipe(doc, segment_size=segment_size, workers=workers)
+
+        assert out == expected
+        assert out.steps == expected.steps
+        assert doc != out
+
+    def test_call_segmented_inplace(self):
+        pipe = Compose([tokenizers.BasicTokenizer(), normalizers.CaseTokens()])
+        doc = Document('Some Words To Split')
+
+        assert pipe(doc, inplace=True, segment_size=5, workers=2) is None
+        assert [t.cleaned for t in doc.tokens] == ['some', 'words', 'to', 'split']
+        assert doc.steps == ['BasicTokenizer()', "CaseTokens(mode='lower')"]
+
+    def test_call_segmented_invalid_workers(self):
+        with pytest.raises(ValueError):
+            Compose([tokenizers.BasicTokenizer()])(Document('test'), segment_size=2, workers=0)
+
+    def test_call_segmented_transformers_not_thread_safe(self):
+        pipe = Compose([tokenizers.BasicTokenizer(), NotThreadSafe(), normalizers.CaseTokens()])
+
+        with pytest.raises(ValueError):
+            pipe(Document('Some Words To Split'), segment_size=5, workers=2)
+        out = pipe(Document('Some Words To Split'), segment_size=5, workers=1)
+        assert [t.cleaned for t in out.tokens] == ['some', 'words', 'to', 'split']
+
+    @pytest.mark.parametrize('tokenizer,package', [
+        ('BasicTokenizer', None),
+        ('MosesTokenizer', 'sacremoses'),
+        ('StanzaTokenizer', 'stanza'),
+        ('SpacyTokenizer', 'spacy'),
+    ])
+    def test_call_segmented_same_tokens(self, tokenizer, package):
+        if package is not None:
+            pytest.importorskip(package)
+        # Segments are split after sentence punctuation, which some tokenizers treat differently at the end of a text
+        text = ' '.join(["Hello world. is here,", "Mr. Smith said \"yes\".", "It costs 3.5 U.S. dollars, e.g. today?",
+                         "(Fine) don't worry!"] * 20)
+        pipe = Compose([getattr(tokenizers, tokenizer)()])
+
+        expected = pipe(Document(text))
+        out = pipe(Document(text), segment_size=40, workers=2)
+
+        assert out.tokens == expected.tokens
+
+    @pytest.mark.parametrize('inplace', [False, True])
+    def test_cache(self, inplace):
+        pipe = Compose([cleaners.CleanNumber(), tokenizers.BasicTokenizer(), normalizers.CaseTokens()],
+                       cache_size=10)
+        expected = Compose(pipe.transformers)(Document('Text 1 and Text 2'))
+
+        results = []
+        for _ in range(3):
+            doc = Document('Text 1 and Text 2')
+            out = pipe(doc, inplace=inplace)
+            results.append(doc if inplace else out)
+
+        assert all(out == expected for out in results)
+        assert results[1] is not results[2]
+        assert pipe.cache.stats['hits'] == 2
+        assert pipe.cache.stats['misses'] == 1
+
+    def test_cache_invalidated_by_pipeline_changes(self):
+        pipe = Compose([tokenizers.BasicTokenizer(), normalizers.CaseTokens()], cache_size=10)
+        pipe(Document('Some Text'))
+
+        pipe.transformers[1] = normalizers.CaseTokens(mode='upper')
+        out = pipe(Document('Some Text'))
+
+        assert [t.cleaned for t in out.tokens] == ['SOME', 'TEXT']
+        assert pipe.cache.stats['hits'] == 0
+
+    def test_cache_on_disk(self, tmpdir):
+        path = str(tmpdir.join('documents.db'))
+        transformers = [tokenizers.BasicTokenizer(), normalizers.CaseTokens()]
+        pipe = Compose(transformers, cache_size=10, cache_path=path)
+        expected = pipe(Document('Some Text'))
+        pipe.cache.flush()
+
+        other = Compose(transformers, cache_size=10, cache_path=path)
+
+        assert other(Document('Some Text')) == expected
+        assert other.cache.stats['disk']['hits'] == 1
+
+    def test_cache_on_disk_shared_by_pipelines(self, tmpdir):
+        path = str(tmpdir.join('documents.db'))
+        transformers = [tokenizers.BasicTokenizer(), normalizers.CaseTokens()]
+        first = Compose(transformers, cache_size=10, cache_path=path)
+        second = Compose(transformers, cache_size=10, cache_path=path)
+
+        # Each document is committed, so the pipelines write to the same file and use the documents of the other
+        expected = first(Document('Some Text'))
+        second(Document('Other Text'))
+        assert first(Document('Other Text')).tokens == second(Document('Other Text')).tokens
+        assert second(Document('Some Text')) == expected
+
+        assert first.cache.stats['disk']['hits'] == second.cache.stats['disk']['hits'] == 1
+        assert len(first.cache) == len(second.cache) == 2
+
+    @pytest.mark.parametrize('copy', ['pickle', 'deepcopy'])
+    def test_cache_on_disk_copied(self, copy, tmpdir):
+        import copy as copy_module
+        import pickle
+
+        pipe = Compose([tokenizers.BasicTokenizer(), normalizers.CaseTokens()], cache_size=10,
+                       cache_path=str(tmpdir.join('documents.db')))
+        expected = pipe(Document('Some Text'))
+
+        # Copies open the file again
+        out = pickle.loads(pickle.dumps(pipe)) if copy == 'pickle' else copy_module.deepcopy(pipe)
+
+        assert out.cache.cache.disk._connection is not pipe.cache.cache.disk._connection
+        assert out(Document('Some Text')) == expected
+        out(Document('Other Text'))
+        assert len(pipe.cache) == 2
+
+    def test_cache_skipped(self):
+        counter = normalizers.CountTokens()
+        pipe = Compose([tokenizers.BasicTokenizer(), counter], cache_size=10)
+        pipe(Document('some text'))
+        pipe(Document('some text'))
+
+        assert counter.frequencies['some'] == 2
+        assert len(pipe.cache) == 0
+
+        # Documents already processed are not cached
+        pipe = Compose([normalizers.CaseTokens()], cache_size=10)
+        pipe(tokenizers.BasicTokenizer()(Document('Some Text')))
+        assert len(pipe.cache) == 0
+
+        # Transformers using objects whose contents are unknown can not be fingerprinted
+        pipe = Compose([tokenizers.BasicTokenizer(), Opaque(object())], cache_size=10)
+        pipe(Document('some text'))
+        assert len(pipe.cache) == 0
+
+    def test_cache_invalidated_by_file_changes(self, tmpdir):
+        from nlpiper.core.vocabulary import MappedVocabulary
+
+        db, vocabulary = str(tmpdir.join('documents.db')), str(tmpdir.join('vocabulary.bin'))
+        MappedVocabulary.build(['some'], vocabulary)
+        pipe = Compose([tokenizers.BasicTokenizer(), normalizers.VocabularyFilter(MappedVocabulary(vocabulary))],
+                       cache_size=10, cache_path=db)
+        assert [t.cleaned for t in pipe(Document('some text')).tokens] == ['some', '']
+        pipe.cache.flush()
+
+        # Same repr, different vocabulary contents
+        MappedVocabulary.build(['text'], vocabulary)
+        other = Compose([tokenizers.BasicTokenizer(), normalizers.VocabularyFilter(MappedVocabulary(vocabulary))],
+                        cache_size=10, cache_path=db)
+
+        assert repr(other) == repr(pipe)
+        assert [t.cleaned for t in other(Document('some text')).tokens] == ['', 'text']
+        assert other.cache.stats['disk']['hits'] == 0
+
+    def test_cache_with_embeddings(self, tmpdir):
+        np = pytest.importorskip('numpy')
+        gensim = pytest.importorskip('gensim')
+        from nlpiper.transformers.embeddings import GensimEmbeddings
+
+        def pipeline(vectors):
+            kv = gensim.models.KeyedVectors(2)
+            kv.add_vectors(['some', 'text'], np.array(vectors, dtype=np.float32))
+            return Compose([tokenizers.BasicTokenizer(), GensimEmbeddings(kv)], cache_size=10,
+                           cache_path=str(tmpdir.join('documents.db')))
+
+        pipe = pipeline([[1, 2], [3, 4]])
+        pipe(Document('some text'))
+        pipe.cache.flush()
+
+        # The keyed vectors are fingerprinted by their contents, not by the address in their repr
+        same = pipeline([[1, 2], [3, 4]])
+        assert same(Document('some text')).embedded.tolist() == [2, 3]
+        assert same.cache.stats['disk']['hits'] == 1
+
+        other = pipeline([[1, 2], [5, 6]])
+        assert other(Document('some text')).embedded.tolist() == [3, 4]
+        assert other.cache.stats['disk']['hits'] == 0
@@ -64,3 +64,54 @@ class TestDocument:
         with pytest.raises(ModuleNotFoundError):
             doc = Document('Test')
             doc.embedded = 1
+
+    def test_tokens_embedding_invalid_array(self):
+        pytest.importorskip('numpy')
+
+        d = create_document()
+
+        with pytest.raises(ValidationError):
+            d.tokens_embedded = 1
+
+    def test_deepcopy_tokens_embedding_views(self):
+        pytest.importorskip('numpy')
+        import numpy as np
+
+        d = create_document()
+        d.tokens_embedded = np.random.rand(2, 3)
+        for token, row in zip(d.tokens, d.tokens_embedded):
+            token.embedded = row
+
+        out = d._deepcopy()
+
+        assert out.tokens_embedded is not d.tokens_embedded
+        assert np.array_equal(out.tokens_embedded, d.tokens_embedded)
+        for token, row in zip(out.tokens, out.tokens_embedded):
+            assert token.embedded.base is out.tokens_embedded
+            assert np.array_equal(token.embedded, row)
+
+        # Token embeddings which are not rows of the matrix are copied
+        d.tokens[0].embedded = np.random.rand(3)
+        out = d._deepcopy()
+        assert not np.may_share_memory(out.tokens[0].embedded, out.tokens_embedded)
+        assert np.array_equal(out.tokens[0].embedded, d.tokens[0].embedded)
+
+    def test_pickle_tokens_embedding_views(self):
+        pytest.importorskip('numpy')
+        import pickle
+
+        import numpy as np
+
+        d = create_document()
+        d.tokens_embedded = np.random.rand(2, 300)
+        for token, row in zip(d.tokens, d.tokens_embedded):
+            token.embedded = row
+
+        data = pickle.dumps(d)
+        out = pickle.loads(data)
+
+        # The tokens embeddings are only pickled once, in the matrix
+        assert len(data) < 2 * d.tokens_embedded.nbytes
+        assert np.array_equal(out.tokens_embedded, d.tokens_embedded)
+        assert [token.original for token in out.tokens] == [token.original for token in d.tokens]
+        assert all(np.shares_memory(token.embedded, out.tokens_embedded) for token in out.tokens)
@@ -0,0 +1,88 @@
+import random
+import threading
+import time
+
+import pytest
+
+from nlpiper.core.document import Document
+from nlpiper.core.executor import PipelinedExecutor
+
+
+def append(value, delay=0.0):
+    def stage(batch):
+        if delay:
+            time.sleep(random.random() * delay)
+        for doc in batch:
+            doc.cleaned += value
+    return stage
+
+
+def items(n, size=2):
+    return ((i, [Document(str(i)) for _ in range(size)]) for i in range(n))
+
+
+class TestPipelinedExecutor:
+
+    @pytest.mark.parametrize('workers', [[1, 1, 1], [3, 1, 2]])
+    def test_run(self, workers):
+        executor = PipelinedExecutor([append('a'), append('b', delay=0.005), append('c')], workers)
+
+        out = list(executor.run(items(20)))
+
+        assert [payload for payload, _, _ in out] == list(range(20))
+        assert all(doc.cleaned == f"{i}abc" for i, batch, _ in out for doc in batch)
+        assert all(seconds >= 0 for _, _, seconds in out)
+
+    def test_stages_run_concurrently(self):
+        threads = set()
+
+        def stage(batch):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.001)
+
+        list(PipelinedExecutor([stage, stage], [2, 1]).run(items(10)))
+
+        assert len(threads) == 3
+        assert threading.current_thread().name not in threads
+
+    def test_backpressure(self):
+        read = []
+
+        def source():
+            for i in range(100):
+                read.append(i)
+                yield i, [Document('test')]
+
+        out = PipelinedExecutor([append('a')], [1], queue_size=1).run(source())
+        next(out)
+        time.sleep(0.1)
+
+        # Only the batches in the queues, and being processed, are read ahead of the consumer
+        assert len(read) <= 6
+        out.close()
+
+    def test_error(self):
+        def fail(batch):
+            if batch[0].cleaned == '3':
+                raise ValueError('test')
+
+        out = []
+        with pytest.raises(ValueError, match='test'):
+            for payload, _, _ in PipelinedExecutor([append(''), fail], [2, 2]).run(items(10)):
+                out.append(payload)
+
+        # The batches processed before the error are yielded in order
+        assert out == list(range(len(out))) and len(out) <= 3
+
+    def test_error_in_source(self):
+        def source():
+            yield 0, [Document('test')]
+            raise RuntimeError('source')
+
+        with pytest.raises(RuntimeError, match='source'):
+            list(PipelinedExecutor([append('a')], [1]).run(source()))
+
+    @pytest.mark.parametrize('workers,queue_size', [([1], 2), ([1, 0], 2), ([1, 1], 0)])
+    def test_invalid_input(self, workers, queue_size):
+        with pytest.raises(ValueError):
+            PipelinedExecutor([append('a'), append('b')], workers, queue_size)
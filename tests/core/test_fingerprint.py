@@ -0,0 +1,74 @@
+import pytest
+
+from nlpiper.core.fingerprint import file_fingerprint, fingerprint
+from nlpiper.core.vocabulary import IdVocabulary, MappedVocabulary, Vocabulary
+from nlpiper.transformers import normalizers, tokenizers
+
+
+class TestFingerprint:
+
+    def test_stable_values(self):
+        values = ['text', 1, 2.5, None, True, b'bytes', [1, (2, 3)], {'a': [1]}]
+
+        assert fingerprint(*values) == fingerprint(*values)
+        assert len(fingerprint(*values)) == 64
+
+    @pytest.mark.parametrize('a,b', [
+        ('1', 1),
+        ([1, 2], (1, 2)),
+        ([[1], 2], [1, [2]]),
+        ({'a': 1}, {'a': 2}),
+        ('a', 'b'),
+    ])
+    def test_different_values(self, a, b):
+        assert fingerprint(a) != fingerprint(b)
+
+    def test_unknown_objects(self):
+        assert fingerprint('text', object()) is None
+        assert fingerprint([1, {'a': object()}]) is None
+
+    def test_arrays(self):
+        np = pytest.importorskip('numpy')
+        array = np.arange(6, dtype=np.float32).reshape(2, 3)
+
+        assert fingerprint(array) == fingerprint(array.copy())
+        assert fingerprint(array.T) == fingerprint(np.ascontiguousarray(array.T))
+        assert fingerprint(array) != fingerprint(array.reshape(3, 2))
+        assert fingerprint(array) != fingerprint(array.astype(np.float64))
+        assert fingerprint(array) != fingerprint(array + 1)
+
+    def test_files(self, tmpdir):
+        p = tmpdir.join('file.txt')
+        p.write('contents')
+        expected = file_fingerprint(str(p))
+
+        assert file_fingerprint(str(p)) == expected
+        p.write('other contents')
+        assert file_fingerprint(str(p)) != expected
+
+    def test_vocabularies(self, tmpdir):
+        path = str(tmpdir.join('vocabulary.bin'))
+
+        assert fingerprint(Vocabulary(['a', 'b'])) == fingerprint(Vocabulary(['b', 'a']))
+        assert fingerprint(Vocabulary(['a'])) != fingerprint(Vocabulary(['a'], case_sensitive=False))
+        assert fingerprint(IdVocabulary(['a', 'b'])) != fingerprint(IdVocabulary(['b', 'a']))
+
+        vocabulary = MappedVocabulary.build(['a', 'b'], path)
+        expected = fingerprint(vocabulary)
+        MappedVocabulary.build(['a', 'c'], path)
+        assert fingerprint(MappedVocabulary(path)) != expected
+
+    def test_transformers(self):
+        assert normalizers.CaseTokens().fingerprint() == normalizers.CaseTokens().fingerprint()
+        assert normalizers.CaseTokens().fingerprint() != normalizers.CaseTokens('upper').fingerprint()
+        assert tokenizers.BasicTokenizer().fingerprint() != normalizers.RemovePunctuation().fingerprint()
+
+        # Options which do not change the stems are not part of the fingerprint
+        assert normalizers.Stemmer(cache_size=10).fingerprint() == normalizers.Stemmer().fingerprint()
+        assert normalizers.Stemmer().fingerprint() != normalizers.Stemmer(language='dutch').fingerprint()
+
+        # Fused normalizers are fingerprinted by the normalizers they apply
+        case, punctuation = normalizers.CaseTokens(), normalizers.RemovePunctuation()
+        fused = normalizers.FusedNormalizer([case, punctuation]).fingerprint()
+        assert fused == normalizers.FusedNormalizer([normalizers.CaseTokens(), punctuation]).fingerprint()
+        assert fused != normalizers.FusedNormalizer([punctuation, case]).fingerprint()
@@ -0,0 +1,118 @@
+import pickle
+from collections import Counter
+
+import pytest
+
+from nlpiper.core.frequencies import (
+    SketchFrequencies,
+    TokenFrequencies
+)
+
+TOKENS = ['the', 'cat', 'sat', 'on', 'the', 'mat', '', 'the', 'cat']
+
+
+class TestTokenFrequencies:
+
+    def test_update(self):
+        freqs = TokenFrequencies()
+
+        freqs.update(TOKENS)
+
+        assert freqs['the'] == 3
+        assert freqs['dog'] == 0
+        assert '' not in freqs
+        assert len(freqs) == 5
+        assert freqs.total == 8
+        assert freqs.most_common(2) == [('the', 3), ('cat', 2)]
+
+    def test_merge(self):
+        freqs = TokenFrequencies()
+        freqs.update(TOKENS[:4])
+        other = TokenFrequencies({'the': 1, 'dog': 2})
+
+        out = freqs.merge(other)
+
+        assert out is freqs
+        assert dict(freqs.most_common()) == {'the': 2, 'cat': 1, 'sat': 1, 'on': 1, 'dog': 2}
+
+    @pytest.mark.parametrize('top_n,min_count,result', [
+        (None, 1, {'the', 'cat', 'sat', 'on', 'mat'}),
+        (2, 1, {'the', 'cat'}),
+        (None, 2, {'the', 'cat'}),
+        (1, 2, {'the'}),
+    ])
+    def test_vocabulary(self, top_n, min_count, result):
+        freqs = TokenFrequencies()
+        freqs.update(TOKENS)
+
+        assert set(freqs.vocabulary(top_n=top_n, min_count=min_count)) == result
+
+    def test_vocabulary_case_insensitive(self):
+        vocab = TokenFrequencies({'The': 2}).vocabulary(case_sensitive=False)
+
+        assert 'the' in vocab and 'THE' in vocab
+
+
+class TestSketchFrequencies:
+    pytest.importorskip('numpy')
+
+    def test_update(self):
+        freqs = SketchFrequencies(width=1024, depth=4, top_k=3)
+
+        freqs.update(TOKENS)
+
+        assert freqs['the'] == 3
+        assert freqs['cat'] == 2
+        assert freqs.total == 8
+        assert freqs.most_common(2) == [('the', 3), ('cat', 2)]
+        assert len(freqs.most_common()) == 3
+
+    def test_estimates_are_upper_bounds(self):
+        import random
+
+        rnd = random.Random(0)
+        tokens = [f"token{int(rnd.paretovariate(1))}" for _ in range(20_000)]
+        expected = Counter(tokens)
+        freqs = SketchFrequencies(width=256, depth=4, top_k=10)
+        for start in range(0, len(tokens), 1000):
+            freqs.update(tokens[start:start + 1000])
+
+        assert all(expected[token] <= freqs[token] <= expected[token] + len(tokens) * 2.72 / 256
+                   for token in expected)
+        assert [token for token, _ in freqs.most_common(5)] == [token for token, _ in expected.most_common(5)]
+
+    def test_bounded_top_k(self):
+        freqs = SketchFrequencies(width=1024, top_k=2)
+
+        for i in range(100):
+            freqs.update([f"token{i}"] * (i % 3 + 1) + ['common'] * 5)
+
+        assert len(freqs._top) <= 4
+        assert freqs.most_common(1) == [('common', 500)]
+
+    def test_merge(self):
+        freqs, other = SketchFrequencies(width=1024), SketchFrequencies(width=1024)
+        freqs.update(TOKENS[:4])
+        other.update(TOKENS[4:])
+
+        out = freqs.merge(other)
+
+        assert out is freqs
+        assert freqs['the'] == 3
+        assert set(freqs.vocabulary(min_count=2)) == {'the', 'cat'}
+
+        with pytest.raises(ValueError):
+            freqs.merge(SketchFrequencies(width=1024, seed=1))
+
+    def test_pickle(self):
+        freqs = SketchFrequencies(width=1024)
+        freqs.update(TOKENS)
+
+        out = pickle.loads(pickle.dumps(freqs))
+
+        assert out.most_common() == freqs.most_common()
+        assert out['the'] == 3
+
+    def test_invalid_input(self):
+        with pytest.raises(ValueError):
+            SketchFrequencies(width=0)
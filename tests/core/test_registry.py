@@ -0,0 +1,138 @@
+import copy
+import gc
+import pickle
+
+import pytest
+
+from nlpiper.core.registry import ResourceRegistry, registry
+from nlpiper.transformers.normalizers import Stemmer
+
+
+class Resource:
+
+    def __init__(self, language, *args, **kwargs):
+        self.language = language
+        self.args = args
+        self.kwargs = kwargs
+
+
+def create_registry():
+    r = ResourceRegistry()
+    r.register('dummy', Resource)
+    return r
+
+
+class TestResourceRegistry:
+
+    def test_acquire_shared_resource(self):
+        r = create_registry()
+
+        first = r.acquire('dummy', 'en')
+        second = r.acquire('dummy', 'en')
+
+        assert first is second
+        assert r.references('dummy', 'en') == 2
+        assert len(r) == 1
+
+    @pytest.mark.parametrize('args,kwargs', [
+        ((), {'size': 1}),
+        ((['a', 'b'],), {}),
+        ((), {'options': {'a': [1, 2]}}),
+    ])
+    def test_acquire_different_options(self, args, kwargs):
+        r = create_registry()
+
+        first = r.acquire('dummy', 'en')
+        second = r.acquire('dummy', 'en', *args, **kwargs)
+        third = r.acquire('dummy', 'pt', *args, **kwargs)
+
+        assert first is not second
+        assert second is not third
+        assert second is r.acquire('dummy', 'en', *args, **kwargs)
+        assert len(r) == 3
+
+    def test_release_resource(self):
+        r = create_registry()
+
+        r.acquire('dummy', 'en')
+        r.acquire('dummy', 'en')
+
+        r.release('dummy', 'en')
+        assert r.references('dummy', 'en') == 1
+        assert len(r) == 1
+
+        r.release('dummy', 'en')
+        assert r.references('dummy', 'en') == 0
+        assert len(r) == 0
+
+        # Releasing a resource without references is ignored
+        r.release('dummy', 'en')
+        assert len(r) == 0
+
+    def test_preload_resource(self):
+        r = create_registry()
+
+        resource = r.preload('dummy', 'en')
+        assert r.references('dummy', 'en') == 0
+        assert r.key('dummy', 'en') in r
+
+        assert r.acquire('dummy', 'en') is resource
+        r.release('dummy', 'en')
+        assert r.key('dummy', 'en') in r
+
+        r.clear()
+        assert len(r) == 0
+
+    def test_resource_lock(self):
+        r = create_registry()
+
+        resource = r.acquire('dummy', 'en')
+        other = r.acquire('dummy', 'pt')
+
+        assert r.lock(resource) is r.lock(r.acquire('dummy', 'en'))
+        assert r.lock(resource) is not r.lock(other)
+
+        r.release('dummy', 'pt')
+        assert id(other) not in r._locks
+
+    def test_unregistered_backend(self):
+        r = create_registry()
+
+        with pytest.raises(ValueError):
+            r.acquire('random', 'en')
+
+
+class TestSharedTransformersResources:
+
+    def test_stemmer_shares_backend(self):
+        pytest.importorskip('nltk')
+
+        first = Stemmer(version='nltk', language='english')
+        second = Stemmer(version='nltk', language='english')
+        other = Stemmer(version='nltk', language='portuguese')
+
+        assert first.stemmer is second.stemmer
+        assert first.stemmer is not other.stemmer
+
+    @pytest.mark.parametrize('copy_transformer', [copy.copy, copy.deepcopy, lambda t: pickle.loads(pickle.dumps(t))])
+    def test_copies_hold_their_own_references(self, copy_transformer):
+        pytest.importorskip('nltk')
+
+        key = ('snowball', 'dutch')
+        first = Stemmer(version='nltk', language='dutch')
+        out = copy_transformer(first)
+
+        assert out.stemmer is first.stemmer
+        assert registry.references(*key) == 2
+
+        del first
+        gc.collect()
+        assert registry.references(*key) == 1
+        assert out.stemmer is registry.acquire(*key)
+        assert out.normalize('lopen')['stem'] == 'lop'
+
+        registry.release(*key)
+        del out
+        gc.collect()
+        assert registry.references(*key) == 0
+        assert registry.key(*key) not in registry
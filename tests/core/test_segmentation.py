@@ -0,0 +1,59 @@
+import pytest
+
+from nlpiper.core.segmentation import (
+    split_text,
+    split_tokens
+)
+
+TEXT = ("The first sentence. The second sentence!\nA new line here.\n\n"
+        "A new paragraph, with a long_word_without_spaces and more words.")
+
+
+class TestSplitText:
+
+    @pytest.mark.parametrize('size', [1, 5, 10, 20, 50, 1000])
+    def test_join_gives_back_the_text(self, size):
+        segments = split_text(TEXT, size)
+
+        assert ''.join(segments) == TEXT
+        assert all(segments)
+
+    @pytest.mark.parametrize('size', [10, 20, 50])
+    def test_never_splits_tokens(self, size):
+        segments = split_text(TEXT, size)
+
+        assert [t for s in segments for t in s.split()] == TEXT.split()
+        # Only segments without whitespace within the size are extended to the next whitespace
+        assert all(len(s) <= size or not any(c.isspace() for c in s[:size]) for s in segments)
+
+    def test_preferred_boundaries(self):
+        assert split_text("one two.\n\nthree four", 15) == ["one two.\n\n", "three four"]
+        assert split_text("one. two\nthree four", 15) == ["one. two\n", "three four"]
+        assert split_text("one two. three four", 15) == ["one two. ", "three four"]
+        assert split_text("one two three four", 15) == ["one two three ", "four"]
+
+    def test_whitespace_kept_whole(self):
+        assert split_text("one two   three", 5) == ["one ", "two   ", "three"]
+
+    @pytest.mark.parametrize('text', ['', 'short'])
+    def test_short_text(self, text):
+        assert split_text(text, 10) == [text]
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            split_text(TEXT, 0)
+
+
+class TestSplitTokens:
+
+    @pytest.mark.parametrize('tokens,size,segments', [
+        ([1, 2, 3, 4, 5], 2, [[1, 2], [3, 4], [5]]),
+        ([1, 2, 3], 3, [[1, 2, 3]]),
+        ([], 2, [[]]),
+    ])
+    def test_split_tokens(self, tokens, size, segments):
+        assert split_tokens(tokens, size) == segments
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            split_tokens([1, 2], -1)
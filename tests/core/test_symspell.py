@@ -0,0 +1,144 @@
+import random
+import string
+
+import pytest
+
+from nlpiper.core.symspell import (
+    SymSpellIndex,
+    bounded_edit_distance
+)
+
+WORDS = ['this', 'is', 'a', 'stop', 'word', 'test', 'text', 'tent', 'ward']
+
+
+class TestBoundedEditDistance:
+
+    def test_same_distance_as_nltk(self):
+        pytest.importorskip('nltk')
+        from nltk.metrics.distance import edit_distance
+
+        rnd = random.Random(0)
+        for _ in range(500):
+            source = ''.join(rnd.choices(string.ascii_lowercase[:4], k=rnd.randint(0, 6)))
+            target = ''.join(rnd.choices(string.ascii_lowercase[:4], k=rnd.randint(0, 6)))
+            distance = edit_distance(source, target)
+
+            assert bounded_edit_distance(source, target, 10) == distance
+            assert bounded_edit_distance(source, target, 2) == min(distance, 3)
+
+    @pytest.mark.parametrize('source,target,max_distance,result', [
+        ('test', 'test', 0, 0),
+        ('test', 'tent', 0, 1),
+        ('test', 'tests', 1, 1),
+        ('test', 'testing', 2, 3),
+        ('', 'ab', 2, 2),
+    ])
+    def test_bounded_distance(self, source, target, max_distance, result):
+        assert bounded_edit_distance(source, target, max_distance) == result
+
+
+class TestSymSpellIndex:
+
+    @pytest.mark.parametrize('token,max_distance,result', [
+        ('test', 1, 'test'),
+        ('tesx', 1, 'test'),
+        ('tesx', 0, None),
+        ('wxrd', 1, 'word'),
+        ('tet', 1, 'test'),
+        ('xyz', 2, None),
+        ('stoop', 2, 'stop'),
+    ])
+    def test_lookup(self, token, max_distance, result):
+        index = SymSpellIndex(WORDS, max_distance=2)
+
+        assert index.lookup(token, max_distance) == result
+
+    def test_lookup_tie_breaking(self):
+        # 'tet' is at distance 1 of 'test', 'text' and 'tent', the first word of the dictionary is chosen
+        assert SymSpellIndex(['text', 'test', 'tent']).lookup('tet') == 'text'
+        assert SymSpellIndex(['tent', 'test', 'text']).lookup('tet') == 'tent'
+
+    def test_lookup_tie_breaking_common_prefix(self):
+        # 'car' is at distance 1 of 'bar' and 'cat', 'cat' keeps its first characters
+        assert SymSpellIndex(['bar', 'cat']).lookup('car') == 'cat'
+        assert SymSpellIndex(['bar', 'cat']).candidates('car') == ['cat', 'bar']
+
+    def test_candidates(self):
+        index = SymSpellIndex(['text', 'test', 'tent', 'stop'])
+
+        assert index.candidates('tet') == ['text', 'test', 'tent']
+        assert index.candidates('tesx') == ['test']
+        assert index.candidates('test') == ['test']
+        assert index.candidates('xyz', 1) == []
+
+    def test_lookup_larger_than_index_distance(self):
+        with pytest.raises(ValueError):
+            SymSpellIndex(WORDS, max_distance=1).lookup('test', 2)
+
+    def test_from_hunspell(self, tmpdir):
+        dic = tmpdir.join('xx_XX.dic')
+        dic.write('3\nthis/S\nword/MS\ttesting\ntest\n')
+        tmpdir.join('xx_XX.aff').write('SET UTF-8\n')
+
+        index = SymSpellIndex.from_hunspell(str(dic), max_distance=1)
+
+        assert index.words == ['this', 'word', 'test']
+        assert 'word' in index
+        assert len(index) == 3
+
+    def test_from_hunspell_expands_affixes(self, tmpdir):
+        tmpdir.join('xx_XX.aff').write(
+            "SET UTF-8\n"
+            "NEEDAFFIX X\n"
+            "\n"
+            "PFX U Y 1\n"
+            "PFX U 0 un .\n"
+            "\n"
+            "SFX S Y 3\n"
+            "SFX S y ies [^aeiou]y\n"
+            "SFX S 0 s [aeiou]y\n"
+            "SFX S 0 s [^y]\n"
+            "\n"
+            "SFX D N 1\n"
+            "SFX D 0 ed/S .\n"
+        )
+        tmpdir.join('xx_XX.dic').write("4\nfly/S\nboy/S\ndo/UD\nlock/USX\n")
+
+        index = SymSpellIndex.from_hunspell(str(tmpdir.join('xx_XX.dic')), max_distance=1)
+
+        # Stems first, a stem which needs an affix is not a word, the suffixes and prefixes are combined only if
+        # both allow it
+        assert index.words == ['fly', 'boy', 'do', 'flies', 'boys', 'doed', 'undo', 'locks', 'unlock', 'unlocks']
+        assert index.lookup('fliez') == 'flies'
+
+    @pytest.mark.parametrize('header,flags', [('FLAG long\n', 'SaUb'), ('FLAG num\n', '10,20'),
+                                              ('AF 1\nAF SU\n', '1')])
+    def test_from_hunspell_flag_formats(self, header, flags, tmpdir):
+        suffix, prefix = {'FLAG long\n': ('Sa', 'Ub'), 'FLAG num\n': ('10', '20')}.get(header, ('S', 'U'))
+        tmpdir.join('xx_XX.aff').write(f"SET UTF-8\n{header}"
+                                       f"SFX {suffix} Y 1\nSFX {suffix} 0 s .\n"
+                                       f"PFX {prefix} N 1\nPFX {prefix} 0 re .\n")
+        tmpdir.join('xx_XX.dic').write(f"1\ntest/{flags}\n")
+
+        index = SymSpellIndex.from_hunspell(str(tmpdir.join('xx_XX.dic')), max_distance=1)
+
+        assert index.words == ['test', 'tests', 'retest']
+
+    def test_save_and_load(self, tmpdir):
+        path = str(tmpdir.join('index.pkl'))
+        index = SymSpellIndex(WORDS, max_distance=1)
+        index.save(path)
+
+        out = SymSpellIndex.load(path)
+
+        assert out.words == index.words
+        assert out.lookup('tesx') == 'test'
+
+    def test_load_invalid_file(self, tmpdir):
+        import pickle
+
+        p = tmpdir.join('index.pkl')
+        p.write_binary(pickle.dumps(['test']))
+
+        with pytest.raises(ValueError):
+            SymSpellIndex.load(str(p))
@@ -0,0 +1,126 @@
+import math
+
+import pytest
+
+from nlpiper.core.document import Document
+from nlpiper.core.vectorizer import Vectorizer
+from nlpiper.transformers.tokenizers import BasicTokenizer
+
+TEXTS = ['the cat sat on the mat', 'the dog', '', 'a cat and a dog']
+
+
+def create_docs(texts=TEXTS):
+    tokenizer = BasicTokenizer()
+    return [tokenizer(Document(text)) for text in texts]
+
+
+def dense(matrix):
+    rows = [[0.0] * matrix.shape[1] for _ in range(matrix.shape[0])]
+    for i in range(matrix.shape[0]):
+        for j in range(matrix.indptr[i], matrix.indptr[i + 1]):
+            rows[i][matrix.indices[j]] = float(matrix.data[j])
+    return rows
+
+
+class TestVectorizer:
+    pytest.importorskip('numpy')
+
+    def test_counts(self):
+        v = Vectorizer().fit(create_docs())
+
+        out = v.transform(create_docs())
+
+        assert v.tokens == ['the', 'cat', 'sat', 'on', 'mat', 'dog', 'a', 'and']
+        assert out.shape == (4, 8)
+        assert list(out.indptr) == [0, 5, 7, 7, 11]
+        assert dense(out)[0] == [2, 1, 1, 1, 1, 0, 0, 0]
+        assert dense(out)[3] == [0, 1, 0, 0, 0, 1, 2, 1]
+        assert list(v.document_frequencies) == [2, 2, 1, 1, 1, 2, 1, 1]
+        assert v.n_docs == 4
+
+    def test_streaming_fit(self):
+        docs = create_docs(TEXTS * 3)
+
+        v = Vectorizer(idf=True).fit(docs, batch_size=1)
+        expected = Vectorizer(idf=True).fit(docs, batch_size=len(docs))
+
+        assert v.tokens == expected.tokens
+        assert list(v.document_frequencies) == list(expected.document_frequencies)
+        assert dense(v.transform(docs)) == dense(expected.transform(docs))
+
+        # Fitting again replaces the fitted state
+        assert v.fit(create_docs(['dog'])).tokens == ['dog']
+        assert v.n_docs == 1
+
+    def test_fit_keeps_initial_vocabulary(self):
+        v = Vectorizer(vocabulary=['a', 'b'])
+
+        v.fit(create_docs(['b c c']))
+        assert v.vocabulary == {'a': 0, 'b': 1, 'c': 2}
+        assert list(v.document_frequencies) == [0, 1, 1]
+
+        # Fitting again resets the vocabulary to the initial tokens
+        v.fit(create_docs(['d']))
+        assert v.vocabulary == {'a': 0, 'b': 1, 'd': 2}
+        assert list(v.document_frequencies) == [0, 0, 1]
+
+    def test_unknown_and_empty_tokens(self):
+        v = Vectorizer(vocabulary=['dog', 'cat'])
+        docs = create_docs(['cat bird cat'])
+        docs[0].tokens[1].cleaned = ''
+
+        out = v.transform(docs)
+
+        assert dense(out) == [[0, 2]]
+        assert v.fit_transform(docs).shape == (1, 2)
+        assert v.tokens == ['dog', 'cat']
+
+    @pytest.mark.parametrize('norm', [None, 'l2'])
+    def test_tfidf(self, norm):
+        v = Vectorizer(idf=True, norm=norm).fit(create_docs())
+
+        out = dense(v.transform(create_docs(['the cat the'])))[0]
+
+        the = 2 * (math.log(5 / 3) + 1)
+        cat = math.log(5 / 3) + 1
+        scale = math.sqrt(the ** 2 + cat ** 2) if norm else 1
+        assert out[0] == pytest.approx(the / scale, rel=1e-6)
+        assert out[1] == pytest.approx(cat / scale, rel=1e-6)
+        assert sum(out) == pytest.approx(out[0] + out[1])
+
+    def test_same_as_scipy(self):
+        sparse = pytest.importorskip('scipy.sparse')
+
+        out = Vectorizer().fit_transform(create_docs())
+        matrix = sparse.csr_matrix((out.data, out.indices, out.indptr), shape=out.shape)
+
+        assert matrix.toarray().tolist() == dense(out)
+
+    def test_save_and_load(self, tmpdir):
+        path = str(tmpdir.join('vectorizer.pkl'))
+        v = Vectorizer(idf=True).fit(create_docs())
+        v.save(path)
+
+        out = Vectorizer.load(path)
+
+        assert repr(out) == "Vectorizer(<8 tokens>, idf=True, norm=None)"
+        assert dense(out.transform(create_docs())) == dense(v.transform(create_docs()))
+        # The vocabulary keeps growing after being loaded
+        assert len(out.partial_fit(create_docs(['bird']))) == 9
+
+    def test_load_invalid_file(self, tmpdir):
+        import pickle
+
+        p = tmpdir.join('vectorizer.pkl')
+        p.write_binary(pickle.dumps(['test']))
+
+        with pytest.raises(ValueError):
+            Vectorizer.load(str(p))
+
+    def test_invalid_input(self):
+        with pytest.raises(ValueError):
+            Vectorizer(norm='l1')
+        with pytest.raises(RuntimeError):
+            Vectorizer().transform([Document('without tokens')])
+        with pytest.raises(ValueError):
+            Vectorizer().fit(create_docs(), batch_size=0)
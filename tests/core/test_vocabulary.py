@@ -0,0 +1,150 @@
+import pickle
+
+import pytest
+
+from nlpiper.core.vocabulary import (
+    IdVocabulary,
+    MappedVocabulary,
+    Vocabulary
+)
+
+TOKENS = ['this', 'is', 'a', 'Token', 'ação', '']
+
+
+class TestVocabulary:
+
+    @pytest.mark.parametrize('case_sensitive,inputs,results', [
+        (True, ['this', 'This', 'Token', 'token', 'ação', 'random', ''], [True, False, True, False, True, False, True]),
+        (False, ['this', 'This', 'Token', 'token', 'AÇÃO', 'random', ''], [True, True, True, True, True, False, True]),
+    ])
+    def test_membership(self, case_sensitive, inputs, results):
+        vocab = Vocabulary(TOKENS, case_sensitive=case_sensitive)
+
+        assert [token in vocab for token in inputs] == results
+        assert len(vocab) == len(TOKENS)
+        assert 1 not in vocab
+
+    def test_repr(self):
+        vocab = Vocabulary(['b', 'a', 'b'])
+
+        assert repr(vocab) == "Vocabulary(['a', 'b'], case_sensitive=True)"
+        assert set(eval(repr(vocab))) == set(vocab)
+        # Built once
+        assert repr(vocab) is repr(vocab)
+
+    def test_pickle(self):
+        import pickle
+
+        vocab = Vocabulary(['b', 'a'], case_sensitive=False)
+        repr(vocab)
+        out = pickle.loads(pickle.dumps(vocab))
+
+        assert out._repr is None
+        assert repr(out) == repr(vocab)
+        assert 'A' in out
+
+
+class TestMappedVocabulary:
+
+    @pytest.mark.parametrize('case_sensitive,inputs,results', [
+        (True, ['this', 'This', 'Token', 'token', 'ação', 'random', ''], [True, False, True, False, True, False, True]),
+        (False, ['this', 'This', 'Token', 'token', 'AÇÃO', 'random', ''], [True, True, True, True, True, False, True]),
+    ])
+    def test_membership(self, case_sensitive, inputs, results, tmpdir):
+        vocab = MappedVocabulary.build(TOKENS, str(tmpdir.join('vocab.bin')), case_sensitive=case_sensitive)
+
+        assert [token in vocab for token in inputs] == results
+        assert len(vocab) == len(TOKENS)
+        assert vocab.case_sensitive == case_sensitive
+        assert 1 not in vocab
+
+    def test_save_and_load(self, tmpdir):
+        path = str(tmpdir.join('vocab.bin'))
+        vocab = Vocabulary(TOKENS, case_sensitive=False)
+        vocab.save(path)
+
+        mapped = MappedVocabulary(path)
+
+        assert sorted(mapped) == sorted(vocab)
+        assert mapped.case_sensitive is False
+        assert repr(mapped) == f"MappedVocabulary({path!r})"
+
+    def test_empty_vocabulary(self, tmpdir):
+        vocab = MappedVocabulary.build([], str(tmpdir.join('vocab.bin')))
+
+        assert len(vocab) == 0
+        assert 'token' not in vocab
+
+    def test_pickle_reopens_file(self, tmpdir):
+        vocab = MappedVocabulary.build(TOKENS, str(tmpdir.join('vocab.bin')))
+
+        out = pickle.loads(pickle.dumps(vocab))
+
+        assert out.path == vocab.path
+        assert all(token in out for token in TOKENS)
+
+    def test_invalid_file(self, tmpdir):
+        p = tmpdir.join('vocab.bin')
+        p.write_binary(b'\x00' * 32)
+
+        with pytest.raises(ValueError):
+            MappedVocabulary(str(p))
+
+
+class TestIdVocabulary:
+
+    def test_encode_and_decode(self):
+        from array import array
+
+        vocab = IdVocabulary(['this', 'is'])
+
+        ids = vocab.encode(['this', 'is', 'a', 'test', 'a'])
+
+        assert ids == array('I', [1, 2, 3, 4, 3])
+        assert vocab.decode(ids) == ['this', 'is', 'a', 'test', 'a']
+        assert list(vocab) == ['<unk>', 'this', 'is', 'a', 'test']
+        assert 'test' in vocab
+        assert repr(vocab) == "IdVocabulary(<5 tokens>, unknown='<unk>')"
+
+    def test_encode_without_growing(self):
+        vocab = IdVocabulary(['this', 'is'], unknown='?')
+
+        ids = vocab.encode(['this', 'random', 'is'], grow=False)
+
+        assert list(ids) == [1, 0, 2]
+        assert vocab.decode(ids) == ['this', '?', 'is']
+        assert len(vocab) == 3
+
+    def test_decode_numpy_ids(self):
+        np = pytest.importorskip('numpy')
+
+        vocab = IdVocabulary(TOKENS)
+
+        assert vocab.decode(np.frombuffer(vocab.encode(TOKENS), dtype=np.uint32)) == TOKENS
+
+    def test_save_and_load(self, tmpdir):
+        path = str(tmpdir.join('vocab.json'))
+        vocab = IdVocabulary(TOKENS, unknown='<unknown>')
+        vocab.save(path)
+
+        out = IdVocabulary.load(path)
+
+        assert list(out) == list(vocab)
+        assert out.unknown == '<unknown>'
+        assert out.encode(TOKENS) == vocab.encode(TOKENS)
+        assert repr(out) == repr(vocab) == f"IdVocabulary.load({path!r})"
+
+    @pytest.mark.parametrize('content', ['{"a": 1}', '[]', '["<unk>", 1]', '["<unk>", "a", "a"]'])
+    def test_load_invalid_file(self, tmpdir, content):
+        p = tmpdir.join('vocab.json')
+        p.write(content)
+
+        with pytest.raises(ValueError):
+            IdVocabulary.load(str(p))
+
+    def test_pickle(self):
+        vocab = IdVocabulary(TOKENS)
+
+        out = pickle.loads(pickle.dumps(vocab))
+
+        assert out.encode(TOKENS, grow=False) == vocab.encode(TOKENS, grow=False)
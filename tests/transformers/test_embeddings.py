@@ -1,9 +1,15 @@
 import pytest
 
+from nlpiper.core.composition import Compose
 from nlpiper.core.document import Document
 from nlpiper.transformers.embeddings import (
     GensimEmbeddings,
-    TorchTextEmbeddings
+    HashingEmbeddings,
+    TorchTextEmbeddings,
+    dequantize,
+    load_keyed_vectors,
+    quantize,
+    save_keyed_vectors
 )
 from nlpiper.transformers.tokenizers import BasicTokenizer
 from nlpiper.transformers.normalizers import CaseTokens
@@ -33,6 +39,15 @@ def create_gensim_embeddings():
     return Embeddings()
 
 
+def create_keyed_vectors():
+    import numpy as np
+    from gensim.models import KeyedVectors
+
+    kv = KeyedVectors(4)
+    kv.add_vectors(['test', 'random', 'stuff'], np.arange(12, dtype=np.float32).reshape(3, 4))
+    return kv
+
+
 def create_embeddings_fasttext_glove(tmpdir):
     from torchtext.vocab import Vectors
 
@@ -90,6 +105,278 @@ class TestGensimEmbeddings:
         with pytest.raises(AssertionError):
             GensimEmbeddings(self.glove_vectors, 'random')
 
+    @pytest.mark.parametrize('apply_doc', ['sum', 'mean', 'max'])
+    def test_embedding_vectors(self, apply_doc):
+        kv = create_keyed_vectors()
+        doc = BasicTokenizer()(Document('test unknown stuff'))
+
+        out = GensimEmbeddings(kv, apply_doc)(doc)
+
+        expected = [kv['test'], self.np.zeros(4), kv['stuff']]
+        assert all((token.embedded == vector).all() for token, vector in zip(out.tokens, expected))
+        assert self.np.allclose(out.embedded, getattr(self.np, apply_doc)(expected, axis=0))
+
+    @pytest.mark.parametrize('apply_doc', ['sum', 'mean', 'max'])
+    def test_embedding_without_tokens(self, apply_doc):
+        kv = create_keyed_vectors()
+        docs = [BasicTokenizer()(Document(text)) for text in ['test random unknown test', '', 'stuff', 'random']]
+
+        e = GensimEmbeddings(kv, apply_doc, keep_tokens=False)
+        # Small chunks, so the tokens of a document are split by several chunks
+        e.chunk_size = 3
+        out = list(Compose([e]).pipe(docs, batch_size=3)) + [e(docs[0])]
+
+        for d, doc in zip(out, docs + docs[:1]):
+            assert self.np.allclose(d.embedded, GensimEmbeddings(kv, apply_doc)(doc).embedded)
+            assert d.tokens_embedded is None
+            assert all(token.embedded is None for token in d.tokens)
+        assert repr(e).endswith("apply_doc='%s', keep_tokens=False, vector_size=4, mapfile_path=None)" % apply_doc)
+
+    @pytest.mark.parametrize('dtype,scale,atol', [
+        ('float16', 'vector', 1e-2),
+        ('int8', 'vector', 11 / 254),
+        ('int8', 'dimension', 11 / 254),
+    ])
+    @pytest.mark.parametrize('keep_tokens', [True, False])
+    def test_embedding_dtype(self, dtype, scale, atol, keep_tokens):
+        kv = create_keyed_vectors()
+        docs = [BasicTokenizer()(Document(text)) for text in ['test random unknown stuff', '']]
+
+        e = GensimEmbeddings(kv, keep_tokens=keep_tokens, dtype=dtype, scale=scale)
+        out = e.batch(docs)
+
+        for d, doc in zip(out, docs):
+            expected = GensimEmbeddings(kv)(doc)
+            assert d.embedded.dtype == dtype
+            assert self.np.allclose(dequantize(d.embedded, d.embedded_scale), expected.embedded,
+                                    atol=atol)
+            if keep_tokens:
+                matrix = dequantize(d.tokens_embedded, d.tokens_embedded_scale)
+                assert d.tokens_embedded.dtype == dtype
+                assert self.np.allclose(matrix, expected.tokens_embedded, atol=atol)
+                assert all(self.np.shares_memory(token.embedded, d.tokens_embedded) for token in d.tokens)
+        assert "dtype='%s'" % dtype in repr(e)
+        assert ("scale='dimension'" in repr(e)) == (scale == 'dimension')
+
+    @pytest.mark.parametrize('scale', ['vector', 'dimension'])
+    def test_quantize(self, scale):
+        vectors = self.np.random.default_rng(0).normal(size=(10, 8)).astype(self.np.float32)
+        vectors[3] = 0
+
+        q, scales = quantize(vectors, 'int8', scale)
+
+        assert q.dtype == self.np.int8
+        assert scales.shape == ((10, 1) if scale == 'vector' else (8,))
+        assert self.np.all(self.np.abs(dequantize(q, scales) - vectors) <= scales / 2 + 1e-7)
+        assert self.np.array_equal(dequantize(q[3:4], scales[3:4] if scale == 'vector' else scales), vectors[3:4])
+
+        q, scales = quantize(vectors, 'float16')
+        assert q.dtype == self.np.float16 and scales is None
+        assert self.np.allclose(dequantize(q), vectors, rtol=1e-3)
+
+    @pytest.mark.parametrize('dtype,scale', [('int4', 'vector'), ('int8', 'row')])
+    def test_quantize_invalid(self, dtype, scale):
+        with pytest.raises(ValueError):
+            quantize(self.np.zeros(4), dtype, scale)
+        with pytest.raises(AssertionError):
+            GensimEmbeddings(create_keyed_vectors(), dtype=dtype, scale=scale)
+
+    def test_embedding_tokens_matrix(self):
+        doc = BasicTokenizer()(Document('test unknown stuff'))
+
+        out = GensimEmbeddings(create_keyed_vectors())(doc)
+
+        assert out.tokens_embedded.shape == (3, 4)
+        assert out.tokens_embedded.flags['C_CONTIGUOUS']
+        assert all(self.np.shares_memory(token.embedded, out.tokens_embedded) for token in out.tokens)
+
+        copy = out._deepcopy()
+        assert all(self.np.shares_memory(token.embedded, copy.tokens_embedded) for token in copy.tokens)
+        assert not self.np.shares_memory(copy.tokens_embedded, out.tokens_embedded)
+
+    def test_embedding_fasttext_unknown_tokens(self):
+        from gensim.models.fasttext import FastText
+
+        kv = FastText(vector_size=4, min_count=1, sentences=[['random', 'stuff']], epochs=1).wv
+        doc = BasicTokenizer()(Document('random stuffs'))
+
+        out = GensimEmbeddings(kv)(doc)
+
+        assert self.np.allclose(out.tokens[1].embedded, kv['stuffs'])
+
+    def test_embedding_memory_mapped(self, tmpdir):
+        import pickle
+
+        path = str(tmpdir.join('vectors.kv'))
+        save_keyed_vectors(create_keyed_vectors(), path)
+        kv = load_keyed_vectors(path)
+        doc = BasicTokenizer()(Document('test unknown stuff'))
+
+        e = GensimEmbeddings(kv)
+        data = pickle.dumps(e)
+        out = pickle.loads(data)
+
+        assert isinstance(kv.vectors, self.np.memmap)
+        assert e.kwargs['mapfile_path'] == path
+        assert isinstance(out.keyed_vectors.vectors, self.np.memmap)
+        # The vectors are not pickled
+        assert len(data) < len(pickle.dumps(GensimEmbeddings(load_keyed_vectors(path, mmap=None))))
+        assert self.np.array_equal(out(doc).embedded, e(doc).embedded)
+
+    def test_embedding_pickle_in_memory(self):
+        import pickle
+
+        e = GensimEmbeddings(create_keyed_vectors())
+        out = pickle.loads(pickle.dumps(e))
+        doc = BasicTokenizer()(Document('test unknown stuff'))
+
+        assert out.keyed_vectors.mapfile_path is None
+        assert self.np.array_equal(out(doc).embedded, e(doc).embedded)
+
+    def test_embedding_batch(self):
+        e = GensimEmbeddings(create_keyed_vectors())
+        docs = [BasicTokenizer()(Document(text)) for text in ['test random', '', 'stuff unknown', 'test']]
+
+        out = list(Compose([e]).pipe(docs, batch_size=3))
+
+        for doc, d in zip(docs, out):
+            expected = e(doc)
+            assert self.np.array_equal(d.embedded, expected.embedded)
+            assert all((a.embedded == b.embedded).all() for a, b in zip(d.tokens, expected.tokens))
+            assert d.steps == expected.steps
+            assert self.np.array_equal(d.tokens_embedded, expected.tokens_embedded)
+
+        # Each document owns its matrix
+        assert not self.np.shares_memory(out[0].tokens_embedded, out[2].tokens_embedded)
+
+    @pytest.mark.parametrize('apply_doc', ['sum', 'mean', 'max'])
+    @pytest.mark.parametrize('dtype', [None, 'float16'])
+    def test_embed_batch(self, apply_doc, dtype):
+        e = GensimEmbeddings(create_keyed_vectors(), apply_doc=apply_doc, dtype=dtype)
+        docs = [BasicTokenizer()(Document(text)) for text in ['test random', '', 'stuff unknown test', 'test']]
+
+        out = e.embed_batch(docs)
+
+        assert out.vectors.shape == (4, 3, 4)
+        assert out.pooled.shape == (4, 4)
+        assert out.vectors.dtype == out.pooled.dtype == (self.np.float16 if dtype else self.np.float32)
+        assert list(out.indices) == [0, 1, 2, 3]
+        assert list(out.lengths) == [2, 0, 3, 1]
+        for i, doc in enumerate(docs):
+            expected = e(doc)
+            assert self.np.array_equal(out.vectors[i, :out.lengths[i]], expected.tokens_embedded)
+            assert not out.vectors[i, out.lengths[i]:].any()
+            assert self.np.array_equal(out.pooled[i], expected.embedded)
+            # Documents are not changed
+            assert doc.embedded is None and doc.steps == ['BasicTokenizer()']
+
+    def test_embed_batch_without_tokens(self):
+        out = GensimEmbeddings(create_keyed_vectors()).embed_batch([BasicTokenizer()(Document(''))])
+
+        assert out.vectors.shape == (1, 0, 4)
+        assert not out.pooled.any()
+
+        with pytest.raises(RuntimeError):
+            GensimEmbeddings(create_keyed_vectors()).embed_batch([Document('test')])
+
+    def test_embed_buckets(self):
+        e = GensimEmbeddings(create_keyed_vectors())
+        texts = ['test random stuff', 'test', 'stuff test', 'random', 'test test stuff random']
+        docs = [BasicTokenizer()(Document(text)) for text in texts]
+
+        out = list(e.embed_buckets(docs, batch_size=2))
+
+        assert [list(b.indices) for b in out] == [[1, 3], [2, 0], [4]]
+        assert [b.vectors.shape[1] for b in out] == [1, 3, 4]
+        for batch in out:
+            for i, pooled in zip(batch.indices, batch.pooled):
+                assert self.np.array_equal(pooled, e(docs[i]).embedded)
+
+        with pytest.raises(ValueError):
+            next(e.embed_buckets(docs, batch_size=0))
+
+
+class TestHashingEmbeddings:
+    pytest.importorskip('numpy')
+    import numpy as np
+
+    @pytest.mark.parametrize('apply_doc', ['sum', 'mean', 'max'])
+    @pytest.mark.parametrize('char_ngrams', [None, (2, 4)])
+    def test_embedding(self, apply_doc, char_ngrams):
+        doc = BasicTokenizer()(Document('test random test stuff'))
+        e = HashingEmbeddings(vector_size=16, char_ngrams=char_ngrams, apply_doc=apply_doc)
+
+        out = e(doc)
+
+        assert out.tokens_embedded.shape == (4, 16)
+        assert self.np.array_equal(out.tokens[0].embedded, out.tokens[2].embedded)
+        assert self.np.allclose(self.np.linalg.norm(out.tokens_embedded, axis=1), 1)
+        assert self.np.allclose(out.embedded, getattr(self.np, apply_doc)(out.tokens_embedded, axis=0))
+        assert out.steps[-1] == repr(e)
+
+    def test_embedding_deterministic(self):
+        doc = BasicTokenizer()(Document('test random stuff'))
+
+        out = HashingEmbeddings(vector_size=8)(doc)
+
+        # The hashes do not depend on the process
+        expected = self.np.zeros(8)
+        expected[[4, 5, 6]] = [-1 / 3, 1 / 3, 1 / 3]
+        assert self.np.allclose(out.embedded, expected)
+        assert not self.np.array_equal(HashingEmbeddings(vector_size=8, seed=1)(doc).embedded, out.embedded)
+
+    @pytest.mark.parametrize('apply_doc', ['sum', 'mean', 'max'])
+    @pytest.mark.parametrize('keep_tokens', [True, False])
+    def test_empty_tokens(self, apply_doc, keep_tokens):
+        doc = BasicTokenizer()(Document('test random'))
+        expected = HashingEmbeddings(vector_size=16, char_ngrams=(2, 3), apply_doc=apply_doc)(doc)
+        doc = BasicTokenizer()(Document('test the random a'))
+        doc.tokens[1].cleaned = doc.tokens[3].cleaned = ''
+        empty = BasicTokenizer()(Document('the'))
+        empty.tokens[0].cleaned = ''
+
+        e = HashingEmbeddings(vector_size=16, char_ngrams=(2, 3), apply_doc=apply_doc, keep_tokens=keep_tokens)
+        out = e.batch([doc, empty])
+
+        # Empty tokens are zeros and are not pooled
+        assert self.np.allclose(out[0].embedded, expected.embedded)
+        assert not self.np.any(out[1].embedded)
+        if keep_tokens:
+            assert not self.np.any(out[0].tokens_embedded[[1, 3]])
+            assert not self.np.any(out[1].tokens_embedded)
+        batch = e.embed_batch([doc, empty])
+        assert self.np.allclose(batch.pooled[0], expected.embedded)
+        assert not self.np.any(batch.pooled[1])
+
+    def test_embedding_char_ngrams(self):
+        doc = BasicTokenizer()(Document('embedding embeddings'))
+
+        words = HashingEmbeddings(vector_size=1024)(doc).tokens_embedded
+        ngrams = HashingEmbeddings(vector_size=1024, char_ngrams=(3, 5))(doc).tokens_embedded
+
+        assert self.np.dot(words[0], words[1]) < 0.5
+        assert self.np.dot(ngrams[0], ngrams[1]) > 0.5
+
+    def test_embedding_batch(self):
+        e = HashingEmbeddings(vector_size=8, char_ngrams=(3, 3), keep_tokens=False)
+        docs = [BasicTokenizer()(Document(text)) for text in ['test random', '', 'stuff unknown test', 'test']]
+
+        out = e.batch(docs)
+
+        for doc, d in zip(docs, out):
+            assert self.np.allclose(d.embedded, e(doc).embedded)
+
+    def test_create_from_steps(self):
+        e = HashingEmbeddings(vector_size=8, char_ngrams=(3, 5), seed=2)
+
+        assert repr(e) == "HashingEmbeddings(vector_size=8, char_ngrams=(3, 5), seed=2, apply_doc='mean')"
+        assert repr(Compose.create_from_steps([repr(e)]).transformers[0]) == repr(e)
+
+    @pytest.mark.parametrize('inputs', [{'vector_size': 0}, {'char_ngrams': (3, 2)}, {'apply_doc': 'median'}])
+    def test_invalid_input(self, inputs):
+        with pytest.raises(AssertionError):
+            HashingEmbeddings(**inputs)
+
 
 class TestTorchTextEmbeddings:
     pytest.importorskip('numpy')
@@ -127,6 +414,29 @@ class TestTorchTextEmbeddings:
         assert doc.embedded.shape == (6,)
         assert out is None
 
+    @pytest.mark.parametrize('emb_model', [create_embeddings_fasttext_glove, create_embeddings_charngram])
+    def test_embeddings_single_array(self, emb_model, tmpdir):
+        doc = BasicTokenizer()(Document('the random the'))
+        model = emb_model(tmpdir)
+
+        out = TorchTextEmbeddings(model)(doc)
+
+        for token in out.tokens:
+            expected = model.get_vecs_by_tokens(token.cleaned).reshape(-1).numpy()
+            assert self.np.array_equal(token.embedded, expected)
+        # Token embeddings are rows of the same array
+        assert all(self.np.shares_memory(token.embedded, out.tokens[0].embedded.base) for token in out.tokens)
+
+    def test_export_keyed_vectors(self, tmpdir):
+        model = create_embeddings_fasttext_glove(tmpdir)
+        path = str(tmpdir.join('vectors.kv'))
+
+        save_keyed_vectors(model, path)
+        kv = load_keyed_vectors(path)
+
+        assert kv.vector_size == 6
+        assert self.np.array_equal(kv['the'], model['the'].numpy())
+
     def test_random_apply_doc(self, tmpdir):
         model = create_embeddings_fasttext_glove(tmpdir)
         with pytest.raises(AssertionError):
@@ -2,17 +2,45 @@ import pytest
 
 from nlpiper.transformers.normalizers import (
     CaseTokens,
+    CountTokens,
+    EncodeTokens,
+    FusedNormalizer,
+    RemoveEmptyTokens,
     RemovePunctuation,
     RemoveStopWords,
     VocabularyFilter,
     Stemmer,
     SpellCheck
 )
+from nlpiper.transformers.base import normalize_batch
 from nlpiper.transformers.tokenizers import BasicTokenizer
+from nlpiper.core.composition import Compose
 from nlpiper.core.document import (
     Document,
     Token
 )
+from nlpiper.core.frequencies import (
+    SketchFrequencies,
+    TokenFrequencies
+)
+from nlpiper.core.vocabulary import (
+    IdVocabulary,
+    MappedVocabulary,
+    Vocabulary
+)
+
+
+def fake_words():
+    from tests.conftest import FakeHunspell
+    return list(FakeHunspell.words)
+
+
+def fake_dictionary(tmpdir, language='fake', words=None):
+    """Write Hunspell dictionary files with the fake words, returns their directory."""
+    words = fake_words() if words is None else words
+    tmpdir.join(f'{language}.aff').write('SET UTF-8\n')
+    tmpdir.join(f'{language}.dic').write(f"{len(words)}\n" + "\n".join(words) + "\n")
+    return str(tmpdir)
 
 
 class TestNormalizersValidations:
@@ -196,6 +224,32 @@ class TestVocabularyFilter:
         assert doc.steps == [repr(t), repr(n)]
         assert out is None
 
+    @pytest.mark.parametrize('sensitive,inputs,results', [
+        (True, ['This', 'is', 'a', 'Token'], ['', 'is', 'a', '']),
+        (False, ['This', 'is', 'a', 'Token'], ['This', 'is', 'a', 'Token']),
+    ])
+    @pytest.mark.parametrize('mapped', [False, True])
+    def test_vocabulary_filter_w_vocabulary(self, sensitive, inputs, results, mapped, tmpdir):
+        vocab = Vocabulary(self.vocabulary, case_sensitive=sensitive)
+        if mapped:
+            vocab = vocab.save(str(tmpdir.join('vocab.bin')))
+
+        doc = Document(" ".join(inputs))
+        t = BasicTokenizer()
+        n = VocabularyFilter(vocabulary=vocab, case_sensitive=sensitive)
+
+        out = n(t(doc))
+
+        assert [token.cleaned for token in out.tokens] == results
+        assert isinstance(eval(repr(vocab)), MappedVocabulary if mapped else Vocabulary)
+        # The steps of every document share the same representation, built once
+        assert n(t(doc)).steps[-1] is out.steps[-1]
+        assert repr(Compose.create_from_steps(out.steps)) == repr(Compose([t, n]))
+
+    def test_vocabulary_filter_w_different_case_sensitive(self):
+        with pytest.raises(ValueError):
+            VocabularyFilter(vocabulary=Vocabulary(self.vocabulary, case_sensitive=False), case_sensitive=True)
+
 
 class TestSpellCheck:
     @pytest.mark.parametrize('max_distance,inputs,results', [
@@ -232,6 +286,200 @@ class TestSpellCheck:
         assert doc.steps == [repr(t), repr(n)]
         assert out is None
 
+    @pytest.mark.parametrize('max_distance', [None, 1])
+    @pytest.mark.parametrize('cache_path', [None, 'spellcheck.sqlite'])
+    def test_spell_checking_cache(self, max_distance, cache_path, fake_hunspell, tmpdir):
+        pytest.importorskip('nltk')
+        if cache_path is not None:
+            cache_path = str(tmpdir.join(cache_path))
+
+        inputs = ['tesx', 'Word', 'tesx', 'xyz', 'Word', 'tesx']
+        doc = BasicTokenizer()(Document(" ".join(inputs)))
+
+        expected = SpellCheck(language='fake', max_distance=max_distance)(doc)
+
+        n = SpellCheck(language='fake', max_distance=max_distance, cache_size=10, cache_path=cache_path,
+                       hunspell_data_dir=fake_dictionary(tmpdir))
+        out = n(doc)
+        again = n(doc)
+
+        assert out.tokens == expected.tokens
+        assert again.tokens == expected.tokens
+        assert n.h.calls['spell'] == 3
+        assert n.cache.stats['hits'] == 3
+        assert n.cache.stats['misses'] == 3
+
+    @pytest.mark.parametrize('fake_hunspell', ['bulk', 'plain'], indirect=True)
+    @pytest.mark.parametrize('max_distance', [None, 1])
+    def test_spell_checking_types_at_once(self, fake_hunspell, max_distance):
+        pytest.importorskip('nltk')
+        inputs = ['tesx', 'Word', 'tesx', 'xyz', 'Thisx', 'fast']
+        docs = [BasicTokenizer()(Document(" ".join(inputs[i:]))) for i in range(3)]
+
+        expected = [[SpellCheck(language='fake', max_distance=max_distance).normalize(token.cleaned)['cleaned']
+                     for token in doc.tokens] for doc in docs]
+
+        n = SpellCheck(language='fake_types', max_distance=max_distance)
+        out = list(Compose([n]).pipe(docs, batch_size=3))
+
+        assert [[token.cleaned for token in doc.tokens] for doc in out] == expected
+        assert n.h.calls['spell'] == 5
+        if fake_hunspell.__name__ == 'FakeBulkHunspell':
+            assert n.h.calls['bulk_suggest'] == (1 if max_distance else 0)
+        else:
+            assert n.h.calls['suggest'] == (3 if max_distance else 0)
+
+    def test_spell_checking_persistent_cache(self, fake_hunspell, tmpdir):
+        pytest.importorskip('nltk')
+        cache_path = str(tmpdir.join('spellcheck.sqlite'))
+        data_dir = fake_dictionary(tmpdir)
+        doc = BasicTokenizer()(Document("tesx Word xyz"))
+
+        n = SpellCheck(language='fake', max_distance=1, cache_size=10, cache_path=cache_path,
+                       hunspell_data_dir=data_dir)
+        n.warm_cache(token.cleaned for token in doc.tokens)
+        out = n(doc)
+        assert n.cache.stats['memory']['hits'] == 3
+
+        # The in-memory cache of a new instance is filled from disk
+        other = SpellCheck(language='fake', max_distance=1, cache_size=10, cache_path=cache_path,
+                           hunspell_data_dir=data_dir)
+        other.h.calls['spell'] = 0
+        assert other(doc).tokens == out.tokens
+        assert other.cache.stats['disk']['hits'] == 3
+        assert other.h.calls['spell'] == 0
+
+        # Results for other max distances are not shared
+        distance = SpellCheck(language='fake', max_distance=2, cache_size=10, cache_path=cache_path,
+                              hunspell_data_dir=data_dir)
+        distance(doc)
+        assert distance.cache.hits == 0
+
+    def test_spell_checking_cache_other_dictionary(self, fake_hunspell, tmpdir):
+        pytest.importorskip('nltk')
+        cache_path = str(tmpdir.join('spellcheck.sqlite'))
+        doc = BasicTokenizer()(Document("tesx Word xyz"))
+
+        n = SpellCheck(language='fake', max_distance=1, cache_size=10, cache_path=cache_path,
+                       hunspell_data_dir=fake_dictionary(tmpdir.mkdir('first')))
+        n(doc)
+
+        # Same language and options, with a dictionary of other words
+        other = SpellCheck(language='fake', max_distance=1, cache_size=10, cache_path=cache_path,
+                           hunspell_data_dir=fake_dictionary(tmpdir.mkdir('second'), words=['tesz', 'Word']))
+        other(doc)
+        assert other.cache.hits == 0
+        assert other.cache.disk.table != n.cache.disk.table
+
+    def test_spell_checking_cache_without_dictionary_files(self, fake_hunspell, tmpdir):
+        # Results of a dictionary which can not be fingerprinted are only kept in memory
+        n = SpellCheck(language='fake', max_distance=1, cache_size=10, cache_path=str(tmpdir.join('cache.db')))
+
+        assert n.cache.disk is None
+
+    def test_spell_checking_cache_shared_file(self, fake_hunspell, tmpdir):
+        pytest.importorskip('nltk')
+        cache_path = str(tmpdir.join('spellcheck.sqlite'))
+        data_dir = fake_dictionary(tmpdir)
+        first = SpellCheck(language='fake', max_distance=1, cache_size=10, cache_path=cache_path,
+                           hunspell_data_dir=data_dir)
+        second = SpellCheck(language='fake', max_distance=1, cache_size=10, cache_path=cache_path,
+                            hunspell_data_dir=data_dir)
+
+        # Each batch is committed, so both instances write to the file and see the results of the other
+        first(BasicTokenizer()(Document("tesx Word")))
+        second(BasicTokenizer()(Document("xyz Thisx")))
+        first(BasicTokenizer()(Document("xyz")))
+
+        assert first.cache.stats['disk']['hits'] == 1
+        assert len(first.cache.disk) == len(second.cache.disk) == 4
+
+    @pytest.mark.parametrize('max_distance,inputs,results', [
+        (None, ['This', 'isx', 'a', 'stop', 'Word'], ['This', '', 'a', 'stop', 'Word']),
+        (1, ['Thisx', 'iszk', 'a', 'stop', 'Word', 'tesx'], ['This', 'iszk', 'a', 'stop', 'Word', 'test']),
+    ])
+    def test_spell_checking_symspell(self, max_distance, inputs, results, fake_hunspell, tmpdir):
+        from nlpiper.core.symspell import SymSpellIndex
+
+        index_path = str(tmpdir.join('index.pkl'))
+        SymSpellIndex(fake_words(), max_distance=2).save(index_path)
+        doc = BasicTokenizer()(Document(" ".join(inputs)))
+
+        n = SpellCheck(max_distance=max_distance, backend='symspell', index_path=index_path)
+        out = n(doc)
+
+        assert [token.cleaned for token in out.tokens] == results
+        assert repr(Compose.create_from_steps(out.steps[-1:])) == repr(Compose([n]))
+
+    def test_spell_checking_symspell_from_hunspell_dictionary(self, fake_hunspell, tmpdir):
+        tmpdir.join('xx_XX.dic').write(f"{len(fake_words())}\n" + "\n".join(f"{w}/S" for w in fake_words()))
+        doc = BasicTokenizer()(Document("Thisx tesx"))
+
+        n = SpellCheck('xx_XX', max_distance=1, backend='symspell', hunspell_data_dir=str(tmpdir))
+
+        assert [token.cleaned for token in n(doc).tokens] == ['This', 'test']
+
+    @pytest.mark.parametrize('backend', ['hunspell', 'symspell'])
+    @pytest.mark.parametrize('max_distance', [None, 1])
+    def test_spell_checking_affixed_words(self, backend, max_distance, fake_hunspell, monkeypatch, tmpdir):
+        pytest.importorskip('nltk')
+        # The dictionary only lists the stems, Hunspell also accepts their plurals
+        tmpdir.join('xx_XX.dic').write(f"{len(fake_words())}\n" + "\n".join(f"{w}/S" for w in fake_words()))
+        monkeypatch.setattr(fake_hunspell, 'spell', lambda self, word: word in self.words or word[:-1] in self.words)
+        doc = BasicTokenizer()(Document("tests texts words tesx"))
+
+        n = SpellCheck('xx_XX', max_distance=max_distance, backend=backend, hunspell_data_dir=str(tmpdir))
+
+        expected = ['tests', 'texts', 'words', 'test' if max_distance else '']
+        assert [token.cleaned for token in n(doc).tokens] == expected
+
+    @pytest.mark.parametrize('fake_hunspell', ['bulk', 'plain'], indirect=True)
+    def test_spell_checking_symspell_ties_in_index(self, fake_hunspell, tmpdir):
+        tmpdir.join('xx_XX.dic').write("4\nbar\ntest\ntext\ntent\n")
+        doc = BasicTokenizer()(Document("tet tesx car"))
+
+        n = SpellCheck('xx_XX', max_distance=1, backend='symspell', hunspell_data_dir=str(tmpdir))
+
+        # Ties are broken by the longest common prefix, then by the dictionary order, without Hunspell suggestions
+        assert [token.cleaned for token in n(doc).tokens] == ['test', 'test', 'bar']
+        assert n.h.calls['suggest'] == n.h.calls.get('bulk_suggest', 0) == 0
+
+    def test_spell_checking_symspell_inflected_words(self, fake_hunspell, monkeypatch, tmpdir):
+        pytest.importorskip('nltk')
+        words = ['test', 'tests', 'text', 'texts']
+        tmpdir.join('xx_XX.aff').write("SET UTF-8\n\nSFX S Y 1\nSFX S 0 s .\n")
+        tmpdir.join('xx_XX.dic').write("2\ntest/S\ntext/S\n")
+        monkeypatch.setattr(fake_hunspell, 'words', tuple(words))
+        doc = BasicTokenizer()(Document("testss textss tests"))
+
+        hunspell = SpellCheck('xx_XX', max_distance=2, hunspell_data_dir=str(tmpdir))
+        symspell = SpellCheck('xx_XX', max_distance=2, backend='symspell', hunspell_data_dir=str(tmpdir))
+
+        # The plurals are derived from the stems by the affix file
+        assert [token.cleaned for token in symspell(doc).tokens] == ['tests', 'texts', 'tests']
+        assert hunspell(doc).tokens == symspell(doc).tokens
+
+    def test_spell_checking_same_as_hunspell(self, fake_hunspell, tmpdir):
+        pytest.importorskip('nltk')
+        from nlpiper.core.symspell import SymSpellIndex
+
+        index_path = str(tmpdir.join('index.pkl'))
+        SymSpellIndex(fake_hunspell.words, max_distance=2).save(index_path)
+
+        doc = BasicTokenizer()(Document("Thisx tesx tet tentt Wordd xyz stop"))
+        hunspell = SpellCheck('fake', max_distance=2)
+        symspell = SpellCheck('fake', max_distance=2, backend='symspell', index_path=index_path)
+
+        assert hunspell(doc).tokens == symspell(doc).tokens
+
+    def test_spell_checking_unavailable_backend(self):
+        with pytest.raises(ValueError):
+            SpellCheck(backend='random')
+
+    def test_spell_checking_warm_cache_without_cache(self, fake_hunspell):
+        with pytest.raises(RuntimeError):
+            SpellCheck(language='fake').warm_cache(['test'])
+
 
 class TestStemmer:
 
@@ -274,3 +522,347 @@ class TestStemmer:
     def test_unavailable_version(self):
         with pytest.raises(ValueError):
             Stemmer(version='random')
+
+    @pytest.mark.parametrize('policy', ['lru', 'lfu'])
+    def test_stemmer_cache(self, policy):
+        pytest.importorskip('nltk')
+
+        inputs = ['computer', 'computer', 'because', 'computer']
+        doc = BasicTokenizer()(Document(" ".join(inputs)))
+
+        n = Stemmer(version='nltk', cache_size=2, cache_policy=policy)
+        out = n(doc)
+        n(doc)
+
+        assert [token.stem for token in out.tokens] == ['comput', 'comput', 'becaus', 'comput']
+        assert n.cache.stats['hits'] == 2
+        assert n.cache.stats['misses'] == 2
+        assert out.tokens == Stemmer(version='nltk')(doc).tokens
+        assert repr(Compose.create_from_steps(out.steps[-1:])) == repr(Compose([n]))
+
+    def test_stemmer_cache_w_tuple_stems(self):
+        pytest.importorskip('nltk')
+
+        class TupleStemmer:
+            def stem(self, token):
+                return ('fast', 'fastest') if token == 'fastest' else ()
+
+        doc = BasicTokenizer()(Document("fastest unknown fastest"))
+
+        n = Stemmer(version='nltk', cache_size=10)
+        n.stemmer = TupleStemmer()
+        out = n(doc)
+        n(doc)
+
+        assert [token.cleaned for token in out.tokens] == ['fast', 'unknown', 'fast']
+        assert [token.stem for token in out.tokens] == ['fast', 'unknown', 'fast']
+        assert n.cache.hit_ratio == 1 / 2
+
+    @pytest.mark.parametrize('fake_hunspell', ['bulk', 'plain'], indirect=True)
+    def test_stemmer_types_at_once(self, fake_hunspell):
+        docs = [BasicTokenizer()(Document(text)) for text in ["fastest test", "test fast", "faster"]]
+
+        n = Stemmer(version='hunspell', language='fake_types', cache_size=10)
+        out = list(Compose([n]).pipe(docs))
+
+        assert [[token.stem for token in doc.tokens] for doc in out] == [['fast', 'test'], ['test', 'fast'], ['fast']]
+        assert n.cache.stats['misses'] == 4
+        if fake_hunspell.__name__ == 'FakeBulkHunspell':
+            assert n.stemmer.calls['bulk_stem'] == 1
+        assert n.stemmer.calls['stem'] == 4
+
+    def test_stemmer_persistent_cache(self, tmpdir):
+        pytest.importorskip('nltk')
+
+        path = str(tmpdir.join('stems.pkl'))
+        doc = BasicTokenizer()(Document("computer because"))
+
+        n = Stemmer(version='nltk', cache_size=10, cache_path=path)
+        n(doc)
+        n.save_cache()
+
+        out = Stemmer(version='nltk', cache_size=10, cache_path=path)
+        assert len(out.cache) == 2
+        out(doc)
+        assert out.cache.hits == 2
+
+        # Stems from other languages are not loaded
+        other = Stemmer(version='nltk', language='portuguese', cache_size=10, cache_path=path)
+        assert len(other.cache) == 0
+
+        # Nor stems of a backend with other options
+        other = Stemmer(version='nltk', cache_size=10, cache_path=path, ignore_stopwords=True)
+        assert len(other.cache) == 0
+
+    def test_stemmer_save_cache_without_cache(self):
+        pytest.importorskip('nltk')
+
+        with pytest.raises(RuntimeError):
+            Stemmer(version='nltk').save_cache()
+
+
+class TestTypeLevelNormalization:
+    texts = ['This is a Test, test.', 'Test this TEST', '', 'fastest test']
+
+    def create_documents(self):
+        t = BasicTokenizer()
+        return [t(Document(text)) for text in self.texts]
+
+    def test_normalize_batch_same_as_sequential(self):
+        pytest.importorskip('nltk')
+        normalizers = [CaseTokens(), RemovePunctuation(), VocabularyFilter(['test', 'fastest', 'this']),
+                       Stemmer(version='nltk')]
+
+        expected = []
+        for doc in self.create_documents():
+            for n in normalizers:
+                doc = n(doc)
+            expected.append(doc)
+
+        docs = self.create_documents()
+        out = normalize_batch(docs, normalizers)
+
+        assert [d.tokens for d in out] == [d.tokens for d in expected]
+        assert [d.steps for d in out] == [d.steps for d in expected]
+        assert all(len(d.steps) == 1 for d in docs)
+
+        assert normalize_batch(docs, normalizers, inplace=True) is None
+        assert [d.tokens for d in docs] == [d.tokens for d in expected]
+
+    def test_normalize_batch_once_per_type(self, fake_hunspell):
+        docs = self.create_documents()
+        n = SpellCheck(language='fake')
+
+        normalize_batch(docs, [CaseTokens(), RemovePunctuation(), n], inplace=True)
+
+        # Only 'this', 'is', 'a', 'test' and 'fastest' are spell checked
+        assert n.h.calls['spell'] == 5
+
+    def test_normalize_batch_invalid_document(self):
+        with pytest.raises(RuntimeError):
+            normalize_batch([Document('test')], [CaseTokens()])
+
+
+class TestFusedNormalizer:
+
+    def create_document(self):
+        return BasicTokenizer()(Document('This is a Test, test.'))
+
+    def test_same_as_sequential(self):
+        normalizers = [CaseTokens(), RemovePunctuation(), VocabularyFilter(['test', 'this'])]
+
+        expected = self.create_document()
+        for n in normalizers:
+            expected = n(expected)
+
+        n = FusedNormalizer(normalizers)
+        out = n(self.create_document())
+
+        assert out == expected
+        assert out.steps == ['BasicTokenizer()', "CaseTokens(mode='lower')", 'RemovePunctuation()',
+                             "VocabularyFilter(vocabulary=['test', 'this'], case_sensitive=True)"]
+        assert n.normalize('Test,') == {'cleaned': 'test'}
+
+    def test_inplace(self):
+        doc = self.create_document()
+        n = FusedNormalizer([CaseTokens(), RemovePunctuation()])
+
+        assert n(doc, inplace=True) is None
+        assert [t.cleaned for t in doc.tokens] == ['this', 'is', 'a', 'test', 'test']
+
+    def test_flatten_and_repr(self):
+        n = FusedNormalizer([FusedNormalizer([CaseTokens()]), RemovePunctuation()])
+
+        assert repr(n) == "FusedNormalizer([CaseTokens(mode='lower'), RemovePunctuation()])"
+        assert repr(eval(repr(n))) == repr(n)
+
+    @pytest.mark.parametrize('normalizers,error', [
+        ([], ValueError),
+        ([CaseTokens(), BasicTokenizer()], TypeError),
+    ])
+    def test_invalid_normalizers(self, normalizers, error):
+        with pytest.raises(error):
+            FusedNormalizer(normalizers)
+
+    def test_writes_tokens_once(self, monkeypatch):
+        doc = self.create_document()
+        assignments = []
+
+        original = Token.__setattr__
+        monkeypatch.setattr(Token, '__setattr__', lambda t, k, v: assignments.append(k) or original(t, k, v))
+
+        FusedNormalizer([CaseTokens(), RemovePunctuation()])(doc, inplace=True)
+
+        # 'This', 'Test,' and 'test.' are the only tokens changed
+        assert assignments == ['cleaned'] * 3
+
+
+class TestRemoveEmptyTokens:
+
+    def create_document(self):
+        return VocabularyFilter(['a', 'test'])(BasicTokenizer()(Document('This is a test test')))
+
+    @pytest.mark.parametrize('inplace', [False, True])
+    def test_remove_empty_tokens(self, inplace):
+        doc = self.create_document()
+
+        out = RemoveEmptyTokens()(doc, inplace=inplace)
+        d = doc if inplace else out
+
+        assert [t.original for t in d.tokens] == ['a', 'test', 'test']
+        assert d.steps[-1] == 'RemoveEmptyTokens(keep_positions=False)'
+        assert d.token_positions is None
+        if not inplace:
+            assert len(doc.tokens) == 5
+
+    def test_keep_positions(self):
+        doc = RemoveEmptyTokens(keep_positions=True)(self.create_document())
+
+        assert doc.token_positions == [2, 3, 4]
+
+        # Positions are kept relative to the tokens before any removal
+        doc = VocabularyFilter(['test'])(doc)
+        doc = RemoveEmptyTokens()(doc)
+        assert [t.original for t in doc.tokens] == ['test', 'test']
+        assert doc.token_positions == [3, 4]
+
+    def test_no_empty_tokens(self):
+        doc = BasicTokenizer()(Document('This is a test'))
+
+        out = RemoveEmptyTokens(keep_positions=True)(doc)
+
+        assert out.tokens == doc.tokens
+        assert out.token_positions == [0, 1, 2, 3]
+
+    def test_with_invalid_input(self):
+        with pytest.raises(RuntimeError):
+            RemoveEmptyTokens()(Document('test'))
+
+    def test_compose(self):
+        pipe = Compose([BasicTokenizer(), CaseTokens(), VocabularyFilter(['test']), RemoveEmptyTokens()])
+        doc = pipe(Document('This is a Test'))
+
+        assert [t.cleaned for t in doc.tokens] == ['test']
+        assert repr(Compose.create_from_steps(doc.steps)) == repr(pipe)
+
+
+class TestEncodeTokens:
+
+    @pytest.mark.parametrize('inplace', [False, True])
+    def test_encode_tokens(self, inplace):
+        from array import array
+
+        doc = BasicTokenizer()(Document('this is a test this'))
+        t = EncodeTokens()
+
+        out = t(doc, inplace=inplace)
+        d = doc if inplace else out
+
+        assert d.token_ids == array('I', [1, 2, 3, 4, 1])
+        assert t.decode(d) == ['this', 'is', 'a', 'test', 'this']
+        assert len(d.tokens) == 5
+        assert d.steps[-1] == "EncodeTokens(vocabulary=IdVocabulary(<5 tokens>, unknown='<unk>'), grow=True, " \
+                              "keep_tokens=True)"
+
+        # The vocabulary is shared by the documents
+        assert t(BasicTokenizer()(Document('a new test'))).token_ids == array('I', [3, 5, 4])
+
+    def test_without_tokens(self):
+        t = EncodeTokens(keep_tokens=False)
+
+        out = t(BasicTokenizer()(Document('this is a test')))
+
+        assert out.tokens is None
+        assert t.decode(out) == ['this', 'is', 'a', 'test']
+
+        # Token transformers can not be applied to the document without tokens
+        with pytest.raises(RuntimeError):
+            CaseTokens()(out)
+
+    def test_shared_vocabulary(self, tmpdir):
+        path = str(tmpdir.join('vocabulary.json'))
+        docs = [BasicTokenizer()(Document(text)) for text in ['this is a test', 'another test']]
+        t = EncodeTokens()
+        encoded = [t(doc) for doc in docs]
+        t.vocabulary.save(path)
+
+        out = EncodeTokens(IdVocabulary.load(path), grow=False)
+
+        assert [list(out(doc).token_ids) for doc in docs] == [list(d.token_ids) for d in encoded]
+        assert out.decode(out(BasicTokenizer()(Document('unknown test')))) == ['<unk>', 'test']
+        assert len(out.vocabulary) == 6
+
+    def test_rollback(self, tmpdir):
+        path = str(tmpdir.join('vocabulary.json'))
+        IdVocabulary(['test']).save(path)
+        pipe = Compose([BasicTokenizer(), EncodeTokens(IdVocabulary.load(path), grow=False), CaseTokens()])
+
+        out = pipe(Document('test A'))
+
+        assert out.steps[1] == f"EncodeTokens(vocabulary=IdVocabulary.load({path!r}), grow=False, keep_tokens=True)"
+        assert repr(Compose.create_from_steps(out.steps)) == repr(pipe)
+        assert list(Compose.rollback_document(out).token_ids) == [1, 0]
+
+    def test_rollback_with_vocabulary_not_stored(self, tmpdir):
+        t = EncodeTokens()
+        out = t(BasicTokenizer()(Document('a test')))
+
+        with pytest.raises(ValueError):
+            Compose.rollback_document(CaseTokens()(out))
+
+        # Once stored the vocabulary is loaded from its file, until it grows
+        path = str(tmpdir.join('vocabulary.json'))
+        t.vocabulary.save(path)
+        assert repr(t.vocabulary) == f"IdVocabulary.load({path!r})"
+        t(BasicTokenizer()(Document('new')))
+        assert repr(t.vocabulary) == "IdVocabulary(<4 tokens>, unknown='<unk>')"
+
+    def test_decode_without_encoding(self):
+        with pytest.raises(RuntimeError):
+            EncodeTokens().decode(BasicTokenizer()(Document('test')))
+
+    def test_with_invalid_input(self):
+        with pytest.raises(RuntimeError):
+            EncodeTokens()(Document('test'))
+
+
+class TestCountTokens:
+
+    @pytest.mark.parametrize('inplace', [False, True])
+    def test_count_tokens(self, inplace):
+        doc = BasicTokenizer()(Document('this is a test this'))
+        t = CountTokens()
+
+        out = t(doc, inplace=inplace)
+
+        assert t.frequencies.most_common(1) == [('this', 2)]
+        assert (doc if inplace else out).steps == ['BasicTokenizer()']
+        if not inplace:
+            assert out == doc and out is not doc
+
+    @pytest.mark.parametrize('sketch', [False, True])
+    def test_pipe(self, sketch):
+        texts = ['This is a test', 'another test', 'test']
+        t = CountTokens(SketchFrequencies(width=1024) if sketch else TokenFrequencies())
+
+        out = list(Compose([BasicTokenizer(), CaseTokens(), t]).pipe((Document(text) for text in texts), batch_size=2))
+
+        expected = Compose([BasicTokenizer(), CaseTokens()])
+        assert [d.tokens for d in out] == [expected(Document(text)).tokens for text in texts]
+        assert t.frequencies['test'] == 3
+        assert t.frequencies['this'] == 1
+
+    def test_vocabulary_filter(self):
+        docs = [BasicTokenizer()(Document(text)) for text in ['a test', 'another test', 'a test']]
+        t = CountTokens()
+        t.batch(docs, inplace=True)
+
+        out = VocabularyFilter(t.frequencies.vocabulary(min_count=2))(BasicTokenizer()(Document('another test')))
+
+        assert [token.cleaned for token in out.tokens] == ['', 'test']
+
+    def test_with_invalid_input(self):
+        with pytest.raises(RuntimeError):
+            CountTokens()(Document('test'))
+        with pytest.raises(RuntimeError):
+            CountTokens().batch([Document('test')])